@@ -0,0 +1,129 @@
+"""离线基准工具的测试"""
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from urp_academic_affairs_tools.benchmark import (
+    CaptchaVariant,
+    LatencySummary,
+    benchmark_captcha_modes,
+    benchmark_captcha_variants,
+    benchmark_json_backends,
+    load_captcha_corpus,
+    measure_candidate_memory,
+    parse_corrections,
+    percentile,
+    synthetic_course_list,
+)
+
+
+def _captcha_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("L", (80, 20), 200).save(buffer, format="GIF")
+    return buffer.getvalue()
+
+
+class _CountingClassifier:
+    def __init__(self, result: str = "Q7k2") -> None:
+        self.calls = 0
+        self.result = result
+
+    def classification(self, _img: bytes | Image.Image) -> str:
+        self.calls += 1
+        return self.result
+
+
+class LatencySummaryTests(unittest.TestCase):
+    def test_percentiles_use_nearest_rank(self) -> None:
+        samples = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.99), 99.0)
+        self.assertEqual(percentile(samples, 1.0), 100.0)
+        summary = LatencySummary.from_samples(samples)
+        self.assertEqual((summary.count, summary.median), (100, 50.5))
+        with self.assertRaises(ValueError):
+            percentile([], 0.5)
+
+
+class CaptchaBenchmarkTests(unittest.TestCase):
+    def test_corpus_labels_come_from_file_names(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "AB1c_01.gif").write_bytes(_captcha_bytes())
+            (root / "unlabeled.gif").write_bytes(_captcha_bytes())
+            (root / "notes.txt").write_text("skip")
+            samples = load_captcha_corpus(root)
+            (root / "empty").mkdir()
+            with self.assertRaises(ValueError):
+                load_captcha_corpus(root / "empty")
+        self.assertEqual([sample.label for sample in samples], ["ab1c", None])
+
+    def test_staged_mode_reports_both_pipelines(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "q7k2.gif"
+            path.write_bytes(_captcha_bytes())
+            samples = load_captcha_corpus(Path(directory))
+        classifier = _CountingClassifier()
+        reports = benchmark_captcha_modes(samples, classifier=classifier, repeat=2)
+        self.assertEqual([report.mode for report in reports], ["full", "staged"])
+        self.assertEqual([report.accuracy for report in reports], [1.0, 1.0])
+        self.assertEqual(reports[1].latency.count, 2)
+        # 预热 1 次 + 完整流程 2 × 2 次（四个字符裁剪像素相同）+ 分阶段 2 × 1 次
+        self.assertEqual(classifier.calls, 7)
+
+    def test_variants_report_strategy_accuracy_and_confusions(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "q7k2.gif"
+            path.write_bytes(_captcha_bytes())
+            samples = load_captcha_corpus(Path(directory))
+        variants = [
+            CaptchaVariant("default"),
+            CaptchaVariant("raw", parse_corrections(""), upscale=1),
+        ]
+        default, raw = benchmark_captcha_variants(
+            samples,
+            variants,
+            classifier=_CountingClassifier("Qyk2"),
+        )
+        # 每个分割字符都被识别成整串，只保留首字符 q，分割结果为 qqqq
+        self.assertEqual(default.accuracy("full"), 1.0)
+        self.assertEqual(default.accuracy("split"), 0.0)
+        self.assertEqual(default.accuracy("selected"), 1.0)
+        self.assertFalse(default.confusions)
+        self.assertEqual(raw.accuracy("selected"), 0.0)
+        self.assertEqual(dict(raw.confusions), {("7", "y"): 1})
+
+    def test_parse_corrections(self) -> None:
+        self.assertEqual(
+            "y9E".translate(parse_corrections("y7, 9r,EF")),
+            "7rF",
+        )
+        self.assertEqual(parse_corrections(""), {})
+        with self.assertRaises(ValueError):
+            parse_corrections("abc")
+
+
+class JsonBenchmarkTests(unittest.TestCase):
+    def test_backends_parse_the_same_courses(self) -> None:
+        payload = synthetic_course_list(50)
+        reports = benchmark_json_backends([payload], repeat=2)
+        self.assertEqual({report.candidates for report in reports}, {50})
+        self.assertEqual(reports[0].latency.count, 2)
+
+    def test_compact_candidates_retain_less_than_raw_objects(self) -> None:
+        payloads = [synthetic_course_list(200)]
+        compact = measure_candidate_memory(payloads, "compact")
+        raw = measure_candidate_memory(payloads, "raw-dict")
+        self.assertEqual((compact.candidates, raw.candidates), (200, 200))
+        self.assertLess(compact.retained_bytes, raw.retained_bytes)
+        with self.assertRaises(ValueError):
+            measure_candidate_memory(payloads, "pickle")
+
+
+if __name__ == "__main__":
+    unittest.main()
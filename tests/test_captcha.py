@@ -0,0 +1,166 @@
+"""验证码识别流程的离线测试"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from urp_academic_affairs_tools.client import CaptchaRecognizer, RecognizerRegistry
+from urp_academic_affairs_tools.client.captcha import decode_captcha_frames
+from urp_academic_affairs_tools.client.captcha_worker import (
+    CaptchaWorkerClient,
+    parse_worker_address,
+    start_captcha_worker,
+)
+from urp_academic_affairs_tools.config import load_settings
+
+QUADRANT_CHARACTERS = {10: "", 60: "b", 110: "1", 160: "c"}
+# 放大两倍后的整图宽度与首字符 1/3 宽裁剪宽度
+FULL_WIDTH = 160
+THIRD_WIDTH = 52
+
+
+def _captcha_bytes(frames: int = 2) -> bytes:
+    image = Image.new("L", (80, 20))
+    for index, value in enumerate(QUADRANT_CHARACTERS):
+        image.paste(value, (index * 20, 0, (index + 1) * 20, 20))
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        format="GIF",
+        save_all=True,
+        append_images=[image.copy() for _ in range(frames - 1)],
+    )
+    return buffer.getvalue()
+
+
+class _FakeClassifier:
+    def __init__(self, full_result: str = "x?") -> None:
+        self.full_result = full_result
+        self.calls: list[tuple[int, int]] = []
+
+    def classification(self, img: bytes | Image.Image) -> str:
+        if not isinstance(img, Image.Image):
+            msg = "crops should be passed as images"
+            raise TypeError(msg)
+        self.calls.append(img.size)
+        if img.width == FULL_WIDTH:
+            return self.full_result
+        if img.width == THIRD_WIDTH:
+            return "A"
+        return QUADRANT_CHARACTERS[img.tobytes()[0]]
+
+
+class CaptchaRecognizerTests(unittest.TestCase):
+    def test_recovers_first_character_without_repeating_crops(self) -> None:
+        classifier = _FakeClassifier()
+        self.assertEqual(CaptchaRecognizer(classifier)(_captcha_bytes()), "ab1c")
+        # 整图 + 四个字符 + 首字符 1/3 宽裁剪；其余裁剪与已识别的像素相同
+        self.assertEqual(
+            classifier.calls,
+            [(160, 40), (40, 40), (40, 40), (40, 40), (40, 40), (52, 40)],
+        )
+
+    def test_valid_full_frame_skips_split_recognition(self) -> None:
+        classifier = _FakeClassifier("Q7k2")
+        self.assertEqual(CaptchaRecognizer(classifier)(_captcha_bytes()), "q7k2")
+        self.assertEqual(classifier.calls, [(160, 40)])
+
+        classifier = _FakeClassifier("Q7k2")
+        recognizer = CaptchaRecognizer(classifier, early_exit=False)
+        self.assertEqual(recognizer(_captcha_bytes()), "q7k2")
+        self.assertEqual(len(classifier.calls), 6)
+
+    def test_invalid_image_is_rejected_in_the_decode_stage(self) -> None:
+        with self.assertRaises(ValueError):
+            decode_captcha_frames(b"GIF89a-truncated")
+        frames = decode_captcha_frames(_captcha_bytes())
+        classifier = _FakeClassifier("Q7k2")
+        self.assertEqual(CaptchaRecognizer(classifier).recognize_frames(frames), "q7k2")
+
+
+class RecognizerRegistryTests(unittest.TestCase):
+    def test_loads_once_for_concurrent_callers(self) -> None:
+        loads = 0
+        release = threading.Event()
+
+        def factory() -> CaptchaRecognizer:
+            nonlocal loads
+            loads += 1
+            release.wait(1)
+            return CaptchaRecognizer(_FakeClassifier("Q7k2"))
+
+        registry = RecognizerRegistry(factory)
+        future = registry.preload()
+        self.assertFalse(registry.loaded)
+        self.assertIs(registry.preload(), future)
+        release.set()
+        self.assertIs(registry.get(), future.result())
+        self.assertTrue(registry.loaded)
+        self.assertEqual(loads, 1)
+
+    def test_failed_load_is_retried(self) -> None:
+        attempts: list[int] = []
+
+        def factory() -> CaptchaRecognizer:
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                msg = "model missing"
+                raise RuntimeError(msg)
+            return CaptchaRecognizer(_FakeClassifier())
+
+        registry = RecognizerRegistry(factory)
+        with self.assertRaises(RuntimeError):
+            registry.get()
+        registry.get()
+        self.assertEqual(len(attempts), 2)
+
+
+class CaptchaWorkerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_worker_serves_shared_recognizer(self) -> None:
+        classifier = _FakeClassifier("Q7k2")
+        registry = RecognizerRegistry(lambda: CaptchaRecognizer(classifier))
+        server = await start_captcha_worker("127.0.0.1", 0, registry=registry)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+        client = CaptchaWorkerClient(f"127.0.0.1:{port}")
+        results = await asyncio.gather(
+            *(asyncio.to_thread(client, _captcha_bytes()) for _ in range(3)),
+        )
+        self.assertEqual(results, ["q7k2"] * 3)
+        self.assertEqual(len(classifier.calls), 3)
+
+    async def test_unreachable_worker_falls_back(self) -> None:
+        server = await start_captcha_worker(
+            "127.0.0.1",
+            0,
+            registry=RecognizerRegistry(lambda: CaptchaRecognizer(_FakeClassifier())),
+        )
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        fallback = CaptchaRecognizer(_FakeClassifier("Q7k2"))
+        client = CaptchaWorkerClient(f"127.0.0.1:{port}", fallback=fallback)
+        self.assertEqual(await asyncio.to_thread(client, _captcha_bytes()), "q7k2")
+
+    def test_worker_address_validation(self) -> None:
+        self.assertEqual(parse_worker_address("[::1]:8765"), ("::1", 8765))
+        with self.assertRaises(ValueError):
+            parse_worker_address("localhost")
+        settings = load_settings(
+            {"URP_ENV_FILE": "/nonexistent/.env", "URP_CAPTCHA_WORKER": "127.0.0.1:9"},
+        )
+        self.assertEqual(settings.captcha_worker, "127.0.0.1:9")
+        with self.assertRaises(ValueError):
+            load_settings(
+                {"URP_ENV_FILE": "/nonexistent/.env", "URP_CAPTCHA_WORKER": "nope"},
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""自适应抢课并发控制的离线测试"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+from urp_academic_affairs_tools.config import load_settings
+from urp_academic_affairs_tools.course_selection import (
+    AdaptiveConcurrencyController,
+    CourseSnatchingOptions,
+)
+
+
+class AdaptiveConcurrencyControllerTests(unittest.IsolatedAsyncioTestCase):
+    async def _complete_window(
+        self,
+        controller: AdaptiveConcurrencyController,
+        latency: float,
+        **kwargs: bool,
+    ) -> None:
+        for _ in range(controller.limit):
+            await controller.record(latency, **kwargs)
+
+    async def test_healthy_windows_increase_until_maximum(self) -> None:
+        controller = AdaptiveConcurrencyController(minimum=1, maximum=4, initial=2)
+        for _ in range(4):
+            await self._complete_window(controller, 0.05)
+        self.assertEqual(controller.limit, 4)
+        self.assertEqual(
+            [window.decision for window in controller.windows],
+            ["increase", "increase", "hold", "hold"],
+        )
+
+    async def test_errors_and_latency_inflation_back_off(self) -> None:
+        controller = AdaptiveConcurrencyController(minimum=2, maximum=16, initial=8)
+        await self._complete_window(controller, 0.05)
+        self.assertEqual(controller.limit, 9)
+        await self._complete_window(controller, 0.5)
+        self.assertEqual(controller.limit, 4)
+        await self._complete_window(controller, 0.05, error=True)
+        self.assertEqual(controller.limit, 2)
+        last = controller.windows[-1]
+        self.assertEqual(last.decision, "decrease")
+        self.assertEqual(last.error_rate, 1.0)
+
+    async def test_retry_after_pauses_new_requests(self) -> None:
+        controller = AdaptiveConcurrencyController(minimum=1, maximum=2, initial=2)
+        await controller.record(0.01, throttled=True, retry_after=0.05)
+        started = time.monotonic()
+        async with controller.slot():
+            waited = time.monotonic() - started
+        self.assertGreaterEqual(waited, 0.04)
+        window = await controller.record(0.01)
+        if window is None:
+            self.fail("window should close after two requests")
+        self.assertEqual(window.throttled, 1)
+        self.assertEqual(window.retry_after, 0.05)
+        self.assertEqual(controller.limit, 1)
+
+    async def test_slot_limits_in_flight_requests(self) -> None:
+        controller = AdaptiveConcurrencyController(minimum=1, maximum=2, initial=2)
+        peak = 0
+
+        async def request() -> None:
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(controller.in_flight, 0)
+
+
+class AdaptiveSnatchingOptionsTests(unittest.TestCase):
+    def test_settings_enable_adaptive_controller(self) -> None:
+        settings = load_settings(
+            {
+                "URP_ENV_FILE": "/nonexistent/.env",
+                "URP_COURSE_SNATCHING_CONCURRENCY": "6",
+                "URP_COURSE_SNATCHING_ADAPTIVE": "true",
+                "URP_COURSE_SNATCHING_MIN_CONCURRENCY": "2",
+                "URP_COURSE_SNATCHING_MAX_CONCURRENCY": "12",
+            },
+        )
+        controller = CourseSnatchingOptions.from_settings(settings).build_controller()
+        if controller is None:
+            self.fail("adaptive settings should build a controller")
+        self.assertEqual(
+            (controller.minimum, controller.limit, controller.maximum),
+            (2, 6, 12),
+        )
+        self.assertIsNone(CourseSnatchingOptions().build_controller())
+
+    def test_rejects_inverted_bounds(self) -> None:
+        with self.assertRaises(ValueError):
+            CourseSnatchingOptions(adaptive=True, min_concurrency=5, max_concurrency=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
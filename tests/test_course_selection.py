@@ -1,18 +1,32 @@
 """选课解析和策略的离线测试"""
 
+import asyncio
 import json
+import time
 import unittest
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 
 from urp_academic_affairs_tools.course_selection import (
+    CandidateIndex,
     CourseSelectionCandidate,
+    CourseSelectionClient,
+    CourseSelectionOptions,
+    CourseSelectionSubmitResult,
+    SelectionContext,
     CourseSnatchingOptions,
+    diff_course_candidates,
     parse_course_candidates,
     extract_course_select_token,
     filter_course_candidates,
+    parse_start_time,
 )
 from urp_academic_affairs_tools.course_selection.course_selection import (
     _extract_context_value,
     _is_permanent_course_failure,
+    _parse_multiple_indices,
     parse_course_select_page,
 )
 from urp_academic_affairs_tools.client import (
@@ -20,6 +34,14 @@ from urp_academic_affairs_tools.client import (
     AuthenticationFailure,
     ConcurrentSessionExpiredError,
     RetryPolicy,
+    ServiceError,
+    SessionOptions,
+)
+from urp_academic_affairs_tools.client.api import (
+    COURSE_SELECT_INDEX_PATH,
+    COURSE_SELECT_LIST_PATHS,
+    COURSE_SELECT_RESULT_INDEX_PATH,
+    TIMETABLE_PATH,
 )
 from urp_academic_affairs_tools.client.auth import classify_authentication_failure
 
@@ -46,6 +68,77 @@ class CourseSelectionTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             filter_course_candidates(self.courses, "Q52124-02")
 
+    def test_candidate_index_lookups(self) -> None:
+        courses = [
+            CourseSelectionCandidate(
+                "Q52124",
+                "01",
+                "1",
+                "Linux",
+                "张三*",
+                weekday="1",
+                start_session="3",
+            ),
+            CourseSelectionCandidate(
+                "Q52124",
+                "02",
+                "1",
+                "Linux",
+                "李四,张三",
+                weekday="3",
+                start_session="1",
+            ),
+            CourseSelectionCandidate("Q99999", "01", "1", "高等数学", "王五"),
+        ]
+        index = CandidateIndex(courses)
+
+        self.assertEqual(index.match_code("q52124"), courses[:2])
+        self.assertEqual(index.match_code("Q52124_02"), [courses[1]])
+        with self.assertRaises(ValueError):
+            index.match_code("Q52124-02")
+        self.assertEqual(index.by_teacher("张三"), courses[:2])
+        self.assertEqual(index.by_slot(1, 3), [courses[0]])
+        self.assertEqual(index.by_slot("3"), [courses[1]])
+        self.assertEqual(index.search("linux"), courses[:2])
+        self.assertEqual(index.search("52124_0"), courses[:2])
+        self.assertEqual(index.search("王五"), [courses[2]])
+        self.assertEqual(index.search_positions(""), [0, 1, 2])
+        self.assertEqual(index.query("Q99999"), [courses[2]])
+        self.assertEqual(index.query("数学"), [courses[2]])
+
+    def test_parse_extracts_compact_fields_and_keeps_raw_on_request(self) -> None:
+        course = {
+            "courseNum": "Q52124",
+            "classNum": "02",
+            "termCode": "2025-2026-2-1",
+            "kcm": "Linux",
+            "skjs": "张三*",
+            "xf": 2.5,
+            "kclbmc": "公选课",
+            "kcsxmc": "选修",
+            "bkskyl": 12,
+            "weekNum": "3",
+            "courseStartNum": "5",
+            "xqm": "主校区",
+            "jasm": "教一 101",
+        }
+        html = json.dumps({"rwfalist": [course]})
+
+        (compact,) = parse_course_candidates(html)
+        self.assertEqual(
+            (compact.plan_term, compact.credit, compact.category, compact.attribute),
+            ("2025-2026-2-1", "2.5", "公选课", "选修"),
+        )
+        self.assertEqual(compact.remaining, "12")
+        self.assertEqual(compact.schedule, "星期三 >> 5~6节")
+        self.assertEqual(compact.location, "主校区 教一 101")
+        self.assertEqual((compact.weekday, compact.start_session), ("3", "5"))
+        self.assertIsNone(compact.raw)
+
+        (kept,) = parse_course_candidates(html, keep_raw=True)
+        self.assertEqual(kept, compact)
+        self.assertEqual(kept.raw, course)
+
     def test_parse_callback_context(self) -> None:
         data = {
             "dateList": [
@@ -123,10 +216,48 @@ class CourseSelectionTests(unittest.TestCase):
         )
         self.assertEqual(parse_course_candidates(html), [])
 
+    def test_parse_course_objects_embedded_in_html_page(self) -> None:
+        course = {
+            "courseNum": "Q52124",
+            "classNum": "02",
+            "termCode": "2025-2026-2-1",
+            "kcm": "Linux",
+            "sjdd": [{"skxq": 1, "courseName": "nested"}],
+        }
+        other = {**course, "courseNum": "Q52125", "kcm": "Linux {lab}"}
+        html = (
+            '<p class="note">don"t</p>\n<style>p { color: red; }</style>\n'
+            f"<script>var list = [{json.dumps(course)}, {json.dumps(other)}];\n"
+            '{"courseNum": "Q0", "classNum": "01"</script>'
+        )
+        result = parse_course_candidates(html)
+        self.assertEqual(
+            [course.course_code for course in result],
+            ["Q52124_02", "Q52125_02"],
+        )
+        self.assertEqual(result[1].course_name, "Linux {lab}")
+
     def test_snatching_options_allow_continuous_mode(self) -> None:
         options = CourseSnatchingOptions()
         self.assertEqual(options.attempts, 0)
         self.assertEqual(options.concurrency, 10)
+        with self.assertRaises(ValueError):
+            CourseSnatchingOptions(start_at=datetime(2026, 3, 1, 12))  # noqa: DTZ001
+
+    def test_parse_scheduled_start_time(self) -> None:
+        now = datetime(2026, 3, 1, 11, 0, tzinfo=timezone(timedelta(hours=8)))
+        self.assertEqual(
+            parse_start_time("12:30", now=now),
+            now.replace(hour=12, minute=30),
+        )
+        self.assertEqual(
+            parse_start_time("2026-03-02 08:00:05", now=now),
+            datetime(2026, 3, 2, 8, 0, 5, tzinfo=now.tzinfo),
+        )
+        with self.assertRaises(ValueError):
+            parse_start_time("10:59:59", now=now)
+        with self.assertRaises(ValueError):
+            parse_start_time("明天中午", now=now)
 
     def test_classify_permanent_submission_failure(self) -> None:
         self.assertTrue(_is_permanent_course_failure("课程时间冲突"))
@@ -196,6 +327,393 @@ class CourseSelectionTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             RetryPolicy(base_sleep=2, max_sleep=1)
 
+    def test_parse_multiple_course_indices(self) -> None:
+        self.assertEqual(_parse_multiple_indices("3, 1，3 2", 3), [3, 1, 2])
+        self.assertEqual(_parse_multiple_indices("0", 3), [])
+        with self.assertRaises(ValueError):
+            _parse_multiple_indices("1 4", 3)
+
+
+class _ScriptedClient(CourseSelectionClient):
+    """按课程返回预设的提交结果，不访问网络"""
+
+    def __init__(self, replies: dict[str, list[str | ServiceError]]) -> None:
+        super().__init__()
+        self.replies = replies
+        self.submitted: list[str] = []
+
+    async def _submit_form(
+        self,
+        _jws: AsyncJWSSession,
+        form: dict[str, str],
+        *,
+        attempt: int,
+    ) -> CourseSelectionSubmitResult:
+        course_id = form["kcIds"]
+        self.submitted.append(course_id)
+        await asyncio.sleep(0)
+        replies = self.replies[course_id]
+        result = replies.pop(0) if len(replies) > 1 else replies[0]
+        if isinstance(result, ServiceError):
+            raise result
+        return CourseSelectionSubmitResult(
+            succeeded=result == "ok",
+            result=result,
+            token=f"token-{len(self.submitted)}",
+            attempt=attempt,
+        )
+
+
+class MultiCourseSnatchingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_snatches_targets_in_one_engine(self) -> None:
+        jws = AsyncJWSSession(
+            "https://jws.example.edu",
+            options=SessionOptions(warmup_connections=False),
+        )
+        courses = [
+            CourseSelectionCandidate("A1", "01", "1", "Linux"),
+            CourseSelectionCandidate("B2", "01", "1", "Python"),
+            CourseSelectionCandidate("C3", "01", "1", "Java"),
+        ]
+        client = _ScriptedClient(
+            {
+                courses[0].selection_id: ["人数已满", "人数已满", "ok"],
+                courses[1].selection_id: ["课程时间冲突"],
+                courses[2].selection_id: ["人数已满"],
+            },
+        )
+        outcomes = await client.snatch_many(
+            jws,
+            CourseSelectionClient.build_query("free"),
+            courses,
+            options=CourseSnatchingOptions(
+                attempts=4,
+                concurrency=2,
+                retry_interval=0,
+            ),
+            token_value="token-0",  # noqa: S106
+        )
+
+        self.assertEqual(
+            [outcome.succeeded for outcome in outcomes],
+            [True, False, False],
+        )
+        self.assertIn("时间冲突", outcomes[1].failure)
+        self.assertEqual(outcomes[1].attempts, 1)
+        self.assertIn("仍未选中", outcomes[2].failure)
+        self.assertEqual(outcomes[2].attempts, 4)
+        # 三门课程轮流提交，第一门成功前其余课程已经开始尝试
+        self.assertEqual(
+            set(client.submitted[:3]),
+            {course.selection_id for course in courses},
+        )
+
+    async def test_permanent_error_only_retires_its_target(self) -> None:
+        jws = AsyncJWSSession(
+            "https://jws.example.edu",
+            options=SessionOptions(warmup_connections=False),
+        )
+        courses = [
+            CourseSelectionCandidate("A1", "01", "1", "Linux"),
+            CourseSelectionCandidate("B2", "01", "1", "Python"),
+        ]
+        client = _ScriptedClient(
+            {
+                courses[0].selection_id: [ServiceError("选课接口返回 400", status=400)],
+                courses[1].selection_id: ["人数已满", "人数已满", "ok"],
+            },
+        )
+        outcomes = await client.snatch_many(
+            jws,
+            CourseSelectionClient.build_query("free"),
+            courses,
+            options=CourseSnatchingOptions(
+                attempts=5,
+                concurrency=2,
+                retry_interval=0,
+            ),
+            token_value="token-0",  # noqa: S106
+        )
+
+        self.assertFalse(outcomes[0].succeeded)
+        self.assertIn("返回 400", outcomes[0].failure)
+        self.assertEqual(outcomes[0].attempts, 1)
+        self.assertTrue(outcomes[1].succeeded)
+        self.assertGreaterEqual(outcomes[1].attempts, 3)
+
+    async def test_failed_token_refresh_is_retried(self) -> None:
+        index_requests = 0
+
+        async def index(_request: web.Request) -> web.Response:
+            nonlocal index_requests
+            index_requests += 1
+            if index_requests == 1:
+                return web.Response(status=503)
+            return web.Response(
+                text='<input id="tokenValue" value="fresh">',
+                content_type="text/html",
+            )
+
+        app = web.Application()
+        app.add_routes([web.get(COURSE_SELECT_INDEX_PATH, index)])
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        course = CourseSelectionCandidate("A1", "01", "1", "Linux")
+        client = _ScriptedClient({course.selection_id: ["ok"]})
+        async with AsyncJWSSession(
+            str(server.make_url("")).rstrip("/"),
+            options=SessionOptions(warmup_connections=False),
+            retry=RetryPolicy(max_retry=1),
+        ) as jws:
+            (outcome,) = await client.snatch_many(
+                jws,
+                CourseSelectionClient.build_query("free"),
+                [course],
+                options=CourseSnatchingOptions(
+                    attempts=3,
+                    concurrency=1,
+                    retry_interval=0,
+                    token_refresh_interval=0,
+                ),
+            )
+
+        self.assertTrue(outcome.succeeded)
+        self.assertEqual(outcome.attempts, 2)
+        self.assertEqual(index_requests, 2)
+
+    async def test_closed_index_at_opening_is_retried(self) -> None:
+        index_requests = 0
+
+        async def index(_request: web.Request) -> web.Response:
+            nonlocal index_requests
+            index_requests += 1
+            # 定时开抢时首页可能仍显示选课未开放
+            text = (
+                "<p>对不起，当前选课阶段已过截止时间！</p>"
+                if index_requests == 1
+                else '<input id="tokenValue" value="fresh">'
+            )
+            return web.Response(text=text, content_type="text/html")
+
+        app = web.Application()
+        app.add_routes([web.get(COURSE_SELECT_INDEX_PATH, index)])
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        course = CourseSelectionCandidate("A1", "01", "1", "Linux")
+        client = _ScriptedClient({course.selection_id: ["ok"]})
+        async with AsyncJWSSession(
+            str(server.make_url("")).rstrip("/"),
+            options=SessionOptions(warmup_connections=False),
+        ) as jws:
+            (outcome,) = await client.snatch_many(
+                jws,
+                CourseSelectionClient.build_query("free"),
+                [course],
+                options=CourseSnatchingOptions(
+                    attempts=3,
+                    concurrency=1,
+                    retry_interval=0,
+                    token_refresh_interval=0,
+                ),
+            )
+
+        self.assertTrue(outcome.succeeded)
+        self.assertEqual(outcome.attempts, 2)
+        self.assertEqual(index_requests, 2)
+
+
+class _CountingContextClient(CourseSelectionClient):
+    """统计选课上下文的解析次数，不访问网络"""
+
+    def __init__(self, options: CourseSelectionOptions | None = None) -> None:
+        super().__init__(options)
+        self.resolved = 0
+
+    async def _resolve_context(self, jws: AsyncJWSSession) -> SelectionContext:
+        self.resolved += 1
+        await asyncio.sleep(0)
+        return SelectionContext(
+            query=CourseSelectionClient.build_plan_query(jhxn="2025-2026-1-1"),
+            plan_link="/student/courseSelect/planCourse/index?fajhh=1",
+            academic_term="2025-2026-1-1",
+            selection_closed=False,
+            selected_courses=(),
+            token_value="token",  # noqa: S106
+            login_generation=jws.login_generation,
+            loaded_at=time.monotonic(),
+            token_received_at=time.monotonic(),
+        )
+
+
+class SelectionContextCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.jws = AsyncJWSSession("https://jws.example.edu")
+
+    async def test_concurrent_loads_resolve_once(self) -> None:
+        client = _CountingContextClient()
+        contexts = await asyncio.gather(
+            *(client.load_context(self.jws) for _ in range(3)),
+        )
+        self.assertEqual(client.resolved, 1)
+        self.assertIs(contexts[0], contexts[2])
+        self.assertEqual(contexts[0].usable_token(), "token")
+
+    async def test_ttl_and_login_generation_invalidate(self) -> None:
+        client = _CountingContextClient(CourseSelectionOptions(context_ttl=0))
+        await client.load_context(self.jws)
+        await client.load_context(self.jws)
+        self.assertEqual(client.resolved, 2)
+
+        client = _CountingContextClient()
+        await client.load_context(self.jws)
+        self.jws._login_generation += 1  # noqa: SLF001
+        await client.load_context(self.jws)
+        self.assertEqual(client.resolved, 2)
+
+    async def test_term_change_invalidates(self) -> None:
+        client = _CountingContextClient()
+        await client.load_context(self.jws)
+        client._observe_term(self.jws, "2025-2026-1-1")  # noqa: SLF001
+        self.assertIsNotNone(client.cached_context(self.jws))
+        client._observe_term(self.jws, "2025-2026-2-1")  # noqa: SLF001
+        self.assertIsNone(client.cached_context(self.jws))
+
+
+class SelectionContextBootstrapTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[str] = []
+
+        def page(path: str, delay: float, body: str) -> web.RouteDef:
+            async def handler(_request: web.Request) -> web.Response:
+                self.requests.append(path)
+                await asyncio.sleep(delay)
+                self.requests.append(f"{path} done")
+                return web.Response(text=body, content_type="text/html")
+
+            return web.get(path, handler)
+
+        callback = json.dumps(
+            {
+                "programPlanNumber": "1234",
+                "executiveEducationPlanNumber": "2025-2026-1-1",
+            },
+        )
+        app = web.Application()
+        app.add_routes(
+            [
+                page(COURSE_SELECT_INDEX_PATH, 0.15, "<html></html>"),
+                page(COURSE_SELECT_RESULT_INDEX_PATH, 0.05, "<html></html>"),
+                page(TIMETABLE_PATH, 0.05, callback),
+                page("/student/courseSelect/planCourse/index", 0.02, "<html></html>"),
+            ],
+        )
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+
+    async def test_independent_requests_run_concurrently(self) -> None:
+        base_url = str(self.server.make_url("")).rstrip("/")
+        async with AsyncJWSSession(base_url) as jws:
+            context = await CourseSelectionClient().load_context(jws)
+        self.assertEqual(context.program_plan_number, "1234")
+        self.assertEqual(context.academic_term, "2025-2026-1-1")
+        timings = context.timings
+        if timings is None:
+            self.fail("resolved context should carry its timings")
+        self.assertLess(timings.elapsed, timings.sequential - 0.05)
+        self.assertLess(timings.critical_path, timings.sequential)
+        # 首页与选课结果页同时发出，课表回调仍在选课结果页返回之后
+        self.assertLess(
+            self.requests.index(COURSE_SELECT_RESULT_INDEX_PATH),
+            self.requests.index(f"{COURSE_SELECT_INDEX_PATH} done"),
+        )
+        self.assertLess(
+            self.requests.index(f"{COURSE_SELECT_RESULT_INDEX_PATH} done"),
+            self.requests.index(TIMETABLE_PATH),
+        )
+
+
+class CourseListRefreshTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.bodies: list[str] = []
+
+        async def course_list(_request: web.Request) -> web.Response:
+            return web.Response(text=self.bodies.pop(0), content_type="text/html")
+
+        app = web.Application()
+
+        async def index(_request: web.Request) -> web.Response:
+            return web.Response(text="<html></html>", content_type="text/html")
+
+        app.add_routes(
+            [
+                web.get("/index.jsp", index),
+                web.post(COURSE_SELECT_LIST_PATHS["free"], course_list),
+            ],
+        )
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+
+    @staticmethod
+    def _body(*courses: tuple[str, int]) -> str:
+        return json.dumps(
+            {
+                "rwfalist": [
+                    {
+                        "courseNum": number,
+                        "classNum": "01",
+                        "termCode": "2025-2026-1-1",
+                        "kcm": f"课程{number}",
+                        "bkskyl": seats,
+                    }
+                    for number, seats in courses
+                ],
+            },
+        )
+
+    async def test_unchanged_response_skips_parse_and_diff_tracks_seats(self) -> None:
+        self.bodies = [
+            self._body(("A1", 5), ("B2", 3)),
+            self._body(("A1", 5), ("B2", 3)),
+            self._body(("A1", 5), ("B2", 3)),
+            self._body(("A1", 0), ("C3", 9)),
+        ]
+        client = CourseSelectionClient()
+        query = CourseSelectionClient.DEFAULT_QUERIES["free"]
+        base_url = str(self.server.make_url("")).rstrip("/")
+        async with AsyncJWSSession(base_url) as jws:
+            first, digest = await client.fetch_candidates_if_changed(jws, query)
+            unchanged, same = await client.fetch_candidates_if_changed(
+                jws,
+                query,
+                digest,
+            )
+            # 其他调用方没有这份快照，相同的响应也要解析
+            other, _ = await client.fetch_candidates_if_changed(jws, query)
+            second, changed = await client.fetch_candidates_if_changed(
+                jws,
+                query,
+                digest,
+            )
+
+        self.assertIsNone(unchanged)
+        self.assertEqual(same, digest)
+        self.assertEqual(other, first)
+        self.assertNotEqual(changed, digest)
+        if first is None or second is None:
+            self.fail("a changed course list should be parsed")
+        diff = diff_course_candidates(first, second)
+        self.assertEqual([course.course_number for course in diff.added], ["C3"])
+        self.assertEqual([course.course_number for course in diff.removed], ["B2"])
+        self.assertEqual(
+            [(old.remaining, new.remaining) for old, new in diff.seat_changes],
+            [("5", "0")],
+        )
+        self.assertTrue(diff_course_candidates(second, second).unchanged)
+
 
 if __name__ == "__main__":
     unittest.main()
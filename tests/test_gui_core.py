@@ -0,0 +1,115 @@
+"""GUI 异步基础设施测试"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from typing import ClassVar
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from urp_academic_affairs_tools.gui.core import EventLoopThread, LoopRunner, TaskHandle
+
+
+class EventLoopThreadTests(unittest.TestCase):
+    def test_operations_share_one_running_loop(self) -> None:
+        engine = EventLoopThread()
+        self.addCleanup(engine.stop)
+
+        async def current_loop() -> asyncio.AbstractEventLoop:
+            return asyncio.get_running_loop()
+
+        first = engine.run(current_loop())
+        second = engine.run(current_loop())
+        self.assertIs(first, second)
+        self.assertTrue(engine.running)
+
+    def test_stop_cancels_pending_tasks(self) -> None:
+        engine = EventLoopThread()
+        future = engine.submit(asyncio.sleep(60))
+        engine.stop()
+        self.assertFalse(engine.running)
+        self.assertTrue(future.cancelled())
+
+
+class LoopRunnerTests(unittest.TestCase):
+    app: ClassVar[QApplication]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        existing_app = QApplication.instance()
+        cls.app = (
+            existing_app if isinstance(existing_app, QApplication) else QApplication([])
+        )
+
+    def setUp(self) -> None:
+        self.runner = LoopRunner()
+        self.addCleanup(self.runner.stop)
+
+    @staticmethod
+    def _wait(task: TaskHandle) -> None:
+        loop = QEventLoop()
+        task.finished.connect(loop.quit)
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec()
+
+    def test_delivers_result_through_signal(self) -> None:
+        results: list[object] = []
+
+        async def operation() -> int:
+            await asyncio.sleep(0)
+            return 42
+
+        task = self.runner.submit(operation)
+        task.succeeded.connect(results.append)
+        self._wait(task)
+        self.assertEqual(results, [42])
+        self.assertFalse(task.is_running())
+
+    def test_reports_failure_message(self) -> None:
+        messages: list[str] = []
+
+        async def operation() -> None:
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        task = self.runner.submit(operation)
+        task.failed.connect(messages.append)
+        self._wait(task)
+        self.assertEqual(messages, ["boom"])
+
+    def test_cancel_from_ui_stops_coroutine(self) -> None:
+        cancelled: list[bool] = []
+        task = self.runner.submit(lambda: asyncio.sleep(60))
+        task.cancelled.connect(lambda: cancelled.append(True))
+        self.assertTrue(task.cancel())
+        self._wait(task)
+        self.assertEqual(cancelled, [True])
+
+    def test_cancelled_task_runs_until_cleanup_finishes(self) -> None:
+        cleaned: list[bool] = []
+
+        async def operation() -> None:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.2)
+                cleaned.append(True)
+                raise
+
+        task = self.runner.submit(operation)
+        task.cancelled.connect(lambda: cleaned.append(False))
+        QTimer.singleShot(50, task.cancel)
+        QTimer.singleShot(100, lambda: cleaned.append(task.is_running()))
+        self._wait(task)
+        # 取消后协程仍在清理，结束信号要等清理完成才触发
+        self.assertEqual(cleaned, [True, True, False])
+        self.assertFalse(task.is_running())
+
+
+if __name__ == "__main__":
+    unittest.main()
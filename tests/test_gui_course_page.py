@@ -0,0 +1,91 @@
+"""选课页面展示测试"""
+
+from __future__ import annotations
+
+import os
+import unittest
+from dataclasses import replace
+from typing import ClassVar
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from urp_academic_affairs_tools.course_selection import (
+    CourseSelectionCandidate,
+    diff_course_candidates,
+)
+from urp_academic_affairs_tools.gui.pages.course_page import CoursePage
+
+
+class CoursePageTests(unittest.TestCase):
+    app: ClassVar[QApplication]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        existing_app = QApplication.instance()
+        cls.app = (
+            existing_app if isinstance(existing_app, QApplication) else QApplication([])
+        )
+
+    def setUp(self) -> None:
+        self.page = CoursePage(
+            on_refresh=lambda: None,
+            on_submit=lambda: None,
+            on_cancel=lambda: None,
+            on_mode_changed=lambda **_: None,
+        )
+        self.addCleanup(self.page.deleteLater)
+        self.courses = [
+            CourseSelectionCandidate(
+                "Q52124",
+                "01",
+                "1",
+                "Linux",
+                "张三*",
+                credit="2",
+                remaining="5",
+            ),
+            CourseSelectionCandidate("Q99999", "01", "1", "高等数学", "李四"),
+        ]
+
+    def test_filter_hides_rows_and_keeps_checked_courses(self) -> None:
+        self.page.show_courses("2026-2027-1-1", self.courses)
+        table = self.page.table
+        item = table.item(0, 5)
+        self.assertEqual(item.text() if item else None, "张三")
+        self.page.checks[0].setChecked(True)
+
+        self.page.filter.setText("数学")
+        self.assertTrue(table.isRowHidden(0))
+        self.assertFalse(table.isRowHidden(1))
+        self.assertEqual(self.page.selected_courses(), [self.courses[0]])
+
+        self.page.filter.clear()
+        self.assertFalse(table.isRowHidden(0))
+
+    def test_update_changes_only_affected_rows(self) -> None:
+        self.page.show_courses("2026-2027-1-1", self.courses)
+        table = self.page.table
+        self.page.checks[1].setChecked(True)
+        untouched = table.item(1, 1)
+        added = CourseSelectionCandidate("Q70000", "01", "1", "线性代数", "王五")
+        current = [replace(self.courses[0], remaining="0"), self.courses[1], added]
+
+        self.page.update_courses(
+            "2026-2027-1-1",
+            diff_course_candidates(self.courses, current),
+        )
+        item = table.item(0, 6)
+        self.assertEqual(item.text() if item else None, "0")
+        self.assertIs(table.item(1, 1), untouched)
+        self.assertEqual(table.rowCount(), 3)
+        self.assertEqual(self.page.selected_courses(), [self.courses[1]])
+
+        self.page.update_courses(
+            "2026-2027-1-1",
+            diff_course_candidates(current, current[1:]),
+        )
+        self.assertEqual(self.page.courses, current[1:])
+        self.assertEqual(self.page.selected_courses(), [self.courses[1]])
+        self.assertEqual(self.page.index.search("线性"), [added])
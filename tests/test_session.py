@@ -0,0 +1,550 @@
+"""会话认证与请求流程的离线测试"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import secrets
+import tempfile
+import time
+import unittest
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiohttp import web
+from PIL import Image
+from aiohttp.test_utils import TestServer
+from yarl import URL
+
+from urp_academic_affairs_tools.client import (
+    AsyncJWSSession,
+    AuthError,
+    AuthenticationFailure,
+    CsrfTokenExpiredError,
+    ServerDateSample,
+    SessionOptions,
+    SessionExpiredError,
+    SessionStore,
+    estimate_server_clock,
+    measure_server_clock,
+)
+from urp_academic_affairs_tools.client import json_backend
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class _FakeSession(AsyncJWSSession):
+    """不访问网络，只记录登录探测和请求次数"""
+
+    def __init__(self, *, options: SessionOptions | None = None) -> None:
+        super().__init__("https://jws.example.edu", options=options)
+        self.probes = 0
+        self.requests = 0
+
+    async def _probe_login(self) -> bool:
+        self.probes += 1
+        return True
+
+    async def _perform_request_once(
+        self,
+        _spec: object,
+        decoder: Callable[[str], Any],
+    ) -> Any:  # noqa: ANN401
+        self.requests += 1
+        return decoder('{"result": "ok"}')
+
+
+class OptimisticAuthTests(unittest.IsolatedAsyncioTestCase):
+    async def test_post_burst_shares_one_login_probe(self) -> None:
+        jws = _FakeSession()
+        for _ in range(3):
+            await jws.request_json("POST", "/student/action", data={})
+        self.assertEqual(jws.probes, 1)
+        self.assertEqual(jws.requests, 3)
+
+    async def test_expired_cache_probes_again(self) -> None:
+        jws = _FakeSession(options=SessionOptions(auth_cache_ttl=0))
+        await jws.request_text("POST", "/student/action")
+        await jws.request_text("POST", "/student/action")
+        self.assertEqual(jws.probes, 2)
+
+    async def test_optimistic_scope_skips_login_probe(self) -> None:
+        jws = _FakeSession()
+        with jws.optimistic_auth():
+            self.assertTrue(jws.optimistic_auth_enabled)
+            await jws.request_json("POST", "/student/action", data={})
+        self.assertFalse(jws.optimistic_auth_enabled)
+        self.assertEqual(jws.probes, 0)
+        self.assertEqual(jws.requests, 1)
+
+    async def test_optimistic_scope_does_not_leak_to_other_tasks(self) -> None:
+        jws = _FakeSession()
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def scoped() -> None:
+            with jws.optimistic_auth():
+                entered.set()
+                await release.wait()
+                await jws.request_json("POST", "/student/action", data={})
+
+        task = asyncio.create_task(scoped())
+        await entered.wait()
+        self.assertFalse(jws.optimistic_auth_enabled)
+        await jws.request_json("POST", "/student/other", data={})
+        release.set()
+        await task
+        self.assertEqual(jws.probes, 1)
+        self.assertEqual(jws.requests, 2)
+
+    async def test_caller_managed_tokens_skip_relogin_on_csrf(self) -> None:
+        class _CsrfSession(_FakeSession):
+            async def _perform_request_once(
+                self,
+                _spec: object,
+                _decoder: Callable[[str], Any],
+            ) -> Any:  # noqa: ANN401
+                self.requests += 1
+                raise CsrfTokenExpiredError
+
+            async def _restore_login(self, *, force: bool = False) -> None:
+                msg = f"unexpected relogin (force={force})"
+                raise AssertionError(msg)
+
+        jws = _CsrfSession()
+        with (
+            jws.optimistic_auth(),
+            jws.caller_managed_tokens(),
+            self.assertRaises(CsrfTokenExpiredError),
+        ):
+            await jws.request_json("POST", "/student/action", data={})
+        self.assertEqual(jws.requests, 1)
+
+    async def test_token_rejection_is_not_session_expiry(self) -> None:
+        class _CsrfSession(_FakeSession):
+            relogins = 0
+
+            async def _perform_request_once(
+                self,
+                _spec: object,
+                _decoder: Callable[[str], Any],
+            ) -> Any:  # noqa: ANN401
+                self.requests += 1
+                error = CsrfTokenExpiredError()
+                self._notify_session_expired(error)
+                raise error
+
+            async def _restore_login(self, *, force: bool = False) -> None:
+                self.relogins += int(force)
+                raise CsrfTokenExpiredError
+
+        jws = _CsrfSession()
+        expired: list[AuthenticationFailure] = []
+        jws.set_session_expired_callback(expired.append)
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def snatch() -> None:
+            with jws.optimistic_auth(), jws.caller_managed_tokens():
+                entered.set()
+                await release.wait()
+                with self.assertRaises(CsrfTokenExpiredError):
+                    await jws.request_json("POST", "/student/action", data={})
+
+        task = asyncio.create_task(snatch())
+        await entered.wait()
+        self.assertFalse(jws.caller_managed_tokens_enabled)
+        release.set()
+        await task
+        self.assertEqual(jws.login_generation, 0)
+        self.assertEqual(expired, [])
+        self.assertEqual(jws.relogins, 0)
+
+        # 作用域外的请求仍按原流程重新登录并通知界面
+        with self.assertRaises(CsrfTokenExpiredError):
+            await jws.request_json("POST", "/student/action", data={})
+        self.assertEqual(jws.relogins, 1)
+        self.assertEqual(expired, [AuthenticationFailure.CSRF_TOKEN_EXPIRED])
+
+
+class ConnectionWarmupTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        async def index(_request: web.Request) -> web.Response:
+            await asyncio.sleep(0.01)
+            return web.Response(text="index")
+
+        app = web.Application()
+        app.router.add_get("/index.jsp", index)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+
+    async def test_warm_up_opens_reusable_connections(self) -> None:
+        base_url = str(self.server.make_url("")).rstrip("/")
+        async with AsyncJWSSession(base_url) as jws:
+            report = await jws.warm_up(3)
+        self.assertEqual(report.requested, 3)
+        self.assertEqual(report.opened, 3)
+        self.assertEqual(report.reused, 3)
+        self.assertTrue(report.verified)
+        self.assertGreater(report.open_latency, 0)
+
+    async def test_measure_server_clock_from_date_header(self) -> None:
+        base_url = str(self.server.make_url("")).rstrip("/")
+        async with AsyncJWSSession(base_url) as jws:
+            estimate = await measure_server_clock(jws, samples=3)
+        self.assertEqual(estimate.samples, 3)
+        self.assertLess(abs(estimate.offset), 1.0)
+        self.assertGreater(estimate.round_trip, 0)
+
+
+class SessionValidityTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.index_requests = 0
+
+        async def index(_request: web.Request) -> web.Response:
+            self.index_requests += 1
+            return web.Response(text="welcome")
+
+        async def action(_request: web.Request) -> web.Response:
+            return web.json_response({"result": "ok"})
+
+        async def courses(_request: web.Request) -> web.Response:
+            return web.Response(
+                body=json.dumps({"names": self.course_names}).encode("gbk"),
+                content_type="application/json",
+                charset="gbk",
+            )
+
+        async def expired(_request: web.Request) -> web.Response:
+            return web.Response(
+                text='<form action="/j_spring_security_check">tokenValue</form>',
+                content_type="text/html",
+            )
+
+        self.course_names = [f"高等数学{index}" for index in range(20000)]
+        app = web.Application()
+        app.router.add_get("/index.jsp", index)
+        app.router.add_route("*", "/student/action", action)
+        app.router.add_get("/student/courses", courses)
+        app.router.add_get("/student/expired", expired)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+
+    async def test_successful_response_skips_login_probe(self) -> None:
+        jar = aiohttp.CookieJar(unsafe=True)
+        jar.update_cookies({"JSESSIONID": "abc"}, URL(self.base_url))
+        async with AsyncJWSSession(self.base_url, cookie_jar=jar) as jws:
+            self.assertTrue(await jws.resume("user", "password"))
+            await asyncio.sleep(0.05)
+            await jws.request_text("GET", "/student/action")
+            age = jws.authenticated_age
+            if age is None:
+                self.fail("a successful response should confirm the session")
+            self.assertLess(age, 0.05)
+            await jws.request_json("POST", "/student/action", data={})
+        # 只有 resume 校验会话时请求过一次首页
+        self.assertEqual(self.index_requests, 1)
+
+    async def test_pre_login_response_does_not_skip_login(self) -> None:
+        async with AsyncJWSSession(self.base_url) as jws:
+            await jws.request_text("GET", "/student/action")
+            self.assertIsNone(jws.authenticated_age)
+            # 没有服务器会话可以复用，仍需真正登录
+            self.assertFalse(await jws.resume("user", "password"))
+            await jws.request_json("POST", "/student/action", data={})
+        # 非幂等请求前仍然探测了登录状态
+        self.assertEqual(self.index_requests, 1)
+
+    async def test_streamed_body_decodes_across_chunks(self) -> None:
+        async with AsyncJWSSession(self.base_url) as jws:
+            payload = await jws.request_json("GET", "/student/courses")
+            self.assertEqual(payload["names"], self.course_names)
+            with self.assertRaises(SessionExpiredError):
+                await jws.request_text("GET", "/student/expired")
+
+    async def test_keepalive_pings_idle_session(self) -> None:
+        jar = aiohttp.CookieJar(unsafe=True)
+        jar.update_cookies({"JSESSIONID": "abc"}, URL(self.base_url))
+        options = SessionOptions(session_keepalive_interval=0.05)
+        async with AsyncJWSSession(self.base_url, options=options, cookie_jar=jar):
+            await asyncio.sleep(0.2)
+        pings = self.index_requests
+        self.assertGreaterEqual(pings, 2)
+        await asyncio.sleep(0.1)
+        # 会话关闭后保活任务随之停止
+        self.assertEqual(self.index_requests, pings)
+
+
+def _gif_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("L", (80, 20), 200).save(buffer, format="GIF")
+    return buffer.getvalue()
+
+
+def _redirect(location: str) -> web.Response:
+    return web.Response(status=302, headers={"Location": location})
+
+
+class LoginPipelineTests(unittest.IsolatedAsyncioTestCase):
+    """模拟登录流程：首次提交验证码被拒，第二次成功"""
+
+    async def asyncSetUp(self) -> None:
+        self.events: list[tuple[str, str]] = []
+        self.logged_in: set[str] = set()
+        self.submissions = 0
+        self.index_requests = 0
+        image = _gif_bytes()
+
+        def session_id(request: web.Request) -> str:
+            return request.cookies.get("JSESSIONID", "")
+
+        async def login_page(request: web.Request) -> web.Response:
+            sid = session_id(request) or secrets.token_hex(4)
+            self.events.append(("login", sid))
+            await asyncio.sleep(0.05)
+            response = web.Response(
+                text='<input name="tokenValue" value="token">',
+                content_type="text/html",
+            )
+            response.set_cookie("JSESSIONID", sid)
+            return response
+
+        async def captcha(request: web.Request) -> web.Response:
+            self.events.append(("captcha", session_id(request)))
+            await asyncio.sleep(0.05)
+            return web.Response(body=image, content_type="image/gif")
+
+        async def submit(request: web.Request) -> web.Response:
+            self.submissions += 1
+            self.events.append(("submit", session_id(request)))
+            if self.submissions == 1:
+                return _redirect("/login?errorCode=badCaptcha")
+            self.logged_in.add(session_id(request))
+            return _redirect("/index.jsp")
+
+        async def index(request: web.Request) -> web.Response:
+            self.index_requests += 1
+            if session_id(request) not in self.logged_in:
+                return _redirect("/login")
+            return web.Response(text="welcome", content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/login", login_page)
+        app.router.add_get("/img/captcha.jpg", captcha)
+        app.router.add_post("/j_spring_security_check", submit)
+        app.router.add_get("/index.jsp", index)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+
+    async def test_next_captcha_is_prefetched_after_rejection(self) -> None:
+        base_url = str(self.server.make_url("")).rstrip("/")
+        options = SessionOptions(
+            login_attempts=3,
+            login_retry_sleep=0.1,
+            login_retry_jitter=0,
+        )
+        async with AsyncJWSSession(
+            base_url,
+            options=options,
+            captcha_solver=lambda _image: "ab1c",
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+        ) as jws:
+            await jws.login("student", "secret")
+        names = [name for name, _ in self.events]
+        # 首次登录先建立会话再取验证码；被拒后立即预取下一张，早于下一次登录页
+        self.assertEqual(
+            names,
+            ["login", "captcha", "submit", "captcha", "login", "submit"],
+        )
+        self.assertEqual(len({sid for _, sid in self.events}), 1)
+
+    async def test_speculative_lanes_recover_unreliable_captcha(self) -> None:
+        readings = iter(["", "ab1c", "ab1c"])
+        base_url = str(self.server.make_url("")).rstrip("/")
+        options = SessionOptions(
+            login_attempts=1,
+            speculative_logins=3,
+            warmup_connections=False,
+        )
+        async with AsyncJWSSession(
+            base_url,
+            options=options,
+            captcha_solver=lambda _image: next(readings),
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+        ) as jws:
+            await jws.login("student", "secret")
+            self.assertTrue(await jws.is_logged_in())
+        # 首张识别不合法不提交；两个备用会话逐个提交，第二个成功并接管主会话
+        self.assertEqual(self.submissions, 2)
+        submitted = [sid for name, sid in self.events if name == "submit"]
+        self.assertEqual(len(set(submitted)), 2)
+        self.assertIn(submitted[-1], self.logged_in)
+
+    async def test_saved_session_is_resumed_with_one_request(self) -> None:
+        base_url = str(self.server.make_url("")).rstrip("/")
+        options = SessionOptions(login_attempts=3, login_retry_jitter=0)
+        with tempfile.TemporaryDirectory() as directory:
+            store = SessionStore(Path(directory) / "session.json")
+            async with AsyncJWSSession(
+                base_url,
+                options=options,
+                captcha_solver=lambda _image: "ab1c",
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                session_store=store,
+            ) as jws:
+                await jws.login("student", "secret")
+            submissions, index_requests = self.submissions, self.index_requests
+
+            async with AsyncJWSSession(
+                base_url,
+                options=options,
+                captcha_solver=lambda _image: "ab1c",
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                session_store=store,
+            ) as jws:
+                await jws.login("student", "secret")
+        self.assertEqual(self.submissions, submissions)
+        self.assertEqual(self.index_requests, index_requests + 1)
+
+    async def test_invalid_captcha_image_fails_before_solving(self) -> None:
+        solved: list[bytes] = []
+
+        def solver(image: bytes) -> str:
+            solved.append(image)
+            return "ab1c"
+
+        jws = AsyncJWSSession("https://jws.example.edu", captcha_solver=solver)
+        with self.assertRaises(AuthError):
+            await jws.parse_captcha(b"not an image")
+        self.assertEqual(await jws.parse_captcha(_gif_bytes()), "ab1c")
+        self.assertEqual(len(solved), 1)
+
+
+class SessionStoreTests(unittest.IsolatedAsyncioTestCase):
+    base_url = "http://127.0.0.1:8080"
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SessionStore(Path(directory.name) / "session.json")
+
+    def _jar_with(self, cookies: dict[str, str]) -> aiohttp.CookieJar:
+        jar = aiohttp.CookieJar(unsafe=True)
+        jar.update_cookies(cookies, URL(self.base_url))
+        return jar
+
+    async def test_round_trip_is_bound_to_account_and_address(self) -> None:
+        jar = self._jar_with({"JSESSIONID": "abc"})
+        self.assertEqual(
+            self.store.save(jar, base_url=self.base_url, username="student"),
+            1,
+        )
+        restored = aiohttp.CookieJar(unsafe=True)
+        for username, base_url in (
+            ("other", self.base_url),
+            ("student", "http://127.0.0.1:9090"),
+        ):
+            self.assertEqual(
+                self.store.restore(restored, base_url=base_url, username=username),
+                0,
+            )
+        self.assertEqual(
+            self.store.restore(restored, base_url=self.base_url, username="student"),
+            1,
+        )
+        self.assertEqual(
+            {morsel.key: morsel.value for morsel in restored},
+            {"JSESSIONID": "abc"},
+        )
+
+    async def test_expired_or_corrupt_store_is_ignored(self) -> None:
+        payload = {
+            "version": 1,
+            "base_url": self.base_url,
+            "username": "student",
+            "saved_at": time.time(),
+            "cookies": [
+                {"name": "JSESSIONID", "value": "old", "expires": time.time() - 1},
+            ],
+        }
+        self.store.path.write_text(json.dumps(payload), encoding="utf-8")
+        jar = aiohttp.CookieJar(unsafe=True)
+        self.assertEqual(
+            self.store.restore(jar, base_url=self.base_url, username="student"),
+            0,
+        )
+        self.store.path.write_text("{not json", encoding="utf-8")
+        self.assertEqual(
+            self.store.restore(jar, base_url=self.base_url, username="student"),
+            0,
+        )
+        stale = SessionStore(self.store.path, max_age=0)
+        self.store.save(
+            self._jar_with({"JSESSIONID": "abc"}),
+            base_url=self.base_url,
+            username="student",
+        )
+        self.assertEqual(
+            stale.restore(jar, base_url=self.base_url, username="student"),
+            0,
+        )
+
+
+class JsonBackendTests(unittest.TestCase):
+    def setUp(self) -> None:
+        original = json_backend.json_backend()
+        self.addCleanup(json_backend.use_json_backend, original)
+
+    def test_every_backend_accepts_what_stdlib_accepts(self) -> None:
+        for backend in json_backend.JSON_BACKENDS:
+            json_backend.use_json_backend(backend)
+            with self.subTest(backend=backend):
+                self.assertEqual(
+                    json_backend.loads('{"a": [1, "课"]}'), {"a": [1, "课"]}
+                )
+                # orjson 不接受 NaN，由标准库兜底
+                self.assertTrue(math.isnan(json_backend.loads("NaN")))
+                with self.assertRaises(json_backend.JSONDecodeError):
+                    json_backend.loads("<html>")
+
+    def test_unknown_backend_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            json_backend.use_json_backend("simdjson-missing")
+
+
+class ServerClockTests(unittest.TestCase):
+    def test_intersects_offset_intervals(self) -> None:
+        # 服务器比本地快 2.3 s，两次采样分别落在秒边界两侧
+        samples = [
+            ServerDateSample(sent_at=100.0, received_at=100.1, server_time=102.0),
+            ServerDateSample(sent_at=100.65, received_at=100.75, server_time=102.0),
+            ServerDateSample(sent_at=100.75, received_at=100.85, server_time=103.0),
+        ]
+        estimate = estimate_server_clock(samples)
+        self.assertAlmostEqual(estimate.offset, 2.3, delta=0.1)
+        self.assertAlmostEqual(estimate.uncertainty, 0.1)
+        self.assertAlmostEqual(estimate.round_trip, 0.1)
+
+    def test_falls_back_when_intervals_disagree(self) -> None:
+        samples = [
+            ServerDateSample(sent_at=0.0, received_at=0.1, server_time=10.0),
+            ServerDateSample(sent_at=0.2, received_at=0.3, server_time=12.0),
+        ]
+        estimate = estimate_server_clock(samples)
+        self.assertGreater(estimate.uncertainty, 0.5)
+
+    def test_requires_samples(self) -> None:
+        with self.assertRaises(ValueError):
+            estimate_server_clock([])
+
+
+if __name__ == "__main__":
+    unittest.main()
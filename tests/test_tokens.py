@@ -0,0 +1,71 @@
+"""抢课 tokenValue 池的离线测试"""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from urp_academic_affairs_tools.course_selection import (
+    TokenManager,
+    is_token_rejection,
+)
+
+
+class _IndexPage:
+    """模拟选课首页，每次刷新返回一个新 token"""
+
+    def __init__(self) -> None:
+        self.fetches = 0
+
+    async def __call__(self) -> str:
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return f"index-{self.fetches}"
+
+
+class TokenManagerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_issues_freshest_harvested_token(self) -> None:
+        page = _IndexPage()
+        tokens = TokenManager(page, refresh_interval=0)
+        tokens.offer("first")
+        tokens.offer("second")
+        self.assertEqual(await tokens.acquire(), "second")
+        self.assertEqual(page.fetches, 0)
+        self.assertEqual(tokens.metrics.harvested, 2)
+
+    async def test_rejected_tokens_share_one_refresh(self) -> None:
+        page = _IndexPage()
+        tokens = TokenManager(page, refresh_interval=0)
+        tokens.offer("stale")
+        tokens.reject("stale")
+        issued = await asyncio.gather(*(tokens.acquire() for _ in range(5)))
+        self.assertEqual(issued, ["index-1"] * 5)
+        self.assertEqual(page.fetches, 1)
+        metrics = tokens.metrics
+        self.assertEqual((metrics.issued, metrics.rejected), (5, 1))
+        self.assertEqual(metrics.refreshed, 1)
+
+    async def test_expired_tokens_are_not_issued(self) -> None:
+        page = _IndexPage()
+        tokens = TokenManager(page, max_age=0.01, refresh_interval=0)
+        tokens.offer("old")
+        await asyncio.sleep(0.02)
+        self.assertEqual(await tokens.acquire(), "index-1")
+
+    async def test_background_refresh_keeps_pool_warm(self) -> None:
+        page = _IndexPage()
+        async with TokenManager(page, refresh_interval=0.01) as tokens:
+            await asyncio.sleep(0.05)
+        # 退出时可能取消一次尚未返回的刷新，只比较已经入池的 token
+        refreshed = tokens.metrics.refreshed
+        self.assertGreaterEqual(refreshed, 1)
+        self.assertEqual(await tokens.acquire(), f"index-{refreshed}")
+
+    def test_detects_token_rejection_results(self) -> None:
+        self.assertTrue(is_token_rejection("页面已过期，请刷新后重试"))
+        self.assertTrue(is_token_rejection("tokenValue无效"))
+        self.assertFalse(is_token_rejection("人数已满"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""离线性能基准；通过 ``python -m urp_academic_affairs_tools.benchmark`` 运行"""
+
+from .captcha import (
+    CaptchaModeReport,
+    CaptchaSample,
+    CaptchaVariant,
+    CaptchaVariantReport,
+    benchmark_captcha_modes,
+    benchmark_captcha_variants,
+    load_captcha_corpus,
+    parse_corrections,
+)
+from .json_payloads import (
+    CANDIDATE_MEMORY_MODES,
+    CandidateMemoryReport,
+    JsonBackendReport,
+    JsonPayload,
+    benchmark_json_backends,
+    load_json_payloads,
+    measure_candidate_memory,
+    synthetic_course_list,
+    synthetic_course_page,
+)
+from .stats import LatencySummary, percentile
+
+__all__ = [
+    "CANDIDATE_MEMORY_MODES",
+    "CandidateMemoryReport",
+    "CaptchaModeReport",
+    "CaptchaSample",
+    "CaptchaVariant",
+    "CaptchaVariantReport",
+    "JsonBackendReport",
+    "JsonPayload",
+    "LatencySummary",
+    "benchmark_captcha_modes",
+    "benchmark_captcha_variants",
+    "benchmark_json_backends",
+    "load_captcha_corpus",
+    "load_json_payloads",
+    "measure_candidate_memory",
+    "parse_corrections",
+    "percentile",
+    "synthetic_course_list",
+    "synthetic_course_page",
+]
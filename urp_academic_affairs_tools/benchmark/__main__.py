@@ -0,0 +1,119 @@
+"""基准测试命令行入口"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from urp_academic_affairs_tools.client.captcha import OCR_UPSCALE
+
+from .captcha import CaptchaVariant, parse_corrections, run_captcha_benchmark
+from .json_payloads import run_json_benchmark
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m urp_academic_affairs_tools.benchmark",
+        description="离线性能基准，不访问教务系统",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    captcha = commands.add_parser("captcha", help="验证码识别准确率与耗时")
+    captcha.add_argument("corpus", type=Path, help="验证码图片目录")
+    captcha.add_argument("--repeat", type=int, default=1, help="语料重复轮数")
+    captcha.add_argument(
+        "--corrections",
+        action="append",
+        metavar="MAP",
+        help="待比较的纠错表，如 y7,9r,EF；空串表示不纠错；可重复指定",
+    )
+    captcha.add_argument(
+        "--upscale",
+        action="append",
+        type=int,
+        metavar="N",
+        help="待比较的放大倍数；可重复指定",
+    )
+    captcha.add_argument(
+        "--top-confusions",
+        type=int,
+        default=5,
+        help="每组参数列出的常见混淆字符数",
+    )
+
+    payloads = commands.add_parser("json", help="课程列表 JSON 解析耗时")
+    payloads.add_argument(
+        "corpus",
+        type=Path,
+        nargs="?",
+        help="录制的 courseList 响应目录",
+    )
+    payloads.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        metavar="N",
+        help="追加一份包含 N 门课程的合成课程列表",
+    )
+    payloads.add_argument(
+        "--page",
+        type=int,
+        default=0,
+        metavar="N",
+        help="追加一份课程对象嵌在脚本中、包含 N 门课程的合成 HTML 页面",
+    )
+    payloads.add_argument("--repeat", type=int, default=5, help="语料重复轮数")
+    payloads.add_argument(
+        "--memory",
+        action="store_true",
+        help="同时统计解析结果常驻内存",
+    )
+    return parser
+
+
+def _captcha_variants(args: argparse.Namespace) -> list[CaptchaVariant]:
+    if args.corrections is None and args.upscale is None:
+        return []
+    variants = [CaptchaVariant("default")]
+    for spec, upscale in itertools.product(
+        args.corrections or [None],
+        args.upscale or [OCR_UPSCALE],
+    ):
+        name = f"corrections={spec or '-'} upscale={upscale}"
+        if spec is None:
+            variants.append(CaptchaVariant(name, upscale=upscale))
+        else:
+            variants.append(CaptchaVariant(name, parse_corrections(spec), upscale))
+    return variants
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = build_parser().parse_args(argv)
+    if args.command == "captcha":
+        run_captcha_benchmark(
+            args.corpus,
+            repeat=args.repeat,
+            variants=_captcha_variants(args),
+            top_confusions=args.top_confusions,
+        )
+    elif args.command == "json":
+        run_json_benchmark(
+            args.corpus,
+            synthetic=args.synthetic,
+            page=args.page,
+            repeat=args.repeat,
+            memory=args.memory,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
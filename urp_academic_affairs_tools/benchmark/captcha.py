@@ -0,0 +1,270 @@
+"""验证码识别准确率与耗时基准
+
+语料目录中每个文件是一张验证码图片；文件名（去掉扩展名和 ``_`` 之后的部分）
+是合法四位验证码时作为标注，例如 ``ab1c.gif``、``ab1c_02.jpg``。
+
+除了比较完整流程和分阶段流程的耗时，还可以比较不同的 OCR 纠错表和放大倍数：
+每个组合分别统计整图、分割字符和最终选用结果的准确率，以及最终结果中
+标注字符被识别成其他字符的次数。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from urp_academic_affairs_tools.client.captcha import (
+    CAPTCHA_RE,
+    OCR_CORRECTIONS,
+    OCR_UPSCALE,
+    CaptchaRecognizer,
+    decode_captcha_frames,
+    load_classifier,
+)
+
+from .stats import LatencySummary
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from pathlib import Path
+
+    from urp_academic_affairs_tools.client.captcha import OCRClassifier
+
+log = logging.getLogger(__name__)
+CAPTCHA_SUFFIXES = frozenset({".bmp", ".gif", ".jpeg", ".jpg", ".png"})
+CAPTCHA_MODES = (("full", False), ("staged", True))
+CAPTCHA_STRATEGIES = ("full", "split", "selected")
+CORRECTION_PAIR_LENGTH = 2
+
+
+@dataclass(frozen=True, slots=True)
+class CaptchaSample:
+    """语料中的一张验证码"""
+
+    path: Path
+    image_bytes: bytes
+    label: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CaptchaModeReport:
+    """一种识别模式在整个语料上的结果"""
+
+    mode: str
+    latency: LatencySummary
+    recognized: int
+    labeled: int
+    correct: int
+
+    @property
+    def accuracy(self) -> float | None:
+        return self.correct / self.labeled if self.labeled else None
+
+
+@dataclass(frozen=True, slots=True)
+class CaptchaVariant:
+    """一组待比较的识别参数"""
+
+    name: str
+    corrections: Mapping[int, str] = field(default_factory=lambda: OCR_CORRECTIONS)
+    upscale: int = OCR_UPSCALE
+
+
+@dataclass(frozen=True, slots=True)
+class CaptchaVariantReport:
+    """一组识别参数在整个语料上的各策略准确率、混淆字符和耗时"""
+
+    variant: CaptchaVariant
+    latency: LatencySummary
+    labeled: int
+    correct: Mapping[str, int]
+    confusions: Counter[tuple[str, str]]
+
+    def accuracy(self, strategy: str) -> float | None:
+        if not self.labeled:
+            return None
+        return self.correct.get(strategy, 0) / self.labeled
+
+
+def parse_corrections(spec: str) -> dict[int, str]:
+    """解析 ``y7,9r,EF`` 形式的纠错表，每项为“识别字符 + 替换字符”；空串表示不纠错"""
+    mapping: dict[str, str] = {}
+    for item in spec.split(","):
+        pair = item.strip()
+        if not pair:
+            continue
+        if len(pair) != CORRECTION_PAIR_LENGTH:
+            msg = f"correction must be two characters, got {pair!r}"
+            raise ValueError(msg)
+        mapping[pair[0]] = pair[1]
+    return str.maketrans(mapping)
+
+
+def load_captcha_corpus(directory: Path) -> list[CaptchaSample]:
+    """读取语料目录中的验证码图片，按文件名排序"""
+    samples: list[CaptchaSample] = []
+    for path in sorted(directory.iterdir()):
+        if not path.is_file() or path.suffix.lower() not in CAPTCHA_SUFFIXES:
+            continue
+        label = path.stem.split("_", 1)[0].lower()
+        samples.append(
+            CaptchaSample(
+                path=path,
+                image_bytes=path.read_bytes(),
+                label=label if CAPTCHA_RE.fullmatch(label) else None,
+            ),
+        )
+    if not samples:
+        msg = f"no captcha images found in {directory}"
+        raise ValueError(msg)
+    return samples
+
+
+def benchmark_captcha_modes(
+    samples: Sequence[CaptchaSample],
+    *,
+    classifier: OCRClassifier | None = None,
+    repeat: int = 1,
+) -> list[CaptchaModeReport]:
+    """分别以完整流程和整图提前返回的分阶段流程识别语料，统计每张图的耗时"""
+    if repeat < 1:
+        msg = "repeat must be at least 1"
+        raise ValueError(msg)
+    if classifier is None:
+        classifier = load_classifier()
+    # 首次推理包含 onnxruntime 的初始化开销，不计入统计
+    CaptchaRecognizer(classifier)(samples[0].image_bytes)
+
+    reports: list[CaptchaModeReport] = []
+    for mode, early_exit in CAPTCHA_MODES:
+        recognizer = CaptchaRecognizer(classifier, early_exit=early_exit)
+        timings: list[float] = []
+        recognized = correct = 0
+        for _ in range(repeat):
+            for sample in samples:
+                started = time.perf_counter()
+                result = recognizer(sample.image_bytes)
+                timings.append(time.perf_counter() - started)
+                recognized += bool(result)
+                correct += sample.label is not None and result == sample.label
+        labeled = sum(sample.label is not None for sample in samples) * repeat
+        reports.append(
+            CaptchaModeReport(
+                mode=mode,
+                latency=LatencySummary.from_samples(timings),
+                recognized=recognized,
+                labeled=labeled,
+                correct=correct,
+            ),
+        )
+    return reports
+
+
+def benchmark_captcha_variants(
+    samples: Sequence[CaptchaSample],
+    variants: Sequence[CaptchaVariant],
+    *,
+    classifier: OCRClassifier | None = None,
+) -> list[CaptchaVariantReport]:
+    """以每组参数识别语料，分别统计整图、分割字符和最终结果的准确率
+
+    计时只包含识别本身，不含图片解码；两种策略都会完整执行，不提前返回。
+    """
+    if classifier is None:
+        classifier = load_classifier()
+    decoded = [
+        (sample.label, decode_captcha_frames(sample.image_bytes)) for sample in samples
+    ]
+    labeled = sum(label is not None for label, _ in decoded)
+
+    reports: list[CaptchaVariantReport] = []
+    for variant in variants:
+        recognizer = CaptchaRecognizer(
+            classifier,
+            corrections=variant.corrections,
+            upscale=variant.upscale,
+        )
+        timings: list[float] = []
+        correct: Counter[str] = Counter()
+        confusions: Counter[tuple[str, str]] = Counter()
+        for label, frames in decoded:
+            started = time.perf_counter()
+            candidates = recognizer.read_candidates(frames)
+            timings.append(time.perf_counter() - started)
+            if label is None:
+                continue
+            results = (candidates.full, candidates.split, candidates.selected)
+            for strategy, result in zip(CAPTCHA_STRATEGIES, results, strict=True):
+                correct[strategy] += result == label
+            if len(candidates.selected) == len(label):
+                confusions.update(
+                    (expected, actual)
+                    for expected, actual in zip(label, candidates.selected, strict=True)
+                    if expected != actual
+                )
+        reports.append(
+            CaptchaVariantReport(
+                variant=variant,
+                latency=LatencySummary.from_samples(timings),
+                labeled=labeled,
+                correct=dict(correct),
+                confusions=confusions,
+            ),
+        )
+    return reports
+
+
+def run_captcha_benchmark(
+    corpus: Path,
+    *,
+    repeat: int = 1,
+    variants: Sequence[CaptchaVariant] = (),
+    top_confusions: int = 5,
+) -> list[CaptchaModeReport]:
+    samples = load_captcha_corpus(corpus)
+    log.info("验证码语料：%s，共 %d 张", corpus, len(samples))
+    classifier = load_classifier()
+    reports = benchmark_captcha_modes(samples, classifier=classifier, repeat=repeat)
+    for report in reports:
+        accuracy = report.accuracy
+        log.info(
+            "%-6s %s，识别出 %d 次%s",
+            report.mode,
+            report.latency.describe(),
+            report.recognized,
+            "" if accuracy is None else f"，准确率 {accuracy:.1%}",
+        )
+    if variants:
+        variant_reports = benchmark_captcha_variants(
+            samples,
+            variants,
+            classifier=classifier,
+        )
+        for variant_report in variant_reports:
+            _log_variant_report(variant_report, top_confusions)
+    return reports
+
+
+def _log_variant_report(report: CaptchaVariantReport, top_confusions: int) -> None:
+    accuracies = []
+    for strategy in CAPTCHA_STRATEGIES:
+        accuracy = report.accuracy(strategy)
+        shown = "-" if accuracy is None else f"{accuracy:.1%}"
+        accuracies.append(f"{strategy} {shown}")
+    log.info(
+        "%s：%s，准确率 %s",
+        report.variant.name,
+        report.latency.describe(),
+        " / ".join(accuracies),
+    )
+    pairs = report.confusions.most_common(top_confusions)
+    if pairs:
+        log.info(
+            "  常见混淆：%s",
+            "，".join(
+                f"{expected}→{actual} ×{count}" for (expected, actual), count in pairs
+            ),
+        )
@@ -0,0 +1,232 @@
+"""课程列表 JSON 解析耗时基准
+
+语料目录中每个 ``.json`` 或 ``.txt`` 文件是一份录制的 courseList 接口响应原文；
+没有录制数据时可以生成结构相同的合成课程列表（``rw*list`` 字段为 JSON 字符串，
+需要二次解码），或课程对象嵌在脚本里、需要逐个扫描的合成 HTML 页面。
+每个 JSON 后端都完整执行 ``parse_course_candidates``。
+内存测试用 tracemalloc 统计解析结果常驻的字节数，对比紧凑候选项、保留原始
+JSON 字节以及同时持有解码后原始对象（旧版候选项的做法）三种情况。
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from urp_academic_affairs_tools.client import json_backend
+from urp_academic_affairs_tools.course_selection import parse_course_candidates
+
+from .stats import LatencySummary
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+JSON_PAYLOAD_SUFFIXES = frozenset({".json", ".txt"})
+CANDIDATE_MEMORY_MODES = ("compact", "raw-bytes", "raw-dict")
+
+
+@dataclass(frozen=True, slots=True)
+class JsonPayload:
+    """一份待解析的响应原文"""
+
+    name: str
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class JsonBackendReport:
+    """一个 JSON 后端在全部响应上的解析耗时"""
+
+    backend: str
+    latency: LatencySummary
+    candidates: int
+
+
+@dataclass(frozen=True, slots=True)
+class CandidateMemoryReport:
+    """一种候选项表示在全部响应上的常驻内存"""
+
+    mode: str
+    candidates: int
+    retained_bytes: int
+
+
+def load_json_payloads(directory: Path) -> list[JsonPayload]:
+    """读取录制的响应原文，按文件名排序"""
+    payloads = [
+        JsonPayload(path.name, path.read_text(encoding="utf-8"))
+        for path in sorted(directory.iterdir())
+        if path.is_file() and path.suffix.lower() in JSON_PAYLOAD_SUFFIXES
+    ]
+    if not payloads:
+        msg = f"no JSON payloads found in {directory}"
+        raise ValueError(msg)
+    return payloads
+
+
+def _synthetic_courses(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": {
+                "coureNumber": f"{index:08d}",
+                "coureSequenceNumber": f"{index % 7 + 1:02d}",
+                "executiveEducationPlanNumber": "2025-2026-1-1",
+            },
+            "kcm": f"高等数学（{index % 97}）",
+            "skjs": f"教师{index % 211}",
+            "bkskyl": index % 60,
+            "bkskrl": 60,
+            "sjdd": [{"skxq": index % 7 + 1, "skjc": 3, "jasm": "教一 101"}],
+            "xf": 2.5,
+            "kclbmc": "公选课",
+        }
+        for index in range(count)
+    ]
+
+
+def _flat_course(course: dict[str, Any]) -> dict[str, Any]:
+    identifier = course.pop("id")
+    return {
+        "courseNum": identifier["coureNumber"],
+        "classNum": identifier["coureSequenceNumber"],
+        "termCode": identifier["executiveEducationPlanNumber"],
+        "courseName": course.pop("kcm"),
+        **course,
+    }
+
+
+def synthetic_course_list(count: int) -> JsonPayload:
+    """生成包含 ``count`` 门课程、结构与教务系统一致的 courseList 响应"""
+    text = json.dumps(
+        {"rwRxkZlList": json.dumps(_synthetic_courses(count), ensure_ascii=False)},
+        ensure_ascii=False,
+    )
+    return JsonPayload(f"synthetic-{count}", text)
+
+
+def synthetic_course_page(count: int) -> JsonPayload:
+    """生成不是合法 JSON、课程对象逐行嵌在脚本中的 HTML 页面"""
+    rows = "\n".join(
+        f"<tr><td>{index}</td></tr><script>rows.push("
+        f"{json.dumps(_flat_course(course), ensure_ascii=False)});</script>"
+        for index, course in enumerate(_synthetic_courses(count))
+    )
+    text = (
+        '<html><head><style>td { padding: 0; }</style></head><body><table class="list">'
+        f"{rows}</table></body></html>"
+    )
+    return JsonPayload(f"synthetic-page-{count}", text)
+
+
+def benchmark_json_backends(
+    payloads: Sequence[JsonPayload],
+    *,
+    backends: Sequence[str] | None = None,
+    repeat: int = 1,
+) -> list[JsonBackendReport]:
+    """依次切换 JSON 后端解析全部响应，结束后恢复原来的后端"""
+    if repeat < 1:
+        msg = "repeat must be at least 1"
+        raise ValueError(msg)
+    original = json_backend.json_backend()
+    reports: list[JsonBackendReport] = []
+    try:
+        for backend in backends or list(json_backend.JSON_BACKENDS):
+            json_backend.use_json_backend(backend)
+            parse_course_candidates(payloads[0].text)
+            timings: list[float] = []
+            candidates = 0
+            for _ in range(repeat):
+                for payload in payloads:
+                    started = time.perf_counter()
+                    parsed = parse_course_candidates(payload.text)
+                    timings.append(time.perf_counter() - started)
+                    candidates += len(parsed)
+            reports.append(
+                JsonBackendReport(
+                    backend=backend,
+                    latency=LatencySummary.from_samples(timings),
+                    candidates=candidates // repeat,
+                ),
+            )
+    finally:
+        json_backend.use_json_backend(original)
+    return reports
+
+
+def measure_candidate_memory(
+    payloads: Sequence[JsonPayload],
+    mode: str,
+) -> CandidateMemoryReport:
+    """解析全部响应并统计结果仍持有的内存"""
+    if mode not in CANDIDATE_MEMORY_MODES:
+        msg = f"unknown memory mode {mode!r}"
+        raise ValueError(msg)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        candidates = [
+            candidate
+            for payload in payloads
+            for candidate in parse_course_candidates(
+                payload.text,
+                keep_raw=mode != "compact",
+            )
+        ]
+        raw_objects = (
+            [candidate.raw for candidate in candidates] if mode == "raw-dict" else []
+        )
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del raw_objects
+    return CandidateMemoryReport(mode, len(candidates), retained)
+
+
+def run_json_benchmark(
+    corpus: Path | None,
+    *,
+    synthetic: int = 0,
+    page: int = 0,
+    repeat: int = 1,
+    memory: bool = False,
+) -> list[JsonBackendReport]:
+    payloads = load_json_payloads(corpus) if corpus is not None else []
+    if synthetic:
+        payloads.append(synthetic_course_list(synthetic))
+    if page:
+        payloads.append(synthetic_course_page(page))
+    if not payloads:
+        msg = "specify a payload directory, --synthetic or --page"
+        raise ValueError(msg)
+    size = sum(len(payload.text) for payload in payloads)
+    log.info("JSON 语料：%d 份响应，共 %.1f 万字符", len(payloads), size / 10_000)
+    reports = benchmark_json_backends(payloads, repeat=repeat)
+    for report in reports:
+        log.info(
+            "%-6s %s，解析出 %d 门课程",
+            report.backend,
+            report.latency.describe(),
+            report.candidates,
+        )
+    if len({report.candidates for report in reports}) > 1:
+        log.warning("不同 JSON 后端解析出的课程数不一致")
+    if memory:
+        for mode in CANDIDATE_MEMORY_MODES:
+            usage = measure_candidate_memory(payloads, mode)
+            log.info(
+                "%-9s %d 门课程常驻 %.2f MB，平均每门 %.0f 字节",
+                usage.mode,
+                usage.candidates,
+                usage.retained_bytes / 1024 / 1024,
+                usage.retained_bytes / max(usage.candidates, 1),
+            )
+    return reports
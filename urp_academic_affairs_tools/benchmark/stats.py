@@ -0,0 +1,49 @@
+"""基准测试的耗时统计"""
+
+from __future__ import annotations
+
+import math
+import statistics
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """按最近秩法取分位数，``fraction`` 取值 0 到 1"""
+    if not samples:
+        msg = "percentile requires at least one sample"
+        raise ValueError(msg)
+    if not 0 <= fraction <= 1:
+        msg = "fraction must be between 0 and 1"
+        raise ValueError(msg)
+    ordered = sorted(samples)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass(frozen=True, slots=True)
+class LatencySummary:
+    """一组耗时样本（秒）的汇总"""
+
+    count: int
+    median: float
+    p99: float
+    mean: float
+
+    @classmethod
+    def from_samples(cls, samples: Sequence[float]) -> LatencySummary:
+        return cls(
+            count=len(samples),
+            median=statistics.median(samples),
+            p99=percentile(samples, 0.99),
+            mean=statistics.fmean(samples),
+        )
+
+    def describe(self) -> str:
+        return (
+            f"n={self.count} 中位数 {self.median * 1000:.1f} ms "
+            f"p99 {self.p99 * 1000:.1f} ms 平均 {self.mean * 1000:.1f} ms"
+        )
@@ -7,7 +7,19 @@ from .api import (
     fetch_tasks,
     get_this_semester_timetable,
 )
-from .captcha import CaptchaRecognizer
+from .captcha import (
+    CAPTCHA_RECOGNIZERS,
+    CaptchaCandidates,
+    CaptchaRecognizer,
+    RecognizerRegistry,
+    preload_captcha_recognizer,
+)
+from .clock import (
+    ServerClockEstimate,
+    ServerDateSample,
+    estimate_server_clock,
+    measure_server_clock,
+)
 from .errors import (
     AuthenticationFailure,
     AuthError,
@@ -21,25 +33,37 @@ from .session import (
     AsyncJWSSession,
     RetryPolicy,
     SessionOptions,
+    WarmupReport,
 )
+from .session_store import SessionStore
 
 __all__ = [
+    "CAPTCHA_RECOGNIZERS",
     "AsyncJWSSession",
     "AuthError",
     "AuthenticationFailure",
+    "CaptchaCandidates",
     "CaptchaRecognizer",
     "ConcurrentSessionExpiredError",
     "CsrfTokenExpiredError",
     "InvalidCredentialsError",
+    "RecognizerRegistry",
     "RetryPolicy",
+    "ServerClockEstimate",
+    "ServerDateSample",
     "ServiceError",
     "SessionExpiredError",
     "SessionOptions",
+    "SessionStore",
+    "WarmupReport",
     "delete_course_selection",
+    "estimate_server_clock",
     "extract_token_value",
     "fetch_course_select_index",
     "fetch_course_select_list",
     "fetch_course_select_page",
     "fetch_tasks",
     "get_this_semester_timetable",
+    "measure_server_clock",
+    "preload_captcha_recognizer",
 ]
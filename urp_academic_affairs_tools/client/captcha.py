@@ -1,9 +1,13 @@
 """验证码图片校验与 OCR 识别"""
 
+import asyncio
 import logging
 import re
+import threading
 from collections import Counter
-from collections.abc import Callable
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass
 from io import BytesIO
 from typing import Protocol
 
@@ -13,88 +17,141 @@ from PIL import Image, ImageSequence, UnidentifiedImageError
 CAPTCHA_LENGTH = 4
 CAPTCHA_RE = re.compile(r"^[A-Za-z0-9]{4}$")
 OCR_CORRECTIONS = str.maketrans({"y": "7", "9": "r", "E": "F"})
+OCR_UPSCALE = 2
 
 log = logging.getLogger(__name__)
 
 
 class OCRClassifier(Protocol):
-    def classification(self, img: bytes) -> str: ...
+    def classification(self, img: bytes | Image.Image) -> str: ...
 
 
 CaptchaSolver = Callable[[bytes], str]
+_CropKey = tuple[tuple[int, int], bytes]
 
 
-def verify_image_bytes(image_bytes: bytes) -> bool:
-    """验证字节内容是否为 Pillow 可读取的完整图片"""
+@dataclass(frozen=True, slots=True)
+class CaptchaReading:
+    """一次验证码识别结果；``confident`` 表示整图识别即得到合法验证码"""
+
+    code: str
+    confident: bool
+
+    @property
+    def valid(self) -> bool:
+        return CAPTCHA_RE.fullmatch(self.code) is not None
+
+
+@dataclass(frozen=True, slots=True)
+class CaptchaCandidates:
+    """整图和分割字符两种策略各自的识别结果"""
+
+    full: str
+    split: str
+
+    @property
+    def selected(self) -> str:
+        return CaptchaRecognizer.select_result(self.full, self.split)
+
+
+def decode_captcha_frames(image_bytes: bytes) -> list[Image.Image]:
+    """一次解码完成校验并提取所有灰度帧；不是完整图片时抛出 ValueError"""
     try:
         with Image.open(BytesIO(image_bytes)) as image:
-            image.verify()
-    except (OSError, ValueError, UnidentifiedImageError):
-        return False
-    return True
+            frames = [frame.convert("L") for frame in ImageSequence.Iterator(image)]
+    except (OSError, UnidentifiedImageError) as error:
+        msg = f"invalid captcha image: {error}"
+        raise ValueError(msg) from error
+    if not frames:
+        msg = "captcha image has no frames"
+        raise ValueError(msg)
+    return frames
+
+
+def load_classifier() -> OCRClassifier:
+    """加载 ddddocr beta 模型"""
+    classifier: OCRClassifier = ddddocr.DdddOcr(show_ad=False, beta=True)
+    return classifier
 
 
 class CaptchaRecognizer:
-    """组合整图、分割字符和动画帧结果识别四位验证码"""
+    """组合整图、分割字符和动画帧结果识别四位验证码
+
+    整图结果已是合法四位验证码时，``select_result`` 一定选用它，
+    因此默认在整图识别后立即返回，只有整图不合法时才进行分割和多帧投票。
+    """
 
-    def __init__(self, classifier: OCRClassifier | None = None) -> None:
+    def __init__(
+        self,
+        classifier: OCRClassifier | None = None,
+        *,
+        early_exit: bool = True,
+        corrections: Mapping[int, str] = OCR_CORRECTIONS,
+        upscale: int = OCR_UPSCALE,
+    ) -> None:
+        if upscale < 1:
+            msg = "upscale must be at least 1"
+            raise ValueError(msg)
         self._classifier = classifier
+        self.early_exit = early_exit
+        self.corrections = corrections
+        self.upscale = upscale
 
     def _get_classifier(self) -> OCRClassifier:
         if self._classifier is None:
-            self._classifier = ddddocr.DdddOcr(show_ad=False, beta=True)
+            self._classifier = load_classifier()
         return self._classifier
 
-    @staticmethod
-    def normalize(text: str) -> str:
-        corrected = text.strip().replace(" ", "").translate(OCR_CORRECTIONS)
+    def normalize(self, text: str) -> str:
+        corrected = text.strip().replace(" ", "").translate(self.corrections)
         return "".join(
             character
             for character in corrected
             if character.isascii() and character.isalnum()
         ).lower()
 
-    def _ocr_image(self, image: Image.Image) -> str:
-        enlarged = image.resize(
-            (image.width * 2, image.height * 2),
-            Image.Resampling.NEAREST,
-        )
-        buffer = BytesIO()
-        enlarged.save(buffer, format="PNG")
-        result = self._get_classifier().classification(buffer.getvalue())
-        return self.normalize(result)
+    def _ocr_batch(
+        self,
+        images: Sequence[Image.Image],
+        cache: dict[_CropKey, str],
+    ) -> list[str]:
+        """识别一组裁剪图；同一张验证码内像素相同的裁剪只推理一次
+
+        ddddocr 自带模型的输入 batch 维固定为 1，无法把多张裁剪堆叠成一次推理，
+        因此逐张直接传入放大后的 Pillow 图片，省去每次的 PNG 编码和解码。
+        """
+        classifier = self._get_classifier()
+        results: list[str] = []
+        for image in images:
+            key = (image.size, image.tobytes())
+            if key not in cache:
+                enlarged = image.resize(
+                    (image.width * self.upscale, image.height * self.upscale),
+                    Image.Resampling.NEAREST,
+                )
+                cache[key] = self.normalize(classifier.classification(enlarged))
+            results.append(cache[key])
+        return results
 
-    def _split_characters(self, image: Image.Image) -> list[str]:
+    @staticmethod
+    def _split_crops(image: Image.Image) -> list[Image.Image]:
         width, height = image.size
         character_width = width // CAPTCHA_LENGTH
-        characters: list[str] = []
+        crops: list[Image.Image] = []
         for index in range(CAPTCHA_LENGTH):
             right = (
                 width if index == CAPTCHA_LENGTH - 1 else (index + 1) * character_width
             )
-            crop = image.crop((index * character_width, 0, right, height))
-            result = self._ocr_image(crop)
-            characters.append(result[:1])
-        return characters
+            crops.append(image.crop((index * character_width, 0, right, height)))
+        return crops
 
-    def _recover_first_character(
-        self,
-        frames: list[Image.Image],
-        characters: list[str],
-    ) -> None:
-        if characters[0]:
-            return
-
-        candidates: list[str] = []
-        for frame in frames[:3]:
-            width, height = frame.size
-            for ratio in (4, 3):
-                crop = frame.crop((0, 0, width // ratio, height))
-                result = self._ocr_image(crop)
-                if result:
-                    candidates.append(result[0])
-        if candidates:
-            characters[0] = Counter(candidates).most_common(1)[0][0]
+    @staticmethod
+    def _first_character_crops(frames: Sequence[Image.Image]) -> list[Image.Image]:
+        return [
+            frame.crop((0, 0, frame.width // ratio, frame.height))
+            for frame in frames[:3]
+            for ratio in (4, 3)
+        ]
 
     @staticmethod
     def select_result(full_code: str, split_code: str) -> str:
@@ -105,20 +162,124 @@ class CaptchaRecognizer:
         return ""
 
     def __call__(self, image_bytes: bytes) -> str:
-        with Image.open(BytesIO(image_bytes)) as image:
-            frames = [frame.convert("L") for frame in ImageSequence.Iterator(image)]
+        return self.recognize_frames(decode_captcha_frames(image_bytes))
+
+    def recognize_frames(self, frames: Sequence[Image.Image]) -> str:
+        """识别已解码的灰度帧"""
+        return self.read_frames(frames).code
+
+    def read_frames(self, frames: Sequence[Image.Image]) -> CaptchaReading:
+        """识别已解码的灰度帧，并给出结果是否来自整图识别"""
         if not frames:
-            return ""
+            return CaptchaReading("", confident=False)
 
-        full_code = self._ocr_image(frames[0])
-        split_characters = self._split_characters(frames[0])
-        self._recover_first_character(frames, split_characters)
-        split_code = "".join(split_characters)
-        selected = self.select_result(full_code, split_code)
+        cache: dict[_CropKey, str] = {}
+        (full_code,) = self._ocr_batch([frames[0]], cache)
+        confident = CAPTCHA_RE.fullmatch(full_code) is not None
+        if self.early_exit and confident:
+            log.debug("验证码 OCR：整图结果 %r 合法，跳过分割识别", full_code)
+            return CaptchaReading(full_code, confident=True)
+        candidates = CaptchaCandidates(full_code, self._read_split(frames, cache))
         log.debug(
             "验证码 OCR：full=%r split=%r selected=%r",
-            full_code,
-            split_code,
-            selected,
+            candidates.full,
+            candidates.split,
+            candidates.selected,
         )
-        return selected
+        return CaptchaReading(candidates.selected, confident=confident)
+
+    def read_candidates(self, frames: Sequence[Image.Image]) -> CaptchaCandidates:
+        """不提前返回，分别给出整图和分割字符两种策略的结果"""
+        if not frames:
+            return CaptchaCandidates("", "")
+        cache: dict[_CropKey, str] = {}
+        (full_code,) = self._ocr_batch([frames[0]], cache)
+        return CaptchaCandidates(full_code, self._read_split(frames, cache))
+
+    def _read_split(
+        self,
+        frames: Sequence[Image.Image],
+        cache: dict[_CropKey, str],
+    ) -> str:
+        split_results = self._ocr_batch(self._split_crops(frames[0]), cache)
+        split_characters = [result[:1] for result in split_results]
+        if not split_characters[0]:
+            candidates = [
+                result[0]
+                for result in self._ocr_batch(
+                    self._first_character_crops(frames),
+                    cache,
+                )
+                if result
+            ]
+            if candidates:
+                split_characters[0] = Counter(candidates).most_common(1)[0][0]
+        return "".join(split_characters)
+
+
+def _load_recognizer() -> CaptchaRecognizer:
+    return CaptchaRecognizer(load_classifier())
+
+
+class RecognizerRegistry:
+    """进程内共享的验证码识别器
+
+    模型在后台线程中只加载一次，所有会话共用同一个识别器；
+    加载失败时下一次获取会重新加载。
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], CaptchaRecognizer] = _load_recognizer,
+    ) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._future: Future[CaptchaRecognizer] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        future = self._future
+        return future is not None and future.done() and future.exception() is None
+
+    def preload(self) -> Future[CaptchaRecognizer]:
+        """开始在后台线程加载模型；重复调用返回同一个 Future"""
+        with self._lock:
+            future = self._future
+            if future is None or (future.done() and future.exception() is not None):
+                future = Future()
+                self._future = future
+                threading.Thread(
+                    target=self._load,
+                    args=(future,),
+                    name="captcha-model-loader",
+                    daemon=True,
+                ).start()
+            return future
+
+    def _load(self, future: Future[CaptchaRecognizer]) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            recognizer = self._factory()
+        except Exception as error:  # noqa: BLE001
+            log.warning("验证码识别模型加载失败：%s", error)
+            future.set_exception(error)
+        else:
+            log.debug("验证码识别模型已加载")
+            future.set_result(recognizer)
+
+    def get(self) -> CaptchaRecognizer:
+        """阻塞等待并返回共享识别器"""
+        return self.preload().result()
+
+    async def aget(self) -> CaptchaRecognizer:
+        """不阻塞事件循环地等待共享识别器"""
+        return await asyncio.wrap_future(self.preload())
+
+
+CAPTCHA_RECOGNIZERS = RecognizerRegistry()
+
+
+def preload_captcha_recognizer() -> Future[CaptchaRecognizer]:
+    """启动时调用，在后台线程预先加载进程共享的验证码模型"""
+    return CAPTCHA_RECOGNIZERS.preload()
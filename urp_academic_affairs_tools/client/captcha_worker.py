@@ -0,0 +1,182 @@
+"""本机验证码识别服务
+
+多个进程同时运行时，可以由一个常驻进程加载模型，其余进程通过本机 TCP 连接提交
+验证码图片。请求和响应都是 4 字节大端长度前缀加内容：请求内容为图片字节，
+响应内容为 UTF-8 编码的识别结果，识别失败时为空。
+
+启动方式：``python -m urp_academic_affairs_tools.client.captcha_worker``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import socket
+import struct
+import sys
+from typing import TYPE_CHECKING
+
+from PIL import UnidentifiedImageError
+
+from .captcha import CAPTCHA_RECOGNIZERS, RecognizerRegistry
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .captcha import CaptchaSolver
+
+log = logging.getLogger(__name__)
+DEFAULT_WORKER_HOST = "127.0.0.1"
+DEFAULT_WORKER_PORT = 8765
+MAX_IMAGE_BYTES = 1024 * 1024
+_LENGTH = struct.Struct(">I")
+
+
+def parse_worker_address(address: str) -> tuple[str, int]:
+    """解析 ``host:port`` 形式的识别服务地址"""
+    host, separator, port = address.strip().rpartition(":")
+    if not separator or not host or not port.isdigit():
+        msg = f"captcha worker address must be host:port, got {address!r}"
+        raise ValueError(msg)
+    number = int(port)
+    if not 0 < number < 1 << 16:
+        msg = f"captcha worker port out of range: {number}"
+        raise ValueError(msg)
+    return host.strip("[]"), number
+
+
+class CaptchaWorkerClient:
+    """通过本机识别服务识别验证码；服务不可用时退回本进程的共享识别器"""
+
+    def __init__(
+        self,
+        address: str,
+        *,
+        timeout: float = 5.0,
+        fallback: CaptchaSolver | None = None,
+    ) -> None:
+        self.address = parse_worker_address(address)
+        self.timeout = timeout
+        self._fallback = fallback
+
+    def __call__(self, image_bytes: bytes) -> str:
+        try:
+            return self._request(image_bytes)
+        except (OSError, ValueError) as error:
+            log.warning("验证码识别服务不可用，改用本进程识别：%s", error)
+        fallback = self._fallback or CAPTCHA_RECOGNIZERS.get()
+        return fallback(image_bytes)
+
+    def _request(self, image_bytes: bytes) -> str:
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall(_LENGTH.pack(len(image_bytes)) + image_bytes)
+            (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+            return _recv_exactly(sock, length).decode()
+
+
+def configure_captcha_solver(worker_address: str | None) -> CaptchaSolver | None:
+    """配置了识别服务时返回其客户端；否则在后台预加载本进程共享的模型"""
+    if worker_address:
+        return CaptchaWorkerClient(worker_address)
+    CAPTCHA_RECOGNIZERS.preload()
+    return None
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks: list[bytes] = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            msg = "captcha worker closed the connection"
+            raise ConnectionError(msg)
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    registry: RecognizerRegistry,
+) -> None:
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(_LENGTH.size)
+            except asyncio.IncompleteReadError:
+                return
+            (length,) = _LENGTH.unpack(header)
+            if length > MAX_IMAGE_BYTES:
+                log.warning("验证码图片过大：%d 字节", length)
+                return
+            image_bytes = await reader.readexactly(length)
+            recognizer = await registry.aget()
+            try:
+                result = await asyncio.to_thread(recognizer, image_bytes)
+            except (OSError, ValueError, UnidentifiedImageError) as error:
+                log.warning("验证码识别失败：%s", error)
+                result = ""
+            encoded = result.encode()
+            writer.write(_LENGTH.pack(len(encoded)) + encoded)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def start_captcha_worker(
+    host: str = DEFAULT_WORKER_HOST,
+    port: int = DEFAULT_WORKER_PORT,
+    *,
+    registry: RecognizerRegistry = CAPTCHA_RECOGNIZERS,
+) -> asyncio.Server:
+    """启动识别服务；模型在后台加载，加载完成前收到的请求会等待"""
+    registry.preload()
+
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        await _handle_connection(reader, writer, registry)
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _serve(host: str, port: int) -> None:
+    server = await start_captcha_worker(host, port)
+    addresses = ", ".join(
+        f"{name[0]}:{name[1]}" for name in (s.getsockname() for s in server.sockets)
+    )
+    log.info("验证码识别服务已启动：%s", addresses)
+    await asyncio.wrap_future(CAPTCHA_RECOGNIZERS.preload())
+    log.info("验证码识别模型已就绪")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m urp_academic_affairs_tools.client.captcha_worker",
+        description="在本机提供共享的验证码识别服务",
+    )
+    parser.add_argument("--host", default=DEFAULT_WORKER_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_WORKER_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-7s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args.host, args.port))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
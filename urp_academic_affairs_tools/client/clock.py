@@ -0,0 +1,114 @@
+"""根据 HTTP Date 响应头估计服务器时钟偏差"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from datetime import datetime
+
+    from .session import AsyncJWSSession
+
+DATE_HEADER_RESOLUTION = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class ServerDateSample:
+    """一次请求的本地发送/接收时间与服务器 Date 头，均为 Unix 时间戳"""
+
+    sent_at: float
+    received_at: float
+    server_time: float
+
+    @property
+    def round_trip(self) -> float:
+        return self.received_at - self.sent_at
+
+
+@dataclass(frozen=True, slots=True)
+class ServerClockEstimate:
+    """服务器时钟相对本地时钟的偏差估计，单位为秒"""
+
+    offset: float
+    uncertainty: float
+    round_trip: float
+    samples: int
+
+    def local_timestamp(self, server_time: datetime) -> float:
+        """把服务器时间换算成本地 Unix 时间戳"""
+        return server_time.timestamp() - self.offset
+
+    def fire_timestamp(self, server_time: datetime) -> float:
+        """提前半个往返时间发出请求，使其恰好在 server_time 到达服务器"""
+        return self.local_timestamp(server_time) - self.round_trip / 2
+
+
+def estimate_server_clock(
+    samples: Sequence[ServerDateSample],
+) -> ServerClockEstimate:
+    """合并多次采样的偏差区间
+
+    Date 头只精确到秒：服务器在本地 ``[sent_at, received_at]`` 之间的某一时刻
+    生成响应，且当时服务器时间位于 ``[server_time, server_time + 1)``。
+    每个样本都给出一个偏差区间，取交集后以中点作为估计值。
+    """
+    if not samples:
+        msg = "at least one server date sample is required"
+        raise ValueError(msg)
+
+    lower = max(sample.server_time - sample.received_at for sample in samples)
+    upper = min(
+        sample.server_time + DATE_HEADER_RESOLUTION - sample.sent_at
+        for sample in samples
+    )
+    if lower > upper:
+        # 网络抖动导致区间不相交时退回到各样本中点的中位数
+        midpoints = [
+            sample.server_time
+            + DATE_HEADER_RESOLUTION / 2
+            - (sample.sent_at + sample.received_at) / 2
+            for sample in samples
+        ]
+        offset = statistics.median(midpoints)
+        uncertainty = (max(midpoints) - min(midpoints)) / 2 + (
+            DATE_HEADER_RESOLUTION / 2
+        )
+    else:
+        offset = (lower + upper) / 2
+        uncertainty = (upper - lower) / 2
+    return ServerClockEstimate(
+        offset=offset,
+        uncertainty=uncertainty,
+        round_trip=statistics.median(sample.round_trip for sample in samples),
+        samples=len(samples),
+    )
+
+
+async def measure_server_clock(
+    jws: AsyncJWSSession,
+    samples: int = 5,
+) -> ServerClockEstimate:
+    """错开秒内相位多次采样 Date 头，缩小秒级精度带来的误差"""
+    if samples < 1:
+        msg = "samples must be at least 1"
+        raise ValueError(msg)
+    collected: list[ServerDateSample] = []
+    for index in range(samples):
+        collected.append(await jws.sample_server_date())
+        if index < samples - 1:
+            await asyncio.sleep(DATE_HEADER_RESOLUTION / samples)
+    return estimate_server_clock(collected)
+
+
+async def sleep_until(timestamp: float) -> None:
+    """睡眠到本地 Unix 时间戳；临近目标时缩短睡眠粒度以减少过冲"""
+    while True:
+        remaining = timestamp - time.time()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(remaining if remaining < 0.05 else remaining - 0.02)  # noqa: PLR2004
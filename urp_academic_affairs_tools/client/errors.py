@@ -27,10 +27,12 @@ class ServiceError(Exception):
         *,
         status: int | None = None,
         retryable: bool = False,
+        retry_after: float | None = None,
     ) -> None:
         super().__init__(message)
         self.status = status
         self.retryable = retryable
+        self.retry_after = retry_after
 
 
 class SessionExpiredError(Exception):
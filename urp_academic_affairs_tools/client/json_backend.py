@@ -0,0 +1,57 @@
+"""JSON 解码后端
+
+安装了 orjson 时用它解析教务系统返回的大 JSON，否则使用标准库。两者接受的输入
+不完全相同（orjson 拒绝 NaN、超过 64 位的整数和孤立代理字符），因此快速后端
+解析失败时再交给标准库，保证行为与只用标准库时一致。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+JSONDecodeError = json.JSONDecodeError
+JsonLoader = Callable[[str | bytes], Any]
+
+
+def _available_backends() -> dict[str, JsonLoader]:
+    backends: dict[str, JsonLoader] = {"json": json.loads}
+    try:
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        return backends
+    backends["orjson"] = orjson.loads
+    return backends
+
+
+JSON_BACKENDS = _available_backends()
+_fast_loads: JsonLoader | None = JSON_BACKENDS.get("orjson")
+
+
+def json_backend() -> str:
+    """返回当前使用的 JSON 后端名称"""
+    return "json" if _fast_loads is None else "orjson"
+
+
+def use_json_backend(name: str) -> None:
+    """切换 JSON 后端；``json`` 表示只用标准库"""
+    global _fast_loads  # noqa: PLW0603
+    if name not in JSON_BACKENDS:
+        msg = f"JSON backend {name!r} is not installed"
+        raise ValueError(msg)
+    _fast_loads = None if name == "json" else JSON_BACKENDS[name]
+    log.debug("JSON 后端：%s", name)
+
+
+def loads(text: str | bytes) -> Any:  # noqa: ANN401
+    """解析 JSON；失败时抛出 ``json.JSONDecodeError``"""
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(text)
+        except ValueError:
+            pass
+    return json.loads(text)
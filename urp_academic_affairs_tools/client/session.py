@@ -1,20 +1,28 @@
 """异步教务系统会话、登录与请求重试"""
 
 import asyncio
+import codecs
+import contextvars
 import hashlib
-import json as json_module
 import logging
 import secrets
-from collections.abc import Callable, Mapping
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from types import TracebackType
 from typing import TYPE_CHECKING, Any, Generic, TypeVar, cast
 
 import aiohttp
+from aiohttp.abc import AbstractCookieJar
+from yarl import URL
 
 if TYPE_CHECKING:
     from typing_extensions import Self
 
+from . import json_backend
 from .auth import (
     classify_authentication_failure,
     extract_error_code,
@@ -22,10 +30,13 @@ from .auth import (
 )
 from .captcha import (
     CAPTCHA_RE,
+    CAPTCHA_RECOGNIZERS,
+    CaptchaReading,
     CaptchaRecognizer,
     CaptchaSolver,
-    verify_image_bytes,
+    decode_captcha_frames,
 )
+from .clock import ServerDateSample
 from .errors import (
     AuthenticationFailure,
     AuthError,
@@ -35,14 +46,29 @@ from .errors import (
     ServiceError,
     SessionExpiredError,
 )
+from .session_store import SessionStore
 
 HTTP_STATUS_OK = 200
 HTTP_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
 RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
 IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RESPONSE_CHUNK_SIZE = 64 * 1024
+AUTH_SNIFF_CHARS = 64 * 1024
 
 log = logging.getLogger(__name__)
 _RANDOM = secrets.SystemRandom()
+# 作用域开关按任务上下文记录：GUI 各页面共用同一个会话，只有在 with 块内
+# 运行（及其创建）的任务受影响
+_OPTIMISTIC_AUTH_SESSIONS: contextvars.ContextVar[tuple[object, ...]] = (
+    contextvars.ContextVar("optimistic_auth_sessions", default=())
+)
+_CALLER_MANAGED_TOKEN_SESSIONS: contextvars.ContextVar[tuple[object, ...]] = (
+    contextvars.ContextVar("caller_managed_token_sessions", default=())
+)
+# 登录流程中的请求（登录页、验证码等）不能证明会话已认证
+_LOGGING_IN_SESSIONS: contextvars.ContextVar[tuple[object, ...]] = (
+    contextvars.ContextVar("logging_in_sessions", default=())
+)
 _T = TypeVar("_T")
 
 
@@ -82,6 +108,12 @@ class SessionOptions:
     max_redirects: int = 10
     login_retry_sleep: float = 0.2
     login_retry_jitter: float = 0.15
+    optimistic_auth: bool = False
+    auth_cache_ttl: float = 5.0
+    keepalive_timeout: float = 15.0
+    warmup_connections: bool = True
+    speculative_logins: int = 1
+    session_keepalive_interval: float = 0.0
 
     def __post_init__(self) -> None:
         if min(self.timeout_total, self.timeout_connect) <= 0:
@@ -96,6 +128,43 @@ class SessionOptions:
         if min(self.login_retry_sleep, self.login_retry_jitter) < 0:
             msg = "login retry delays cannot be negative"
             raise ValueError(msg)
+        if self.auth_cache_ttl < 0:
+            msg = "auth_cache_ttl cannot be negative"
+            raise ValueError(msg)
+        if self.keepalive_timeout <= 0:
+            msg = "keepalive_timeout must be positive"
+            raise ValueError(msg)
+        if self.speculative_logins < 1:
+            msg = "speculative_logins must be at least 1"
+            raise ValueError(msg)
+        if self.session_keepalive_interval < 0:
+            msg = "session_keepalive_interval cannot be negative"
+            raise ValueError(msg)
+
+
+@dataclass(frozen=True, slots=True)
+class _LoginLane:
+    session: aiohttp.ClientSession | None
+    token: str
+    reading: CaptchaReading
+
+
+@dataclass(frozen=True, slots=True)
+class WarmupReport:
+    """连接预热结果；延迟单位为秒"""
+
+    requested: int
+    opened: int
+    reused: int
+    failed: int
+    open_latency: float
+    reuse_latency: float
+    elapsed: float
+
+    @property
+    def verified(self) -> bool:
+        """第二轮请求是否全部复用了已建立的连接"""
+        return self.failed == 0 and self.reused >= self.requested
 
 
 @dataclass(frozen=True, slots=True)
@@ -118,7 +187,7 @@ class _AttemptResult(Generic[_T]):
 class AsyncJWSSession:
     """维护教务系统 Cookie"""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         base_url: str,
         *,
@@ -126,6 +195,7 @@ class AsyncJWSSession:
         retry: RetryPolicy | None = None,
         captcha_solver: CaptchaSolver | None = None,
         cookie_jar: aiohttp.CookieJar | None = None,
+        session_store: SessionStore | None = None,
     ) -> None:
         normalized_base_url = base_url.rstrip("/")
         if not normalized_base_url.startswith(("http://", "https://")):
@@ -152,9 +222,16 @@ class AsyncJWSSession:
         self._session: aiohttp.ClientSession | None = None
         self._credentials: tuple[str, str] | None = None
         self._captcha_solver = captcha_solver
-        self._captcha_recognizer: CaptchaRecognizer | None = None
         self._login_lock = asyncio.Lock()
+        self._validation_lock = asyncio.Lock()
+        self._auth_valid_until = 0.0
+        self._authenticated_at: float | None = None
+        self._keepalive: asyncio.Task[None] | None = None
+        self._login_generation = 0
         self._cookie_jar = cookie_jar
+        self._session_store = session_store
+        self._connections_opened = 0
+        self._connections_reused = 0
         self._on_reauthenticated: Callable[[], None] | None = None
         self._on_session_expired: Callable[[AuthenticationFailure], None] | None = None
 
@@ -162,6 +239,63 @@ class AsyncJWSSession:
     def started(self) -> bool:
         return self._session is not None and not self._session.closed
 
+    @property
+    def login_generation(self) -> int:
+        """每次登录成功或检测到认证失效时递增，供依赖会话状态的缓存判断是否过期"""
+        return self._login_generation
+
+    @property
+    def optimistic_auth_enabled(self) -> bool:
+        return self.options.optimistic_auth or any(
+            session is self for session in _OPTIMISTIC_AUTH_SESSIONS.get()
+        )
+
+    @contextmanager
+    def optimistic_auth(self) -> Iterator[None]:
+        """作用域内的非幂等请求跳过登录探测，认证失败时重新登录并重放
+
+        只对当前任务及其在作用域内创建的任务生效，共用会话的其他请求照常探测。
+        """
+        token = _OPTIMISTIC_AUTH_SESSIONS.set(
+            (*_OPTIMISTIC_AUTH_SESSIONS.get(), self),
+        )
+        try:
+            yield
+        finally:
+            _OPTIMISTIC_AUTH_SESSIONS.reset(token)
+
+    @property
+    def caller_managed_tokens_enabled(self) -> bool:
+        return any(session is self for session in _CALLER_MANAGED_TOKEN_SESSIONS.get())
+
+    @contextmanager
+    def caller_managed_tokens(self) -> Iterator[None]:
+        """作用域内 tokenValue 由调用方维护，被拒绝时直接抛出而不重新登录
+
+        与 ``optimistic_auth`` 相同，只对作用域内的任务生效。
+        """
+        token = _CALLER_MANAGED_TOKEN_SESSIONS.set(
+            (*_CALLER_MANAGED_TOKEN_SESSIONS.get(), self),
+        )
+        try:
+            yield
+        finally:
+            _CALLER_MANAGED_TOKEN_SESSIONS.reset(token)
+
+    @contextmanager
+    def _login_scope(self) -> Iterator[None]:
+        token = _LOGGING_IN_SESSIONS.set((*_LOGGING_IN_SESSIONS.get(), self))
+        try:
+            yield
+        finally:
+            _LOGGING_IN_SESSIONS.reset(token)
+
+    def _proves_authentication(self) -> bool:
+        """成功响应能否证明已登录：需已登录过，且不是登录流程自身的请求"""
+        return self._credentials is not None and not any(
+            session is self for session in _LOGGING_IN_SESSIONS.get()
+        )
+
     def set_reauthentication_callback(
         self,
         callback: Callable[[], None] | None,
@@ -185,19 +319,52 @@ class AsyncJWSSession:
         connector = aiohttp.TCPConnector(
             limit=self.options.connector_limit,
             ttl_dns_cache=300,
+            keepalive_timeout=self.options.keepalive_timeout,
         )
         self._session = aiohttp.ClientSession(
             timeout=timeout,
             connector=connector,
+            trace_configs=[self._connection_trace()],
             cookie_jar=self._cookie_jar,
             headers=self.headers,
             raise_for_status=False,
         )
+        if self.options.session_keepalive_interval:
+            self._keepalive = asyncio.create_task(self._keep_session_alive())
+
+    def _connection_trace(self) -> aiohttp.TraceConfig:
+        async def on_connection_opened(
+            _session: aiohttp.ClientSession,
+            _context: object,
+            _params: aiohttp.TraceConnectionCreateEndParams,
+        ) -> None:
+            self._connections_opened += 1
+
+        async def on_connection_reused(
+            _session: aiohttp.ClientSession,
+            _context: object,
+            _params: aiohttp.TraceConnectionReuseconnParams,
+        ) -> None:
+            self._connections_reused += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(on_connection_opened)
+        trace.on_connection_reuseconn.append(on_connection_reused)
+        return trace
 
     async def close(self) -> None:
+        keepalive = self._keepalive
+        self._keepalive = None
+        if keepalive is not None:
+            keepalive.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await keepalive
         session = self._session
+        if session is not None and not session.closed:
+            self._save_session(session.cookie_jar)
         self._session = None
         self._credentials = None
+        self._invalidate_authentication()
         if session is not None and not session.closed:
             await session.close()
 
@@ -259,7 +426,31 @@ class AsyncJWSSession:
             error_code=error_code,
         )
 
+    @property
+    def authenticated_age(self) -> float | None:
+        """距上一次确认已登录的响应过去的秒数；尚未确认或已失效时为 None"""
+        if self._authenticated_at is None:
+            return None
+        return time.monotonic() - self._authenticated_at
+
+    def _mark_authenticated(self) -> None:
+        now = time.monotonic()
+        self._authenticated_at = now
+        self._auth_valid_until = now + self.options.auth_cache_ttl
+
+    def _invalidate_authentication(self) -> None:
+        self._authenticated_at = None
+        self._auth_valid_until = 0.0
+
+    def _is_authentication_cached(self) -> bool:
+        return time.monotonic() < self._auth_valid_until
+
     def _notify_session_expired(self, error: SessionExpiredError) -> None:
+        if isinstance(error, CsrfTokenExpiredError):
+            # tokenValue 被拒绝不代表会话失效，登录缓存和依赖会话的缓存都不受影响
+            return
+        self._invalidate_authentication()
+        self._login_generation += 1
         if self._on_session_expired is not None:
             self._on_session_expired(error.reason)
 
@@ -277,18 +468,28 @@ class AsyncJWSSession:
             await asyncio.sleep(delay)
 
     @staticmethod
-    async def _sleep_request_retry(attempt: int, policy: RetryPolicy) -> None:
+    async def _sleep_request_retry(
+        attempt: int,
+        policy: RetryPolicy,
+        retry_after: float | None = None,
+    ) -> None:
         delay = min(
             policy.max_sleep,
             policy.base_sleep * (2 ** (attempt - 1)),
         )
         if policy.jitter:
             delay += _RANDOM.uniform(0, policy.jitter)
+        if retry_after is not None:
+            # 服务器明确要求的等待时间优先于本地退避策略
+            delay = max(delay, retry_after)
         if delay:
             await asyncio.sleep(delay)
 
-    async def _load_login_token(self) -> str:
-        session = self._require_session()
+    async def _load_login_token(
+        self,
+        session: aiohttp.ClientSession | None = None,
+    ) -> str:
+        session = session or self._require_session()
         async with session.get(
             self.login_page,
             allow_redirects=True,
@@ -304,8 +505,11 @@ class AsyncJWSSession:
                 )
         return self._extract_token(html)
 
-    async def _fetch_captcha_image(self) -> bytes:
-        session = self._require_session()
+    async def _download_captcha_image(
+        self,
+        session: aiohttp.ClientSession | None = None,
+    ) -> bytes:
+        session = session or self._require_session()
         async with session.get(
             self.captcha_url,
             allow_redirects=True,
@@ -324,19 +528,28 @@ class AsyncJWSSession:
         if not content_type.startswith("image/"):
             msg = "captcha endpoint did not return an image"
             raise AuthError(msg)
-        if not await asyncio.to_thread(verify_image_bytes, image_bytes):
-            msg = "captcha endpoint returned invalid image data"
-            raise AuthError(msg)
         return image_bytes
 
+    async def _solve_captcha(
+        self,
+        session: aiohttp.ClientSession | None = None,
+    ) -> CaptchaReading:
+        """下载验证码后立即识别"""
+        return await self._read_captcha(await self._download_captcha_image(session))
+
+    def _has_server_session(self) -> bool:
+        # 会话只访问教务系统，Cookie Jar 中有未过期的 Cookie 即已建立服务器会话
+        return len(self._require_session().cookie_jar) > 0
+
     async def _submit_login(
         self,
         username: str,
         password: str,
         token: str,
         captcha: str,
+        session: aiohttp.ClientSession | None = None,
     ) -> None:
-        session = self._require_session()
+        session = session or self._require_session()
         form = {
             "tokenValue": token,
             "j_username": username,
@@ -372,6 +585,14 @@ class AsyncJWSSession:
 
     async def is_logged_in(self) -> bool:
         """请求首页并判断服务器端会话是否仍然有效"""
+        logged_in = await self._probe_login()
+        if logged_in:
+            self._mark_authenticated()
+        else:
+            self._invalidate_authentication()
+        return logged_in
+
+    async def _probe_login(self) -> bool:
         session = self._require_session()
         async with session.get(
             self.index_url,
@@ -415,26 +636,220 @@ class AsyncJWSSession:
                 )
         return False
 
-    async def _login_once(self, username: str, password: str) -> None:
-        token = await self._load_login_token()
-        image_bytes = await self._fetch_captcha_image()
-        captcha = await self.parse_captcha(image_bytes)
-        if CAPTCHA_RE.fullmatch(captcha) is None:
-            msg = "captcha solver did not return four ASCII letters or digits"
-            raise AuthError(msg)
+    async def _touch_connection(self) -> float:
+        session = self._require_session()
+        started = time.perf_counter()
+        async with session.head(self.index_url, allow_redirects=False) as response:
+            await response.read()
+        return time.perf_counter() - started
 
-        await self._submit_login(username, password, token, captcha)
+    async def _touch_connections(self, size: int) -> list[float | BaseException]:
+        return await asyncio.gather(
+            *(self._touch_connection() for _ in range(size)),
+            return_exceptions=True,
+        )
+
+    async def warm_up(self, connections: int) -> WarmupReport:
+        """预先建立并验证可复用的长连接，使首批请求直接使用已握手的连接
+
+        第一轮并发请求打开连接，第二轮并发请求确认这些连接都能被复用。
+        """
+        size = max(1, min(connections, self.options.connector_limit))
+        opened_before = self._connections_opened
+        started = time.perf_counter()
+        opening = await self._touch_connections(size)
+        reused_before = self._connections_reused
+        reusing = await self._touch_connections(size)
+        elapsed = time.perf_counter() - started
+
+        failures = [
+            item for item in (*opening, *reusing) if isinstance(item, BaseException)
+        ]
+        for failure in failures:
+            if not isinstance(failure, aiohttp.ClientError | asyncio.TimeoutError):
+                raise failure
+        return WarmupReport(
+            requested=size,
+            opened=self._connections_opened - opened_before,
+            reused=self._connections_reused - reused_before,
+            failed=len(failures),
+            open_latency=_median_latency(opening),
+            reuse_latency=_median_latency(reusing),
+            elapsed=elapsed,
+        )
+
+    async def sample_server_date(self) -> ServerDateSample:
+        """发送一次轻量请求，记录本地往返时间与服务器 Date 响应头"""
+        session = self._require_session()
+        sent_at = time.time()
+        async with session.head(self.index_url, allow_redirects=False) as response:
+            await response.read()
+            received_at = time.time()
+            date_header = response.headers.get("Date")
+        if date_header is None:
+            msg = "server response did not include a Date header"
+            raise ServiceError(msg)
+        try:
+            server_time = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError) as exc:
+            msg = f"server returned an invalid Date header: {date_header!r}"
+            raise ServiceError(msg) from exc
+        return ServerDateSample(
+            sent_at=sent_at,
+            received_at=received_at,
+            server_time=server_time,
+        )
+
+    async def _login_once(
+        self,
+        username: str,
+        password: str,
+        prefetched: asyncio.Task[CaptchaReading] | None = None,
+    ) -> None:
+        """登录一次；验证码与登录页 token 并发获取
+
+        服务器会话尚未建立时，并发请求会各自得到新的会话，验证码必须在登录页
+        建立会话之后再获取。
+        """
+        with self._login_scope():
+            captcha_task = prefetched
+            if captcha_task is None and self._has_server_session():
+                captcha_task = asyncio.create_task(self._solve_captcha())
+            try:
+                token = await self._load_login_token()
+                if captcha_task is None:
+                    captcha_task = asyncio.create_task(self._solve_captcha())
+                reading = await captcha_task
+            finally:
+                if captcha_task is not None:
+                    _discard_task(captcha_task)
+            if not reading.confident and self.options.speculative_logins > 1:
+                await self._login_speculatively(username, password, token, reading)
+                return
+            if not reading.valid:
+                msg = "captcha solver did not return four ASCII letters or digits"
+                raise AuthError(msg)
+            await self._submit_candidate(username, password, token, reading.code)
+
+    async def _submit_candidate(
+        self,
+        username: str,
+        password: str,
+        token: str,
+        captcha: str,
+        lane: aiohttp.ClientSession | None = None,
+    ) -> None:
+        await self._submit_login(username, password, token, captcha, session=lane)
+        if lane is not None:
+            # 备用登录胜出，主会话改用它的服务器会话 Cookie
+            base_url = URL(self.base_url)
+            self._require_session().cookie_jar.update_cookies(
+                lane.cookie_jar.filter_cookies(base_url),
+                base_url,
+            )
         if not await self.is_logged_in():
             msg = "credentials or captcha were rejected"
             raise AuthError(msg)
 
+    async def _login_speculatively(
+        self,
+        username: str,
+        password: str,
+        token: str,
+        reading: CaptchaReading,
+    ) -> None:
+        """整图识别不可靠时，在独立的 Cookie 上下文中并行准备更多验证码
+
+        同一账号再次登录成功会让先前的服务器会话失效，因此提交仍逐个进行：
+        按准备完成的先后提交候选，第一个登录成功的胜出，其余全部丢弃。
+        """
+        lanes: list[aiohttp.ClientSession] = []
+        tasks = [
+            asyncio.create_task(self._prepare_login_lane(lanes))
+            for _ in range(self.options.speculative_logins - 1)
+        ]
+        log.info("验证码识别置信度低，并行准备 %d 个备用登录", len(tasks))
+        try:
+            last_error = await self._try_login_lane(
+                username,
+                password,
+                _LoginLane(session=None, token=token, reading=reading),
+            )
+            if last_error is None:
+                return
+            for pending in asyncio.as_completed(tasks):
+                last_error = await self._try_login_lane(username, password, pending)
+                if last_error is None:
+                    log.info("备用登录成功")
+                    return
+                log.debug("备用登录失败：%s", last_error)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.gather(*(lane.close() for lane in lanes))
+        msg = "all speculative login attempts were rejected"
+        raise AuthError(msg) from last_error
+
+    async def _try_login_lane(
+        self,
+        username: str,
+        password: str,
+        lane: _LoginLane | Awaitable[_LoginLane],
+    ) -> Exception | None:
+        try:
+            if not isinstance(lane, _LoginLane):
+                lane = await lane
+            if not lane.reading.valid:
+                msg = "captcha solver did not return four ASCII letters or digits"
+                return AuthError(msg)
+            await self._submit_candidate(
+                username,
+                password,
+                lane.token,
+                lane.reading.code,
+                lane.session,
+            )
+        except InvalidCredentialsError:
+            raise
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            AuthError,
+            OSError,
+            ServiceError,
+        ) as error:
+            return error
+        return None
+
+    async def _prepare_login_lane(
+        self,
+        lanes: list[aiohttp.ClientSession],
+    ) -> _LoginLane:
+        """在共享连接池、独立 Cookie 的会话中获取登录 token 与验证码"""
+        session = self._require_session()
+        lane = aiohttp.ClientSession(
+            connector=session.connector,
+            connector_owner=False,
+            # 备用会话只访问教务系统，允许服务器以 IP 地址访问时的 Cookie
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            headers=self.headers,
+            timeout=session.timeout,
+            raise_for_status=False,
+        )
+        lanes.append(lane)
+        token = await self._load_login_token(lane)
+        reading = await self._solve_captcha(lane)
+        return _LoginLane(session=lane, token=token, reading=reading)
+
     async def _try_login_once(
         self,
         username: str,
         password: str,
+        prefetched: asyncio.Task[CaptchaReading] | None = None,
     ) -> Exception | None:
         try:
-            await self._login_once(username, password)
+            await self._login_once(username, password, prefetched)
         except (
             aiohttp.ClientError,
             asyncio.TimeoutError,
@@ -447,19 +862,66 @@ class AsyncJWSSession:
         return None
 
     async def login(self, username: str, password: str) -> None:
-        """登录教务系统"""
+        """登录教务系统；已有或已保存的会话仍有效时直接复用"""
         self._require_session()
         if not username or not password:
             msg = "username and password cannot be empty"
             raise AuthError(msg)
 
         async with self._login_lock:
-            if self._credentials == (username, password) and await self.is_logged_in():
+            if await self.resume(username, password):
                 return
             await self._login_until_success(username, password)
 
+    async def resume(self, username: str, password: str) -> bool:
+        """复用 Cookie Jar 中或会话存储里的服务器会话，只发送一次首页请求校验
+
+        会话有效时记住账号密码以便过期后重新登录；无效时清空 Cookie，
+        避免随后的登录把验证码请求发到已失效的服务器会话上。
+        """
+        session = self._require_session()
+        if self._credentials not in (None, (username, password)):
+            return False
+        if self._credentials is not None and self._is_authentication_cached():
+            return True
+        if (
+            self._credentials is None
+            and self._session_store is not None
+            and not self._has_server_session()
+        ):
+            restored = self._session_store.restore(
+                session.cookie_jar,
+                base_url=self.base_url,
+                username=username,
+            )
+            if restored:
+                log.info("已从本地恢复 %d 个会话 Cookie", restored)
+        if not self._has_server_session():
+            return False
+        if await self.is_logged_in():
+            if self._credentials is None:
+                log.info("登录会话仍然有效，跳过登录")
+            self._credentials = (username, password)
+            return True
+        session.cookie_jar.clear()
+        return False
+
+    def _save_session(self, cookie_jar: AbstractCookieJar) -> None:
+        store = self._session_store
+        if store is None or self._credentials is None:
+            return
+        try:
+            store.save(
+                cookie_jar,
+                base_url=self.base_url,
+                username=self._credentials[0],
+            )
+        except OSError as error:
+            log.warning("保存登录会话失败：%s", error)
+
     async def _login_until_success(self, username: str, password: str) -> None:
         last_error: Exception | None = None
+        prefetched: asyncio.Task[CaptchaReading] | None = None
         attempt = 1
         while (
             self.options.login_attempts == 0 or attempt <= self.options.login_attempts
@@ -472,9 +934,11 @@ class AsyncJWSSession:
                 )
             )
             log.info("第 %d/%s 次尝试登录", attempt, max_attempts)
-            last_error = await self._try_login_once(username, password)
+            last_error = await self._try_login_once(username, password, prefetched)
+            prefetched = None
             if last_error is None:
                 self._credentials = (username, password)
+                self._login_generation += 1
                 log.info("登录成功")
                 return
             if isinstance(last_error, InvalidCredentialsError):
@@ -486,7 +950,13 @@ class AsyncJWSSession:
                 self.options.login_attempts == 0
                 or attempt < self.options.login_attempts
             ):
-                await self._sleep_login_retry()
+                # 上一张验证码已作废，等待重试期间就开始下载并识别下一张
+                prefetched = asyncio.create_task(self._solve_captcha())
+                try:
+                    await self._sleep_login_retry()
+                except BaseException:
+                    _discard_task(prefetched)
+                    raise
             attempt += 1
 
         msg = f"login failed after {self.options.login_attempts} attempts"
@@ -505,19 +975,49 @@ class AsyncJWSSession:
                 self._on_reauthenticated()
 
     async def _ensure_login(self) -> None:
-        if await self.is_logged_in():
+        if self._is_authentication_cached():
             return
+        async with self._validation_lock:
+            if self._is_authentication_cached():
+                return
+            if await self.is_logged_in():
+                return
         log.info("会话已过期，正在重新登录")
         await self._restore_login()
 
+    async def _keep_session_alive(self) -> None:
+        """定期用一次首页请求保持服务器会话；期间有其他成功响应时顺延"""
+        interval = self.options.session_keepalive_interval
+        while True:
+            age = self.authenticated_age
+            if age is not None and age < interval:
+                await asyncio.sleep(interval - age)
+                continue
+            if self._has_server_session():
+                try:
+                    if not await self.is_logged_in() and self._credentials is not None:
+                        log.info("保活检测到会话已过期，正在重新登录")
+                        await self._restore_login()
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    AuthError,
+                    ServiceError,
+                    SessionExpiredError,
+                ) as error:
+                    log.warning("会话保活失败：%s", error)
+            await asyncio.sleep(interval)
+
     async def parse_captcha(self, image_bytes: bytes) -> str:
-        """在线程池中执行验证码识别"""
-        solver = self._captcha_solver
+        """在线程池中一次完成图片解码校验与验证码识别"""
+        return (await self._read_captcha(image_bytes)).code
+
+    async def _read_captcha(self, image_bytes: bytes) -> CaptchaReading:
+        solver: CaptchaRecognizer | CaptchaSolver | None = self._captcha_solver
         if solver is None:
-            if self._captcha_recognizer is None:
-                self._captcha_recognizer = CaptchaRecognizer()
-            solver = self._captcha_recognizer
-        return await asyncio.to_thread(solver, image_bytes)
+            # 所有会话共用进程内只加载一次的模型
+            solver = await CAPTCHA_RECOGNIZERS.aget()
+        return await asyncio.to_thread(_decode_and_solve, image_bytes, solver)
 
     async def _perform_request_once(
         self,
@@ -535,11 +1035,13 @@ class AsyncJWSSession:
             allow_redirects=spec.allow_redirects,
             max_redirects=self.options.max_redirects,
         ) as response:
-            text = await response.text(errors="ignore")
             response_url = str(response.url)
             redirect_locations = tuple(
                 item.headers.get("Location", "") for item in response.history
             )
+            decoder_state = _incremental_decoder(response)
+            # 登录页和认证错误页都很短，只需检查响应开头，不必扫描整个大响应
+            head = await _read_head(response, decoder_state)
             authentication_failure = classify_authentication_failure(
                 status=response.status,
                 response_url=response_url,
@@ -547,23 +1049,23 @@ class AsyncJWSSession:
                     response.headers.get("Location", ""),
                     *redirect_locations,
                 ),
-                text=text,
+                text=head,
             )
             if authentication_failure is not None:
                 error = self._authentication_error(
                     authentication_failure,
                     response_url,
                     *redirect_locations,
-                    text,
+                    head,
                 )
                 self._notify_session_expired(error)
                 raise error
-            if self.check_login_page(text):
+            if self.check_login_page(head):
                 error = self._authentication_error(
                     AuthenticationFailure.LOGIN_REDIRECT,
                     response_url,
                     *redirect_locations,
-                    text,
+                    head,
                 )
                 self._notify_session_expired(error)
                 raise error
@@ -573,10 +1075,22 @@ class AsyncJWSSession:
                     msg,
                     status=response.status,
                     retryable=True,
+                    retry_after=_parse_retry_after(
+                        response.headers.get("Retry-After"),
+                    ),
                 )
             if response.status >= 400:  # noqa: PLR2004
                 msg = f"service returned status {response.status}"
                 raise ServiceError(msg, status=response.status)
+            tail = [
+                decoder_state.decode(chunk)
+                async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE)
+            ]
+            tail.append(decoder_state.decode(b"", final=True))
+            text = "".join((head, *tail))
+            # 已登录会话的受保护页面正常返回，即可证明服务器端会话仍然有效
+            if self._proves_authentication():
+                self._mark_authenticated()
             return decoder(text)
 
     async def _capture_request_attempt(
@@ -608,7 +1122,7 @@ class AsyncJWSSession:
         policy: RetryPolicy,
     ) -> _T:
         is_idempotent = spec.method in IDEMPOTENT_METHODS
-        if not is_idempotent:
+        if not is_idempotent and not self.optimistic_auth_enabled:
             await self._ensure_login()
 
         max_attempts = policy.max_retry if is_idempotent else 1
@@ -621,9 +1135,18 @@ class AsyncJWSSession:
 
             error = result.error
             if isinstance(error, SessionExpiredError):
-                if reauthenticated:
+                if reauthenticated or (
+                    isinstance(error, CsrfTokenExpiredError)
+                    and self.caller_managed_tokens_enabled
+                ):
                     raise error
                 log.info("认证中间件检测到 %s, 正在重新登录", error.reason.value)
+                if (
+                    isinstance(error, CsrfTokenExpiredError)
+                    and self._on_session_expired is not None
+                ):
+                    # 只有确实因 token 失效重新登录时才通知界面
+                    self._on_session_expired(error.reason)
                 await self._restore_login(
                     force=error.reason is AuthenticationFailure.CSRF_TOKEN_EXPIRED,
                 )
@@ -639,7 +1162,11 @@ class AsyncJWSSession:
                 max_attempts,
                 error,
             )
-            await self._sleep_request_retry(attempt, policy)
+            await self._sleep_request_retry(
+                attempt,
+                policy,
+                error.retry_after if isinstance(error, ServiceError) else None,
+            )
             attempt += 1
 
         msg = "request retry loop ended unexpectedly"
@@ -652,8 +1179,8 @@ class AsyncJWSSession:
     @staticmethod
     def _decode_json_object(text: str) -> dict[str, Any]:
         try:
-            value = json_module.loads(text)
-        except json_module.JSONDecodeError as error:
+            value = json_backend.loads(text)
+        except json_backend.JSONDecodeError as error:
             preview = text[:200].replace("\n", " ").replace("\r", " ")
             msg = f"response is not valid JSON: {preview}"
             raise ServiceError(msg, retryable=True) from error
@@ -738,3 +1265,77 @@ class AsyncJWSSession:
             self._decode_json_object,
             retry or self.retry,
         )
+
+
+def _incremental_decoder(
+    response: aiohttp.ClientResponse,
+) -> codecs.IncrementalDecoder:
+    try:
+        encoding = response.get_encoding()
+        return codecs.getincrementaldecoder(encoding)(errors="ignore")
+    except (LookupError, RuntimeError):
+        return codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+
+async def _read_head(
+    response: aiohttp.ClientResponse,
+    decoder: codecs.IncrementalDecoder,
+) -> str:
+    """边读边解码，直到读到 AUTH_SNIFF_CHARS 个字符或响应结束
+
+    多字节字符跨分块时由增量解码器拼接，原始字节读完即丢弃，不保留整块缓冲。
+    """
+    pieces: list[str] = []
+    decoded = 0
+    while decoded < AUTH_SNIFF_CHARS:
+        chunk = await response.content.read(RESPONSE_CHUNK_SIZE)
+        if not chunk:
+            break
+        piece = decoder.decode(chunk)
+        pieces.append(piece)
+        decoded += len(piece)
+    return "".join(pieces)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After 头，支持秒数和 HTTP 日期两种格式"""
+    if value is None or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - time.time())
+
+
+def _decode_and_solve(
+    image_bytes: bytes,
+    solver: CaptchaRecognizer | CaptchaSolver,
+) -> CaptchaReading:
+    try:
+        frames = decode_captcha_frames(image_bytes)
+    except ValueError as error:
+        msg = "captcha endpoint returned invalid image data"
+        raise AuthError(msg) from error
+    if isinstance(solver, CaptchaRecognizer):
+        return solver.read_frames(frames)
+    # 自定义识别器只接收原始字节，这里的解码仅用于校验；其结果合法即视为可靠
+    code = solver(image_bytes)
+    return CaptchaReading(code, confident=CAPTCHA_RE.fullmatch(code) is not None)
+
+
+def _discard_task(task: asyncio.Task[Any]) -> None:
+    """取消不再需要的任务，并取走已结束任务的异常，避免未处理异常告警"""
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
+def _median_latency(results: list[float | BaseException]) -> float:
+    latencies = [item for item in results if isinstance(item, float)]
+    return statistics.median(latencies) if latencies else 0.0
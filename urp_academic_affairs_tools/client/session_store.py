@@ -0,0 +1,165 @@
+"""登录会话 Cookie 的本地存储
+
+程序退出时把教务系统的 Cookie 连同过期时间保存为 JSON，下次启动时恢复到
+Cookie Jar 中，再用一次首页请求校验服务器端会话是否仍然有效。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from http.cookies import CookieError, SimpleCookie
+from typing import TYPE_CHECKING, Any
+
+from yarl import URL
+
+if TYPE_CHECKING:
+    from http.cookies import Morsel
+    from pathlib import Path
+
+    from aiohttp.abc import AbstractCookieJar
+
+log = logging.getLogger(__name__)
+SESSION_STORE_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class SessionStore:
+    """按账号和教务系统地址保存一份 Cookie
+
+    ``max_age`` 为保存后仍尝试恢复的最长秒数，超过后直接丢弃，
+    省去一次注定失败的校验请求；为 None 时只看 Cookie 自身的过期时间。
+    """
+
+    path: Path
+    max_age: float | None = 12 * 60 * 60
+
+    def save(
+        self,
+        cookie_jar: AbstractCookieJar,
+        *,
+        base_url: str,
+        username: str,
+    ) -> int:
+        """保存会发送给 ``base_url`` 的 Cookie，返回保存的数量"""
+        url = URL(base_url)
+        expirations = {
+            morsel.key: _morsel_expiry(morsel)
+            for morsel in cookie_jar
+            if _matches(morsel, url)
+        }
+        cookies = [
+            {
+                "name": name,
+                "value": morsel.value,
+                "expires": expirations.get(name),
+            }
+            for name, morsel in cookie_jar.filter_cookies(url).items()
+        ]
+        if not cookies:
+            self.clear()
+            return 0
+        payload = {
+            "version": SESSION_STORE_VERSION,
+            "base_url": base_url,
+            "username": username,
+            "saved_at": time.time(),
+            "cookies": cookies,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        # Cookie 等同于登录凭据，只允许当前用户读写
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(payload, file, ensure_ascii=False)
+        temporary.replace(self.path)
+        log.debug("已保存 %d 个会话 Cookie 到 %s", len(cookies), self.path)
+        return len(cookies)
+
+    def restore(
+        self,
+        cookie_jar: AbstractCookieJar,
+        *,
+        base_url: str,
+        username: str,
+    ) -> int:
+        """把属于同一账号和地址、尚未过期的 Cookie 放回 Cookie Jar，返回恢复的数量"""
+        payload = self._read()
+        if payload is None:
+            return 0
+        now = time.time()
+        if payload.get("base_url") != base_url or payload.get("username") != username:
+            log.debug("会话存储属于其他账号或地址，忽略")
+            return 0
+        saved_at = payload.get("saved_at")
+        if not isinstance(saved_at, int | float) or (
+            self.max_age is not None and now - saved_at > self.max_age
+        ):
+            log.debug("会话存储已超过 %s 秒，忽略", self.max_age)
+            return 0
+
+        try:
+            cookies = _unexpired_cookies(payload.get("cookies", []), now)
+        except (CookieError, KeyError, TypeError, ValueError) as error:
+            log.warning("会话存储 %s 中的 Cookie 无效：%s", self.path, error)
+            return 0
+        if cookies:
+            cookie_jar.update_cookies(cookies, URL(base_url))
+        return len(cookies)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def _read(self) -> dict[str, Any] | None:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            log.warning("会话存储 %s 无法读取：%s", self.path, error)
+            return None
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != SESSION_STORE_VERSION
+        ):
+            log.warning("会话存储 %s 格式不受支持，忽略", self.path)
+            return None
+        return payload
+
+
+def _unexpired_cookies(items: list[dict[str, Any]], now: float) -> SimpleCookie:
+    cookies: SimpleCookie = SimpleCookie()
+    for item in items:
+        expires = item.get("expires")
+        if expires is not None and expires <= now:
+            continue
+        name = item["name"]
+        cookies[name] = item["value"]
+        if expires is not None:
+            cookies[name]["expires"] = formatdate(expires, usegmt=True)
+    return cookies
+
+
+def _matches(morsel: Morsel[str], url: URL) -> bool:
+    domain = morsel["domain"]
+    return (
+        not domain
+        or url.raw_host == domain
+        or (url.raw_host or "").endswith(
+            f".{domain.lstrip('.')}",
+        )
+    )
+
+
+def _morsel_expiry(morsel: Morsel[str]) -> float | None:
+    expires = morsel["expires"]
+    if not expires:
+        return None
+    try:
+        return parsedate_to_datetime(expires).timestamp()
+    except (TypeError, ValueError):
+        return None
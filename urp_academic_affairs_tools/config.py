@@ -12,6 +12,7 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_ENV_FILE = PROJECT_ROOT / ".env"
 ENV_KEY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 MIN_QUOTED_VALUE_LENGTH = 2
+CAPTCHA_WORKER_RE = re.compile(r"^\S+:\d{1,5}$")
 
 
 @dataclass(frozen=True, slots=True)
@@ -29,6 +30,14 @@ class Settings:
     course_snatching_attempts: int = 0
     course_snatching_concurrency: int = 10
     course_snatching_retry_interval: float = 0.2
+    course_snatching_adaptive: bool = False
+    course_snatching_min_concurrency: int = 1
+    course_snatching_max_concurrency: int | None = None
+    captcha_worker: str | None = None
+    speculative_logins: int = 1
+    session_file: Path | None = None
+    session_keepalive_interval: float = 0.0
+    course_refresh_interval: float = 5.0
 
     def __post_init__(self) -> None:
         if not self.base_url.startswith(("http://", "https://")):
@@ -49,6 +58,26 @@ class Settings:
         if self.evaluation_concurrency < 1:
             msg = "URP_EVALUATION_CONCURRENCY 必须大于等于 1"
             raise ValueError(msg)
+        self._validate_course_snatching()
+        if self.captcha_worker is not None and (
+            CAPTCHA_WORKER_RE.fullmatch(self.captcha_worker) is None
+        ):
+            msg = "URP_CAPTCHA_WORKER 必须是 host:port 形式"
+            raise ValueError(msg)
+        if self.speculative_logins < 1:
+            msg = "URP_SPECULATIVE_LOGINS 必须大于等于 1"
+            raise ValueError(msg)
+        self._validate_intervals()
+
+    def _validate_intervals(self) -> None:
+        if self.session_keepalive_interval < 0:
+            msg = "URP_SESSION_KEEPALIVE_INTERVAL 不能为负数"
+            raise ValueError(msg)
+        if self.course_refresh_interval <= 0:
+            msg = "URP_COURSE_REFRESH_INTERVAL 必须大于 0"
+            raise ValueError(msg)
+
+    def _validate_course_snatching(self) -> None:
         if self.course_snatching_attempts < 0:
             msg = "URP_COURSE_SNATCHING_ATTEMPTS 不能为负数"
             raise ValueError(msg)
@@ -58,6 +87,19 @@ class Settings:
         if self.course_snatching_retry_interval < 0:
             msg = "URP_COURSE_SNATCHING_RETRY_INTERVAL 不能为负数"
             raise ValueError(msg)
+        if self.course_snatching_min_concurrency < 1:
+            msg = "URP_COURSE_SNATCHING_MIN_CONCURRENCY 必须大于等于 1"
+            raise ValueError(msg)
+        if (
+            self.course_snatching_max_concurrency is not None
+            and self.course_snatching_max_concurrency
+            < self.course_snatching_min_concurrency
+        ):
+            msg = (
+                "URP_COURSE_SNATCHING_MAX_CONCURRENCY 不能小于 "
+                "URP_COURSE_SNATCHING_MIN_CONCURRENCY"
+            )
+            raise ValueError(msg)
 
     def require_credentials(self) -> tuple[str, str]:
         """返回账号密码；缺失时给出可操作的错误信息"""
@@ -129,6 +171,18 @@ def _parse_nonnegative_int(value: str | None, *, name: str) -> int:
     return parsed
 
 
+def _parse_bool(value: str | None, *, name: str, default: bool = False) -> bool:
+    if value is None or value.strip() == "":
+        return default
+    normalized = value.strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    msg = f"{name} 必须是 true 或 false"
+    raise ValueError(msg)
+
+
 def load_settings(
     env: Mapping[str, str] | None = None,
     *,
@@ -170,6 +224,34 @@ def load_settings(
     course_snatching_retry_interval = float(
         values.get("URP_COURSE_SNATCHING_RETRY_INTERVAL", "0.2"),
     )
+    course_snatching_adaptive = _parse_bool(
+        values.get("URP_COURSE_SNATCHING_ADAPTIVE"),
+        name="URP_COURSE_SNATCHING_ADAPTIVE",
+    )
+    course_snatching_min_concurrency = _parse_optional_positive_int(
+        values.get("URP_COURSE_SNATCHING_MIN_CONCURRENCY"),
+        name="URP_COURSE_SNATCHING_MIN_CONCURRENCY",
+    )
+    course_snatching_max_concurrency = _parse_optional_positive_int(
+        values.get("URP_COURSE_SNATCHING_MAX_CONCURRENCY"),
+        name="URP_COURSE_SNATCHING_MAX_CONCURRENCY",
+    )
+    captcha_worker = values.get("URP_CAPTCHA_WORKER", "").strip() or None
+    # Cookie 等同登录凭据，只在显式设置时保存；相对路径以项目根目录为准
+    session_file = values.get("URP_SESSION_FILE", "").strip()
+    session_path = (
+        PROJECT_ROOT / Path(session_file).expanduser() if session_file else None
+    )
+    session_keepalive_interval = float(
+        values.get("URP_SESSION_KEEPALIVE_INTERVAL", "0") or "0",
+    )
+    course_refresh_interval = float(
+        values.get("URP_COURSE_REFRESH_INTERVAL", "5") or "5",
+    )
+    speculative_logins = _parse_optional_positive_int(
+        values.get("URP_SPECULATIVE_LOGINS"),
+        name="URP_SPECULATIVE_LOGINS",
+    )
 
     return Settings(
         base_url=base_url,
@@ -183,4 +265,12 @@ def load_settings(
         course_snatching_attempts=course_snatching_attempts,
         course_snatching_concurrency=course_snatching_concurrency or 10,
         course_snatching_retry_interval=course_snatching_retry_interval,
+        course_snatching_adaptive=course_snatching_adaptive,
+        course_snatching_min_concurrency=course_snatching_min_concurrency or 1,
+        course_snatching_max_concurrency=course_snatching_max_concurrency,
+        captcha_worker=captcha_worker,
+        speculative_logins=speculative_logins or 1,
+        session_file=session_path,
+        session_keepalive_interval=session_keepalive_interval,
+        course_refresh_interval=course_refresh_interval,
     )
@@ -1,4 +1,7 @@
+from .concurrency import AdaptiveConcurrencyController, ConcurrencyWindow
 from .course_selection import (
+    CandidateIndex,
+    ContextLoadTimings,
     CourseSelectionCandidate,
     CourseSelectionClient,
     COURSE_SELECTION_CLOSED_MESSAGE,
@@ -6,22 +9,33 @@ from .course_selection import (
     CourseSelectionOptions,
     CourseSelectionQuery,
     CourseSelectionSubmitResult,
+    CourseSnatchOutcome,
     CourseSnatchingOptions,
+    CourseListDiff,
     CourseSelectLink,
     CourseSelectPageInfo,
     QuitCourseCandidate,
+    SelectionContext,
     build_course_selection_form,
     extract_course_select_token,
+    diff_course_candidates,
     handle_course_drop,
     handle_course_selection,
     parse_course_candidates,
     parse_course_select_page,
     parse_selected_courses,
+    parse_start_time,
     filter_course_candidates,
 )
+from .tokens import TokenManager, TokenMetrics, is_token_rejection
 
 __all__ = [
     "COURSE_SELECTION_CLOSED_MESSAGE",
+    "AdaptiveConcurrencyController",
+    "CandidateIndex",
+    "ConcurrencyWindow",
+    "ContextLoadTimings",
+    "CourseListDiff",
     "CourseSelectLink",
     "CourseSelectPageInfo",
     "CourseSelectionCandidate",
@@ -30,14 +44,21 @@ __all__ = [
     "CourseSelectionOptions",
     "CourseSelectionQuery",
     "CourseSelectionSubmitResult",
+    "CourseSnatchOutcome",
     "CourseSnatchingOptions",
     "QuitCourseCandidate",
+    "SelectionContext",
+    "TokenManager",
+    "TokenMetrics",
     "build_course_selection_form",
+    "diff_course_candidates",
     "extract_course_select_token",
     "filter_course_candidates",
     "handle_course_drop",
     "handle_course_selection",
+    "is_token_rejection",
     "parse_course_candidates",
     "parse_course_select_page",
     "parse_selected_courses",
+    "parse_start_time",
 ]
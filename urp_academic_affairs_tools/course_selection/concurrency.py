@@ -0,0 +1,177 @@
+"""抢课提交的自适应并发控制"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import statistics
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+MAX_RECORDED_WINDOWS = 256
+
+
+@dataclass(frozen=True, slots=True)
+class ConcurrencyWindow:
+    """一个统计窗口内的观测结果与控制器的决定"""
+
+    index: int
+    limit: int
+    next_limit: int
+    requests: int
+    errors: int
+    throttled: int
+    median_latency: float
+    baseline_latency: float
+    retry_after: float | None
+    decision: str
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class AdaptiveConcurrencyController:
+    """AIMD 并发控制：健康窗口加一，出现限流、错误或延迟膨胀时按比例减少
+
+    每完成 ``limit`` 个请求结算一个窗口，相当于每轮往返调整一次。
+    收到 ``Retry-After`` 时暂停发出新请求，直到服务器要求的时间过去。
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        minimum: int,
+        maximum: int,
+        initial: int | None = None,
+        error_threshold: float = 0.2,
+        latency_tolerance: float = 2.0,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        if minimum < 1 or maximum < minimum:
+            msg = "concurrency bounds must satisfy 1 <= minimum <= maximum"
+            raise ValueError(msg)
+        if not 0 < decrease_factor < 1:
+            msg = "decrease_factor must be between 0 and 1"
+            raise ValueError(msg)
+        if latency_tolerance <= 1:
+            msg = "latency_tolerance must be greater than 1"
+            raise ValueError(msg)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.error_threshold = error_threshold
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.windows: deque[ConcurrencyWindow] = deque(maxlen=MAX_RECORDED_WINDOWS)
+        self._limit = min(maximum, max(minimum, initial or minimum))
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._paused_until = 0.0
+        self._baseline_latency: float | None = None
+        self._window_index = 0
+        self._reset_window()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _reset_window(self) -> None:
+        self._latencies: list[float] = []
+        self._errors = 0
+        self._throttled = 0
+        self._retry_after: float | None = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """占用一个并发名额；名额已满或处于 Retry-After 暂停期时等待"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+        try:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    async def record(
+        self,
+        latency: float,
+        *,
+        error: bool = False,
+        throttled: bool = False,
+        retry_after: float | None = None,
+    ) -> ConcurrencyWindow | None:
+        """记录一次请求结果，窗口结束时返回该窗口的统计"""
+        self._latencies.append(latency)
+        if error or throttled:
+            self._errors += 1
+        if throttled:
+            self._throttled += 1
+        if retry_after is not None:
+            self._paused_until = max(
+                self._paused_until,
+                time.monotonic() + retry_after,
+            )
+            self._retry_after = max(self._retry_after or 0.0, retry_after)
+        if len(self._latencies) < self._limit:
+            return None
+        window = self._close_window()
+        async with self._condition:
+            self._condition.notify_all()
+        return window
+
+    def _close_window(self) -> ConcurrencyWindow:
+        requests = len(self._latencies)
+        median_latency = statistics.median(self._latencies)
+        baseline = self._baseline_latency or median_latency
+        error_rate = self._errors / requests
+        congested = median_latency > baseline * self.latency_tolerance
+        if self._throttled or error_rate > self.error_threshold or congested:
+            next_limit = max(
+                self.minimum,
+                math.floor(self._limit * self.decrease_factor),
+            )
+            decision = "decrease"
+        elif self._limit < self.maximum:
+            next_limit = self._limit + 1
+            decision = "increase"
+        else:
+            next_limit = self._limit
+            decision = "hold"
+        if not self._errors:
+            # 基线取无错误窗口的最低延迟，并缓慢跟随网络环境变化
+            self._baseline_latency = min(
+                median_latency,
+                baseline * 0.9 + median_latency * 0.1,
+            )
+        self._window_index += 1
+        window = ConcurrencyWindow(
+            index=self._window_index,
+            limit=self._limit,
+            next_limit=next_limit,
+            requests=requests,
+            errors=self._errors,
+            throttled=self._throttled,
+            median_latency=median_latency,
+            baseline_latency=baseline,
+            retry_after=self._retry_after,
+            decision=decision,
+        )
+        self.windows.append(window)
+        self._limit = next_limit
+        self._reset_window()
+        return window
@@ -3,21 +3,33 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import contextlib
+import hashlib
 import json
 import logging
 import re
 import sys
+import time
 import unicodedata
-from collections.abc import Mapping, Sequence
-from dataclasses import dataclass
+import weakref
+from collections.abc import Collection, Iterable, Iterator, Mapping, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from datetime import datetime
 from html import unescape
 from html.parser import HTMLParser
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
 from urllib.parse import parse_qs, urlparse
 
 import aioconsole
+import aiohttp
 
-from urp_academic_affairs_tools.client import ServiceError
+from urp_academic_affairs_tools.client import (
+    CsrfTokenExpiredError,
+    ServiceError,
+    measure_server_clock,
+)
 from urp_academic_affairs_tools.client.api import (
     delete_course_selection,
     fetch_course_select_index,
@@ -27,14 +39,29 @@ from urp_academic_affairs_tools.client.api import (
     get_this_semester_timetable,
     submit_course_selection,
 )
+from urp_academic_affairs_tools.client import json_backend
+from urp_academic_affairs_tools.client.clock import sleep_until
+
+from .concurrency import AdaptiveConcurrencyController, ConcurrencyWindow
+from .tokens import TokenManager, TokenMetrics, is_token_rejection
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
     from urp_academic_affairs_tools.client import AsyncJWSSession
     from urp_academic_affairs_tools.config import Settings
 
 log = logging.getLogger(__name__)
 CONFIRM_SUBMIT_PHRASE = "yes"
 COURSE_SELECTION_CLOSED_MESSAGE = "对不起，当前选课阶段已过截止时间！"
+SCHEDULED_WARMUP_LEAD = 3.0
+CONTEXT_TOKEN_REUSE_AGE = 30.0
+CLOCK_RESYNC_LEAD = 30.0
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+START_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%H:%M:%S", "%H:%M")
+COURSE_OBJECT_MARKERS = frozenset({'"courseNum"', '"courseName"'})
+_JSON_STRUCTURE_RE = re.compile(r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"|[{}]')
+_T = TypeVar("_T")
 
 
 @dataclass(frozen=True, slots=True)
@@ -61,14 +88,35 @@ class CourseSelectPageInfo:
 
 @dataclass(frozen=True, slots=True)
 class CourseSelectionCandidate:
-    """课程列表中的一个可选教学班"""
+    """课程列表中的一个可选教学班
+
+    解析时只取出展示和筛选用到的字段，不常驻服务端返回的整个对象；
+    需要原始数据时在解析处打开 ``keep_raw``，以紧凑的 JSON 字节保存，
+    访问 ``raw`` 时才重新解码。
+    """
 
     course_number: str
     sequence_number: str
     teaching_class_number: str
     course_name: str
     teacher_name: str = ""
-    raw: dict[str, Any] | None = None
+    plan_term: str = ""
+    credit: str = ""
+    category: str = ""
+    attribute: str = ""
+    remaining: str = ""
+    schedule: str = ""
+    location: str = ""
+    weekday: str = ""
+    start_session: str = ""
+    raw_json: bytes | None = field(default=None, compare=False, repr=False)
+
+    @property
+    def raw(self) -> dict[str, Any] | None:
+        if self.raw_json is None:
+            return None
+        data = json_backend.loads(self.raw_json)
+        return data if isinstance(data, dict) else None
 
     @property
     def selection_id(self) -> str:
@@ -86,6 +134,30 @@ class CourseSelectionCandidate:
         return f"{course_name}({self.course_code})"
 
 
+@dataclass(frozen=True, slots=True)
+class CourseListDiff:
+    """两次拉取的课程列表之间的变化，按 ``selection_id`` 对齐
+
+    ``changed`` 中每项为（旧候选项，新候选项），课余量变化也在其中。
+    """
+
+    added: tuple[CourseSelectionCandidate, ...] = ()
+    removed: tuple[CourseSelectionCandidate, ...] = ()
+    changed: tuple[tuple[CourseSelectionCandidate, CourseSelectionCandidate], ...] = ()
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    @property
+    def seat_changes(
+        self,
+    ) -> list[tuple[CourseSelectionCandidate, CourseSelectionCandidate]]:
+        return [
+            (old, new) for old, new in self.changed if old.remaining != new.remaining
+        ]
+
+
 @dataclass(frozen=True, slots=True)
 class QuitCourseCandidate:
     """已选课程中的一个可退课程"""
@@ -127,6 +199,8 @@ class CourseSelectionOptions:
     attempts: int = 3
     concurrency: int = 2
     retry_interval: float = 0.2
+    context_ttl: float = 300.0
+    keep_raw_courses: bool = False
 
     def __post_init__(self) -> None:
         if min(self.attempts, self.concurrency) < 1:
@@ -135,15 +209,30 @@ class CourseSelectionOptions:
         if self.retry_interval < 0:
             msg = "retry_interval cannot be negative"
             raise ValueError(msg)
+        if self.context_ttl < 0:
+            msg = "context_ttl cannot be negative"
+            raise ValueError(msg)
 
 
 @dataclass(frozen=True, slots=True)
 class CourseSnatchingOptions:
-    """持续抢课策略；``attempts=0`` 表示持续运行直到成功或手动停止"""
+    """持续抢课策略；``attempts=0`` 表示持续运行直到成功或手动停止
+
+    设置 ``start_at`` 后会先校准服务器时钟，并在该服务器时间发出首轮提交。
+    开启 ``adaptive`` 后 ``concurrency`` 作为初始并发，由控制器在
+    ``min_concurrency`` 与 ``max_concurrency``（默认等于 ``concurrency``）之间调整。
+    """
 
     attempts: int = 0
     concurrency: int = 10
     retry_interval: float = 0.2
+    start_at: datetime | None = None
+    clock_samples: int = 5
+    adaptive: bool = False
+    min_concurrency: int = 1
+    max_concurrency: int | None = None
+    token_max_age: float = 30.0
+    token_refresh_interval: float = 5.0
 
     def __post_init__(self) -> None:
         if self.attempts < 0 or self.concurrency < 1:
@@ -152,6 +241,50 @@ class CourseSnatchingOptions:
         if self.retry_interval < 0:
             msg = "retry_interval cannot be negative"
             raise ValueError(msg)
+        if self.start_at is not None and self.start_at.tzinfo is None:
+            msg = "start_at must be timezone-aware"
+            raise ValueError(msg)
+        if self.clock_samples < 1:
+            msg = "clock_samples must be at least 1"
+            raise ValueError(msg)
+        if self.min_concurrency < 1 or (
+            self.max_concurrency is not None
+            and self.max_concurrency < self.min_concurrency
+        ):
+            msg = "concurrency bounds must satisfy 1 <= min <= max"
+            raise ValueError(msg)
+        if self.token_max_age <= 0 or self.token_refresh_interval < 0:
+            msg = "token_max_age must be positive and refresh interval non-negative"
+            raise ValueError(msg)
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings | None,
+        *,
+        start_at: datetime | None = None,
+    ) -> CourseSnatchingOptions:
+        if settings is None:
+            return cls(start_at=start_at)
+        return cls(
+            attempts=settings.course_snatching_attempts,
+            concurrency=settings.course_snatching_concurrency,
+            retry_interval=settings.course_snatching_retry_interval,
+            start_at=start_at,
+            adaptive=settings.course_snatching_adaptive,
+            min_concurrency=settings.course_snatching_min_concurrency,
+            max_concurrency=settings.course_snatching_max_concurrency,
+        )
+
+    def build_controller(self) -> AdaptiveConcurrencyController | None:
+        if not self.adaptive:
+            return None
+        maximum = max(self.max_concurrency or self.concurrency, self.min_concurrency)
+        return AdaptiveConcurrencyController(
+            minimum=self.min_concurrency,
+            maximum=maximum,
+            initial=self.concurrency,
+        )
 
 
 @dataclass(frozen=True, slots=True)
@@ -164,6 +297,66 @@ class CourseSelectionQuery:
     program_plan_number: str
 
 
+@dataclass(frozen=True, slots=True)
+class ContextLoadTimings:
+    """选课上下文各请求的耗时（秒）；选课首页与选课结果链路并发执行"""
+
+    index: float
+    result_index: float
+    callback: float
+    plan_page: float
+    elapsed: float
+
+    @property
+    def sequential(self) -> float:
+        """逐个串行请求时的总耗时"""
+        return self.index + self.result_index + self.callback + self.plan_page
+
+    @property
+    def critical_path(self) -> float:
+        """依赖图上最长链路的耗时"""
+        return max(self.index, self.result_index + self.callback) + self.plan_page
+
+
+@dataclass(frozen=True, slots=True)
+class SelectionContext:
+    """解析完成的选课上下文，在同一会话的多次查询和提交之间复用"""
+
+    query: CourseSelectionQuery
+    plan_link: str
+    academic_term: str
+    selection_closed: bool
+    selected_courses: tuple[QuitCourseCandidate, ...]
+    token_value: str | None
+    login_generation: int
+    loaded_at: float
+    token_received_at: float
+    timings: ContextLoadTimings | None = None
+
+    @property
+    def program_plan_number(self) -> str:
+        return self.query.program_plan_number
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def usable_token(self, max_age: float = CONTEXT_TOKEN_REUSE_AGE) -> str | None:
+        """返回仍可直接提交的 tokenValue；过旧时返回 None 由提交方重新获取"""
+        if self.token_value is None:
+            return None
+        if time.monotonic() - self.token_received_at > max_age:
+            return None
+        return self.token_value
+
+    def with_token(self, token: str) -> SelectionContext:
+        return replace(
+            self,
+            token_value=token,
+            token_received_at=time.monotonic(),
+        )
+
+
 @dataclass(frozen=True, slots=True)
 class CourseSelectionSubmitResult:
     """选课提交结果"""
@@ -172,6 +365,102 @@ class CourseSelectionSubmitResult:
     result: str
     token: str = ""
     attempt: int = 1
+    concurrency_windows: tuple[ConcurrencyWindow, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class CourseSnatchOutcome:
+    """多门课程抢课中单门课程的结果"""
+
+    candidate: CourseSelectionCandidate
+    submission: CourseSelectionSubmitResult | None = None
+    failure: str = ""
+    attempts: int = 0
+    token_metrics: TokenMetrics | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.submission is not None and self.submission.succeeded
+
+
+@dataclass(slots=True)
+class _SnatchTarget:
+    candidate: CourseSelectionCandidate
+    form: dict[str, str]
+    attempts: int = 0
+    in_flight: int = 0
+    done: bool = False
+    submission: CourseSelectionSubmitResult | None = None
+    failure: str = ""
+
+    def retire(
+        self,
+        *,
+        submission: CourseSelectionSubmitResult | None = None,
+        failure: str = "",
+    ) -> None:
+        if self.done:
+            return
+        self.done = True
+        self.submission = submission
+        self.failure = failure
+        if submission is not None:
+            log.info(
+                "抢课成功：%s（第 %d 次）",
+                self.candidate.display_name,
+                submission.attempt,
+            )
+        else:
+            log.warning("%s", failure)
+
+    def outcome(
+        self,
+        windows: tuple[ConcurrencyWindow, ...],
+        token_metrics: TokenMetrics,
+    ) -> CourseSnatchOutcome:
+        submission = self.submission
+        if submission is None:
+            return CourseSnatchOutcome(
+                candidate=self.candidate,
+                failure=self.failure
+                or f"持续抢课结束，仍未选中：{self.candidate.display_name}",
+                attempts=self.attempts,
+                token_metrics=token_metrics,
+            )
+        if windows:
+            submission = replace(submission, concurrency_windows=windows)
+        return CourseSnatchOutcome(
+            candidate=self.candidate,
+            submission=submission,
+            attempts=self.attempts,
+            token_metrics=token_metrics,
+        )
+
+
+def diff_course_candidates(
+    previous: Iterable[CourseSelectionCandidate],
+    current: Iterable[CourseSelectionCandidate],
+) -> CourseListDiff:
+    """比较两次课程列表；新增和变化按新列表顺序，移除按旧列表顺序"""
+    before = {course.selection_id: course for course in previous}
+    after = {course.selection_id: course for course in current}
+    return CourseListDiff(
+        added=tuple(
+            course
+            for selection_id, course in after.items()
+            if selection_id not in before
+        ),
+        removed=tuple(
+            course
+            for selection_id, course in before.items()
+            if selection_id not in after
+        ),
+        changed=tuple(
+            (before[selection_id], course)
+            for selection_id, course in after.items()
+            if selection_id in before and before[selection_id] != course
+        ),
+    )
 
 
 def filter_course_candidates(
@@ -179,13 +468,136 @@ def filter_course_candidates(
     course_code: str,
 ) -> list[CourseSelectionCandidate]:
     """按课程号或课程号_课序号筛选课程"""
+    normalized = _normalize_course_code(course_code)
+    if "_" in normalized:
+        return [course for course in candidates if course.course_code == normalized]
+    return [course for course in candidates if course.course_number == normalized]
+
+
+class CandidateIndex:
+    """一次课程列表拉取对应的查询索引
+
+    建立时按课程号、课程号_课序号、教师和上课时段（星期、开始节次）分组，
+    并把每门课的课程名、课程号和教师拼成一整段小写文本；子串搜索交给
+    ``str.find`` 在这段文本上跳跃查找，再用二分定位所在行，不逐条比较。
+    查询结果都按原课程列表的顺序返回。
+    """
+
+    def __init__(self, candidates: Iterable[CourseSelectionCandidate]) -> None:
+        self.candidates = tuple(candidates)
+        self._by_course_number: dict[str, list[int]] = {}
+        self._by_course_code: dict[str, list[int]] = {}
+        self._by_teacher: dict[str, list[int]] = {}
+        self._by_slot: dict[tuple[str, str], list[int]] = {}
+        self._offsets: list[int] = []
+        texts: list[str] = []
+        offset = 0
+        for position, candidate in enumerate(self.candidates):
+            self._by_course_number.setdefault(candidate.course_number, []).append(
+                position,
+            )
+            self._by_course_code.setdefault(candidate.course_code, []).append(position)
+            for teacher in _split_teacher_names(candidate.teacher_name):
+                self._by_teacher.setdefault(teacher, []).append(position)
+            if candidate.weekday:
+                slot = (candidate.weekday, candidate.start_session)
+                self._by_slot.setdefault(slot, []).append(position)
+            text = _search_key(
+                f"{candidate.display_name} {_clean_teacher_name(candidate.teacher_name)}",
+            )
+            self._offsets.append(offset)
+            texts.append(text)
+            offset += len(text) + 1
+        self._haystack = "\n".join(texts)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def __iter__(self) -> Iterator[CourseSelectionCandidate]:
+        return iter(self.candidates)
+
+    def by_course_number(self, course_number: str) -> list[CourseSelectionCandidate]:
+        return self._pick(self._by_course_number.get(course_number.strip().upper()))
+
+    def by_course_code(self, course_code: str) -> list[CourseSelectionCandidate]:
+        return self._pick(self._by_course_code.get(course_code.strip().upper()))
+
+    def by_teacher(self, teacher_name: str) -> list[CourseSelectionCandidate]:
+        return self._pick(self._by_teacher.get(_clean_teacher_name(teacher_name)))
+
+    def by_slot(
+        self,
+        weekday: int | str,
+        start_session: int | str | None = None,
+    ) -> list[CourseSelectionCandidate]:
+        """按星期（1-7）和可选的开始节次查询"""
+        day = str(weekday)
+        if start_session is not None:
+            return self._pick(self._by_slot.get((day, str(start_session))))
+        positions = [
+            position
+            for (slot_day, _), slot_positions in self._by_slot.items()
+            if slot_day == day
+            for position in slot_positions
+        ]
+        return self._pick(sorted(positions))
+
+    def match_code(self, course_code: str) -> list[CourseSelectionCandidate]:
+        """与 ``filter_course_candidates`` 相同的课程号筛选，改为查表"""
+        normalized = _normalize_course_code(course_code)
+        if "_" in normalized:
+            return self.by_course_code(normalized)
+        return self.by_course_number(normalized)
+
+    def search_positions(self, keyword: str) -> list[int]:
+        """返回课程号、课程名或教师中包含 ``keyword`` 的课程下标，忽略大小写"""
+        needle = _search_key(keyword).strip()
+        if not needle:
+            return list(range(len(self.candidates)))
+        positions: list[int] = []
+        haystack = self._haystack
+        start = haystack.find(needle)
+        while start >= 0:
+            position = bisect.bisect_right(self._offsets, start) - 1
+            positions.append(position)
+            if position + 1 >= len(self._offsets):
+                break
+            start = haystack.find(needle, self._offsets[position + 1])
+        return positions
+
+    def search(self, keyword: str) -> list[CourseSelectionCandidate]:
+        return self._pick(self.search_positions(keyword))
+
+    def query(self, text: str) -> list[CourseSelectionCandidate]:
+        """命令行筛选：先按课程号或课程号_课序号查表，查不到时按关键字搜索"""
+        try:
+            matched = self.match_code(text)
+        except ValueError:
+            matched = []
+        return matched or self.search(text)
+
+    def _pick(self, positions: list[int] | None) -> list[CourseSelectionCandidate]:
+        if not positions:
+            return []
+        return [self.candidates[position] for position in positions]
+
+
+def _normalize_course_code(course_code: str) -> str:
     normalized = course_code.strip().upper()
     if not re.fullmatch(r"[A-Z0-9]+(?:_[A-Z0-9]+)?", normalized):
         msg = "课程号格式不合法, 应为课程号或课程号_课序号"
         raise ValueError(msg)
-    if "_" in normalized:
-        return [course for course in candidates if course.course_code == normalized]
-    return [course for course in candidates if course.course_number == normalized]
+    return normalized
+
+
+def _split_teacher_names(text: str) -> list[str]:
+    return [
+        name for name in re.split(r"[\s,，;；、]+", _clean_teacher_name(text)) if name
+    ]
+
+
+def _search_key(text: str) -> str:
+    return text.replace("\n", " ").casefold()
 
 
 def _is_permanent_course_failure(result: str) -> bool:
@@ -355,8 +767,15 @@ def extract_course_select_token(html: str) -> str:
     return match.group(1)
 
 
-def parse_course_candidates(html: str) -> list[CourseSelectionCandidate]:
-    """从 courseList 响应中提取可选课程候选项"""
+def parse_course_candidates(
+    html: str,
+    *,
+    keep_raw: bool = False,
+) -> list[CourseSelectionCandidate]:
+    """从 courseList 响应中提取可选课程候选项
+
+    ``keep_raw`` 为真时在候选项中保留服务端返回的原始对象（JSON 字节）。
+    """
     raw_response = unescape(html)
     response = _parse_course_list_response(raw_response)
     if response is not None:
@@ -365,18 +784,19 @@ def parse_course_candidates(html: str) -> list[CourseSelectionCandidate]:
         normalized = raw_response.replace(r"\"", '"')
         raw_objects = []
         for raw_object in _iter_json_objects_containing(
-            normalized, '"courseNum"'
-        ) + _iter_json_objects_containing(normalized, '"courseName"'):
+            normalized,
+            COURSE_OBJECT_MARKERS,
+        ):
             try:
-                parsed_object = json.loads(raw_object)
-            except json.JSONDecodeError:
+                parsed_object = json_backend.loads(raw_object)
+            except json_backend.JSONDecodeError:
                 continue
             if isinstance(parsed_object, dict):
                 raw_objects.append(parsed_object)
 
     candidates: dict[str, CourseSelectionCandidate] = {}
     for data in raw_objects:
-        candidate = _candidate_from_data(data)
+        candidate = _candidate_from_data(data, keep_raw=keep_raw)
         if candidate is not None:
             candidates[candidate.selection_id] = candidate
     return list(candidates.values())
@@ -384,8 +804,8 @@ def parse_course_candidates(html: str) -> list[CourseSelectionCandidate]:
 
 def _parse_course_list_response(html: str) -> dict[str, Any] | None:
     try:
-        data = json.loads(html)
-    except json.JSONDecodeError:
+        data = json_backend.loads(html)
+    except json_backend.JSONDecodeError:
         return None
     return data if isinstance(data, dict) else None
 
@@ -402,8 +822,8 @@ def _available_course_objects(data: Mapping[str, object]) -> list[dict[str, Any]
         parsed_value = value
         if isinstance(parsed_value, str):
             try:
-                parsed_value = json.loads(parsed_value)
-            except json.JSONDecodeError:
+                parsed_value = json_backend.loads(parsed_value)
+            except json_backend.JSONDecodeError:
                 continue
         if not isinstance(parsed_value, list):
             continue
@@ -418,8 +838,8 @@ def _json_objects_from_text(value: object) -> list[dict[str, Any]]:
     if not isinstance(value, str):
         return []
     try:
-        parsed = json.loads(value)
-    except json.JSONDecodeError:
+        parsed = json_backend.loads(value)
+    except json_backend.JSONDecodeError:
         return []
     if isinstance(parsed, list):
         return [item for item in parsed if isinstance(item, dict)]
@@ -496,6 +916,147 @@ class CourseSelectionClient:
 
     def __init__(self, options: CourseSelectionOptions | None = None) -> None:
         self.options = options or CourseSelectionOptions()
+        self._contexts: weakref.WeakKeyDictionary[
+            AsyncJWSSession,
+            SelectionContext,
+        ] = weakref.WeakKeyDictionary()
+        self._context_lock = asyncio.Lock()
+
+    def cached_context(self, jws: AsyncJWSSession) -> SelectionContext | None:
+        """返回仍然有效的缓存上下文；过期或会话重新认证后返回 None"""
+        context = self._contexts.get(jws)
+        if context is None:
+            return None
+        if (
+            context.login_generation != jws.login_generation
+            or context.age > self.options.context_ttl
+        ):
+            self._contexts.pop(jws, None)
+            return None
+        return context
+
+    def invalidate_context(self, jws: AsyncJWSSession | None = None) -> None:
+        if jws is None:
+            self._contexts.clear()
+        else:
+            self._contexts.pop(jws, None)
+
+    async def load_context(
+        self,
+        jws: AsyncJWSSession,
+        *,
+        refresh: bool = False,
+    ) -> SelectionContext:
+        """解析选课首页、方案入口和方案页面，结果按会话缓存 ``context_ttl`` 秒"""
+        if not refresh and (context := self.cached_context(jws)) is not None:
+            return context
+        async with self._context_lock:
+            if not refresh and (context := self.cached_context(jws)) is not None:
+                return context
+            context = await self._resolve_context(jws)
+            self._contexts[jws] = context
+            return context
+
+    def _remember_token(self, jws: AsyncJWSSession, token: str | None) -> None:
+        context = self._contexts.get(jws)
+        if context is not None and token:
+            self._contexts[jws] = context.with_token(token)
+
+    def _observe_term(self, jws: AsyncJWSSession, term: str) -> None:
+        context = self._contexts.get(jws)
+        if context is not None and term and term != context.academic_term:
+            log.info(
+                "学年学期已从 %s 变为 %s，重新解析选课上下文",
+                context.academic_term,
+                term,
+            )
+            self._contexts.pop(jws, None)
+
+    async def _resolve_context(self, jws: AsyncJWSSession) -> SelectionContext:
+        """按依赖关系解析选课上下文
+
+        选课首页与“选课结果页 → 课表回调”互不依赖，两条链路并发请求；
+        方案页依赖二者给出的方案入口，最后单独请求。
+        """
+        generation = jws.login_generation
+        started = time.perf_counter()
+        (
+            (index_html, index_time),
+            (
+                selection_data,
+                result_time,
+                callback_time,
+            ),
+        ) = await asyncio.gather(
+            _timed(fetch_course_select_index(jws)),
+            self._fetch_selection_data_timed(jws),
+        )
+        selection_closed = _is_course_selection_closed(index_html)
+        plan_link, callback_term, selected_courses = _resolve_plan_link(
+            index_html,
+            selection_data,
+        )
+        if not plan_link:
+            if selection_closed:
+                msg = "当前选课阶段已结束，且无法从已选课程恢复方案入口"
+            else:
+                msg = "选课首页没有找到方案选课入口"
+            raise ServiceError(msg)
+        plan_html, plan_time = await _timed(fetch_course_select_page(jws, plan_link))
+        timings = ContextLoadTimings(
+            index=index_time,
+            result_index=result_time,
+            callback=callback_time,
+            plan_page=plan_time,
+            elapsed=time.perf_counter() - started,
+        )
+        log.debug(
+            "选课上下文解析耗时：首页 %.0f ms，选课结果 %.0f ms，课表回调 %.0f ms，"
+            "方案页 %.0f ms；实际 %.0f ms（关键路径 %.0f ms，串行合计 %.0f ms）",
+            timings.index * 1000,
+            timings.result_index * 1000,
+            timings.callback * 1000,
+            timings.plan_page * 1000,
+            timings.elapsed * 1000,
+            timings.critical_path * 1000,
+            timings.sequential * 1000,
+        )
+        plan_info = parse_course_select_page(plan_html)
+        program_plan_number = plan_info.program_plan_number or _query_value(
+            plan_link, "fajhh"
+        )
+        academic_term = plan_info.academic_term or callback_term
+        if not program_plan_number or not academic_term:
+            msg = "无法从选课页面解析培养方案号或学年学期"
+            raise ServiceError(msg)
+        query = self.build_plan_query(
+            jhxn=academic_term,
+            kcsxdm=plan_info.course_property,
+            xqh=plan_info.campus,
+        )
+        query = CourseSelectionQuery(
+            category=query.category,
+            params={**query.params, "fajhh": program_plan_number},
+            deal_type=query.deal_type,
+            program_plan_number=program_plan_number,
+        )
+        token_value: str | None = None
+        if not selection_closed:
+            with contextlib.suppress(ValueError):
+                token_value = extract_course_select_token(index_html)
+        loaded_at = time.monotonic()
+        return SelectionContext(
+            query=query,
+            plan_link=plan_link,
+            academic_term=academic_term,
+            selection_closed=selection_closed,
+            selected_courses=tuple(selected_courses),
+            token_value=token_value,
+            login_generation=generation,
+            loaded_at=loaded_at,
+            token_received_at=loaded_at,
+            timings=timings,
+        )
 
     @classmethod
     def build_query(
@@ -541,7 +1102,31 @@ class CourseSelectionClient:
         query: CourseSelectionQuery,
     ) -> list[CourseSelectionCandidate]:
         html = await fetch_course_select_list(jws, query.category, query.params)
-        candidates = parse_course_candidates(html)
+        return self._parse_course_list(html)
+
+    async def fetch_candidates_if_changed(
+        self,
+        jws: AsyncJWSSession,
+        query: CourseSelectionQuery,
+        digest: str | None = None,
+    ) -> tuple[list[CourseSelectionCandidate] | None, str]:
+        """重新拉取课程列表，同时返回本次响应的摘要
+
+        ``digest`` 是调用方手中列表对应的摘要；响应与之完全相同时跳过解析，
+        列表返回 None，调用方继续使用原来的列表即可。监视课余量时多数轮次
+        响应不变。
+        """
+        html = await fetch_course_select_list(jws, query.category, query.params)
+        current = _course_list_digest(query, html)
+        if digest == current:
+            return None, current
+        return self._parse_course_list(html), current
+
+    def _parse_course_list(self, html: str) -> list[CourseSelectionCandidate]:
+        candidates = parse_course_candidates(
+            html,
+            keep_raw=self.options.keep_raw_courses,
+        )
         if not candidates:
             raise ServiceError(COURSE_SELECTION_CLOSED_MESSAGE)
         return candidates
@@ -560,6 +1145,7 @@ class CourseSelectionClient:
         """读取退课数据"""
         data = await get_this_semester_timetable(jws)
         term = _extract_context_value(data, "executiveEducationPlanNumber")
+        self._observe_term(jws, term)
         return term, parse_selected_courses(data)
 
     async def fetch_selection_data(
@@ -567,8 +1153,17 @@ class CourseSelectionClient:
         jws: AsyncJWSSession,
     ) -> dict[str, Any]:
         """获取选课结果回调数据，包含培养方案和学期上下文"""
-        await fetch_course_select_result_index(jws)
-        return await get_this_semester_timetable(jws)
+        selection_data, _, _ = await self._fetch_selection_data_timed(jws)
+        return selection_data
+
+    async def _fetch_selection_data_timed(
+        self,
+        jws: AsyncJWSSession,
+    ) -> tuple[dict[str, Any], float, float]:
+        # 课表回调依赖选课结果页初始化的会话状态，两者必须先后请求
+        _, result_time = await _timed(fetch_course_select_result_index(jws))
+        selection_data, callback_time = await _timed(get_this_semester_timetable(jws))
+        return selection_data, result_time, callback_time
 
     async def submit_once(
         self,
@@ -590,6 +1185,17 @@ class CourseSelectionClient:
             ),
             candidates=candidates,
         )
+        result = await self._submit_form(jws, form, attempt=attempt)
+        self._remember_token(jws, result.token)
+        return result
+
+    async def _submit_form(
+        self,
+        jws: AsyncJWSSession,
+        form: dict[str, str],
+        *,
+        attempt: int,
+    ) -> CourseSelectionSubmitResult:
         data = await submit_course_selection(jws, form)
         result = str(data.get("result", ""))
         return CourseSelectionSubmitResult(
@@ -599,7 +1205,7 @@ class CourseSelectionClient:
             attempt=attempt,
         )
 
-    async def snatch_until_success(  # noqa: C901
+    async def snatch_until_success(
         self,
         jws: AsyncJWSSession,
         query: CourseSelectionQuery,
@@ -609,71 +1215,197 @@ class CourseSelectionClient:
         token_value: str | None = None,
     ) -> CourseSelectionSubmitResult:
         """并发持续提交一门课程，成功后取消其余提交任务"""
+        (outcome,) = await self.snatch_many(
+            jws,
+            query,
+            [candidate],
+            options=options,
+            token_value=token_value,
+        )
+        if outcome.submission is None or not outcome.succeeded:
+            raise ServiceError(outcome.failure)
+        return outcome.submission
+
+    async def snatch_many(  # noqa: C901, PLR0915
+        self,
+        jws: AsyncJWSSession,
+        query: CourseSelectionQuery,
+        candidates: Sequence[CourseSelectionCandidate],
+        *,
+        options: CourseSnatchingOptions | None = None,
+        token_value: str | None = None,
+    ) -> list[CourseSnatchOutcome]:
+        """用同一组工作协程和 token 轮流抢多门课程
+
+        每门课程成功或遇到永久失败后立即退出轮转，返回与 ``candidates``
+        顺序一致的逐门结果。
+        """
         strategy = options or CourseSnatchingOptions()
-        stop_event = asyncio.Event()
-        result: CourseSelectionSubmitResult | None = None
-        result_lock = asyncio.Lock()
-        token_lock = asyncio.Lock()
-        current_token = token_value
-
-        async def worker(worker_id: int) -> None:
-            nonlocal current_token, result
-            attempt = worker_id
-            while not stop_event.is_set() and (
-                strategy.attempts == 0 or attempt <= strategy.attempts
-            ):
+        controller = strategy.build_controller()
+        worker_count = controller.maximum if controller else strategy.concurrency
+        tokens = TokenManager(
+            lambda: _fetch_course_select_token(jws),
+            max_age=strategy.token_max_age,
+            refresh_interval=strategy.token_refresh_interval,
+        )
+        if token_value is not None:
+            tokens.offer(token_value, refreshed=True)
+        cursor = 0
+        # 表单只构造一次，每次提交仅替换 tokenValue
+        targets = [
+            _SnatchTarget(
+                candidate=candidate,
+                form=build_course_selection_form(
+                    options=CourseSelectionFormOptions(
+                        deal_type=query.deal_type,
+                        program_plan_number=query.program_plan_number,
+                        token_value="",
+                    ),
+                    candidates=[candidate],
+                ),
+            )
+            for candidate in candidates
+        ]
+
+        def pickable() -> list[_SnatchTarget]:
+            return [
+                target
+                for target in targets
+                if not target.done
+                and (strategy.attempts == 0 or target.attempts < strategy.attempts)
+            ]
+
+        def next_target() -> _SnatchTarget | None:
+            nonlocal cursor
+            active = pickable()
+            if not active:
+                return None
+            target = active[cursor % len(active)]
+            cursor += 1
+            return target
+
+        async def submit(
+            target: _SnatchTarget,
+            attempt: int,
+        ) -> CourseSelectionSubmitResult | None:
+            """提交一次；可重试的失败返回 None，结果计入并发控制统计"""
+            async with controller.slot() if controller else nullcontext():
+                try:
+                    token = await tokens.acquire()
+                except (
+                    ServiceError,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    ValueError,
+                ) as error:
+                    if isinstance(error, ServiceError) and not error.retryable:
+                        raise
+                    # 选课首页刷新失败只影响这一次提交，目标稍后重试；
+                    # 定时抢课按估计时间开抢，首页可能仍显示选课未开放
+                    log.debug("获取 tokenValue 失败，继续重试：%s", error)
+                    return None
+                started = time.perf_counter()
                 try:
-                    async with token_lock:
-                        request_token = current_token
-                    submission = await self.submit_once(
+                    submission = await self._submit_form(
                         jws,
-                        query,
-                        [candidate],
+                        {**target.form, "tokenValue": token},
                         attempt=attempt,
-                        token_value=request_token,
                     )
-                except ServiceError as error:
-                    if not error.retryable:
+                except CsrfTokenExpiredError:
+                    log.debug("tokenValue 已被拒绝，换用新 token 重试")
+                    tokens.reject(token)
+                    await _record_attempt(controller, started)
+                    return None
+                except (
+                    ServiceError,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                ) as error:
+                    if isinstance(error, ServiceError) and not error.retryable:
                         raise
                     log.debug("抢课请求失败，继续重试：%s", error)
-                else:
-                    if submission.token:
-                        async with token_lock:
-                            current_token = submission.token
+                    await _record_attempt(controller, started, error)
+                    return None
+                await _record_attempt(controller, started)
+                tokens.offer(submission.token)
+                if not submission.succeeded and is_token_rejection(submission.result):
+                    tokens.reject(token)
+                return submission
+
+        async def worker() -> None:
+            while (target := next_target()) is not None:
+                target.attempts += 1
+                attempt = target.attempts
+                target.in_flight += 1
+                try:
+                    submission = await submit(target, attempt)
+                except ServiceError as error:
+                    # 不可重试的失败只结束这门课程，其余目标继续轮转
+                    submission = None
+                    target.retire(
+                        failure=f"抢课无法继续：{target.candidate.display_name}，"
+                        f"{error}",
+                    )
+                finally:
+                    target.in_flight -= 1
+                if submission is not None:
                     if submission.succeeded:
-                        async with result_lock:
-                            if result is None:
-                                result = submission
-                                stop_event.set()
-                        return
-                    if _is_permanent_course_failure(submission.result):
-                        msg = f"抢课无法继续：{candidate.display_name}，{submission.result}"
-                        raise ServiceError(msg)
-                    log.debug(
-                        "第 %d 次抢课未成功：%s",
-                        attempt,
-                        submission.result,
+                        target.retire(submission=submission)
+                    elif _is_permanent_course_failure(submission.result):
+                        target.retire(
+                            failure=f"抢课无法继续：{target.candidate.display_name}，"
+                            f"{submission.result}",
+                        )
+                    else:
+                        log.debug(
+                            "%s 第 %d 次抢课未成功：%s",
+                            target.candidate.display_name,
+                            attempt,
+                            submission.result,
+                        )
+                if (
+                    strategy.attempts
+                    and target.attempts >= strategy.attempts
+                    and target.in_flight == 0
+                ):
+                    target.retire(
+                        failure=f"持续抢课结束，仍未选中：{target.candidate.display_name}",
                     )
-                attempt += strategy.concurrency
-                if not stop_event.is_set() and strategy.retry_interval:
+                if strategy.retry_interval and pickable():
                     await asyncio.sleep(strategy.retry_interval)
 
-        workers = [
-            asyncio.create_task(worker(worker_id))
-            for worker_id in range(1, strategy.concurrency + 1)
-        ]
-        try:
-            await asyncio.gather(*workers)
-        finally:
-            for task in workers:
-                if not task.done():
-                    task.cancel()
-            await asyncio.gather(*workers, return_exceptions=True)
-
-        if result is not None:
-            return result
-        msg = f"持续抢课结束，仍未选中：{candidate.display_name}"
-        raise ServiceError(msg)
+        if not targets:
+            return []
+        if strategy.start_at is not None:
+            await _wait_for_opening(jws, strategy, strategy.start_at, worker_count)
+        elif jws.options.warmup_connections:
+            await _warm_up_connections(jws, worker_count)
+
+        # 抢课提交不再逐次探测登录状态，会话失效时由认证中间件重新登录并重放；
+        # tokenValue 被拒绝时只更换 token，不触发重新登录
+        with jws.optimistic_auth(), jws.caller_managed_tokens():
+            async with tokens:
+                workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    for task in workers:
+                        if not task.done():
+                            task.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+
+        self._remember_token(jws, tokens.freshest())
+        metrics = tokens.metrics
+        log.info(
+            "tokenValue 统计：分发 %d 次，响应收集 %d 个，首页刷新 %d 次，"
+            "因 token 失效失败 %d 次",
+            metrics.issued,
+            metrics.harvested,
+            metrics.refreshed,
+            metrics.rejected,
+        )
+        windows = tuple(controller.windows) if controller is not None else ()
+        return [target.outcome(windows, metrics) for target in targets]
 
     async def delete_one(
         self,
@@ -694,48 +1426,18 @@ class CourseSelectionClient:
         )
 
 
-async def handle_course_selection(  # noqa: C901, PLR0912, PLR0915
+async def handle_course_selection(  # noqa: C901, PLR0912
     jws: AsyncJWSSession,
     settings: Settings | None = None,
 ) -> None:
     client = CourseSelectionClient()
-    index_html = await fetch_course_select_index(jws)
-    selection_closed = _is_course_selection_closed(index_html)
+    context = await client.load_context(jws)
+    selection_closed = context.selection_closed
     if selection_closed:
         log.warning("当前未开放选课，以下课程列表仅供预览，暂不能提交选课")
-    plan_link, callback_term, selected_courses = await _resolve_plan_link(
-        jws,
-        index_html,
-        client,
-    )
-    if not plan_link:
-        if _is_course_selection_closed(index_html):
-            msg = "当前选课阶段已结束，且无法从已选课程恢复方案入口"
-        else:
-            msg = "选课首页没有找到方案选课入口"
-        raise ServiceError(msg)
-    plan_html = await fetch_course_select_page(jws, plan_link)
-    plan_info = parse_course_select_page(plan_html)
-    program_plan_number = plan_info.program_plan_number or _query_value(
-        plan_link, "fajhh"
-    )
-    academic_term = plan_info.academic_term or callback_term
-    if not program_plan_number or not academic_term:
-        msg = "无法从选课页面解析培养方案号或学年学期"
-        raise ServiceError(msg)
-    query = CourseSelectionClient.build_plan_query(
-        jhxn=academic_term,
-        kcsxdm=plan_info.course_property,
-        xqh=plan_info.campus,
-    )
-    query = CourseSelectionQuery(
-        category=query.category,
-        params={**query.params, "fajhh": program_plan_number},
-        deal_type=query.deal_type,
-        program_plan_number=program_plan_number,
-    )
+    query = context.query
     courses = await client.fetch_candidates(jws, query)
-    selected_codes = {course.course_code for course in selected_courses}
+    selected_codes = {course.course_code for course in context.selected_courses}
     courses = [course for course in courses if course.course_code not in selected_codes]
     if not courses:
         log.warning("可选课程已全部在已选列表中")
@@ -743,77 +1445,84 @@ async def handle_course_selection(  # noqa: C901, PLR0912, PLR0915
 
     target_code = (
         await aioconsole.ainput(
-            "请输入目标课程号或课程号_课序号, 直接回车显示全部：",
+            "请输入目标课程号、课程号_课序号或课程名/教师关键字, 直接回车显示全部：",
         )
     ).strip()
     if target_code:
-        courses = filter_course_candidates(courses, target_code)
+        courses = CandidateIndex(courses).query(target_code)
         if not courses:
             log.warning("没有找到匹配的可选课程：%s", target_code)
             return
 
     _show_indexed_courses("可选课程", courses)
-    choice = await aioconsole.ainput("请输入要选的课程序号，输入0返回：")
-    index = _parse_single_index(choice, len(courses))
-    if index == 0:
+    choice = await aioconsole.ainput(
+        "请输入要选的课程序号，多个序号用逗号或空格分隔，输入0返回：",
+    )
+    indices = _parse_multiple_indices(choice, len(courses))
+    if not indices:
         return
 
-    selected = courses[index - 1]
-    log.warning("即将提交：%s", selected.display_name)
+    selected = [courses[index - 1] for index in indices]
+    for course in selected:
+        log.warning("即将提交：%s", course.display_name)
     log.warning("确认语句：%s", CONFIRM_SUBMIT_PHRASE)
     confirm = (await aioconsole.ainput("请输入确认语句：")).strip()
     if confirm != CONFIRM_SUBMIT_PHRASE:
         log.warning("已取消")
         return
 
-    mode = (await aioconsole.ainput("输入 1 普通选课，输入 2 持续抢课：")).strip()
-    if mode not in {"1", "2"}:
-        msg = "选课模式必须输入 1 或 2"
+    mode = (
+        await aioconsole.ainput("输入 1 普通选课，输入 2 持续抢课，输入 3 定时抢课：")
+    ).strip()
+    if mode not in {"1", "2", "3"}:
+        msg = "选课模式必须输入 1、2 或 3"
         raise ValueError(msg)
-    if mode == "2":
-        if selection_closed:
+    start_at: datetime | None = None
+    if mode == "3":
+        start_at = parse_start_time(
+            await aioconsole.ainput("请输入开抢时间（服务器时间，如 12:30:00）："),
+        )
+    if mode in {"2", "3"}:
+        if selection_closed and start_at is None:
             msg = "当前未开放选课，处于预览阶段，不能启动持续抢课"
             raise ServiceError(msg)
-        result = await client.snatch_until_success(
+        outcomes = await client.snatch_many(
             jws,
             query,
             selected,
-            options=CourseSnatchingOptions(
-                attempts=settings.course_snatching_attempts if settings else 0,
-                concurrency=(settings.course_snatching_concurrency if settings else 10),
-                retry_interval=(
-                    settings.course_snatching_retry_interval if settings else 0.2
-                ),
-            ),
-            token_value=(
-                extract_course_select_token(index_html)
-                if not selection_closed
-                else None
-            ),
+            options=CourseSnatchingOptions.from_settings(settings, start_at=start_at),
+            token_value=context.usable_token(),
         )
-        log.info("抢课成功：%s（第 %d 次）", selected.display_name, result.attempt)
+        succeeded = [outcome for outcome in outcomes if outcome.succeeded]
+        log.info("抢课结束：成功 %d/%d 门", len(succeeded), len(outcomes))
+        if not succeeded:
+            msg = "\n".join(outcome.failure for outcome in outcomes)
+            raise ServiceError(msg)
         return
 
     result = await client.submit_once(
         jws,
         query,
-        [selected],
-        token_value=(
-            extract_course_select_token(index_html) if not selection_closed else None
-        ),
+        selected,
+        token_value=context.usable_token(),
     )
+    course_names = "、".join(course.display_name for course in selected)
     if not result.succeeded:
-        msg = _format_course_action_result("选课", result.result, selected.display_name)
+        msg = _format_course_action_result("选课", result.result, course_names)
         raise ServiceError(msg)
-    log.info("选课成功：%s", selected.display_name)
+    log.info("选课成功：%s", course_names)
 
 
-async def _resolve_plan_link(
-    jws: AsyncJWSSession,
+async def _timed(awaitable: Awaitable[_T]) -> tuple[_T, float]:
+    started = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - started
+
+
+def _resolve_plan_link(
     index_html: str,
-    client: CourseSelectionClient,
+    selection_data: Mapping[str, Any],
 ) -> tuple[str, str, list[QuitCourseCandidate]]:
-    selection_data = await client.fetch_selection_data(jws)
     program_plan_number = _extract_context_value(
         selection_data,
         "programPlanNumber",
@@ -840,6 +1549,112 @@ async def _resolve_plan_link(
     return "", callback_term, selected_courses
 
 
+async def _warm_up_connections(jws: AsyncJWSSession, connections: int) -> None:
+    report = await jws.warm_up(connections)
+    log.info(
+        "连接预热完成：新建 %d/%d 条，握手延迟 %.0f ms，复用延迟 %.0f ms，总耗时 %.0f ms",
+        report.opened,
+        report.requested,
+        report.open_latency * 1000,
+        report.reuse_latency * 1000,
+        report.elapsed * 1000,
+    )
+    if not report.verified:
+        log.warning(
+            "连接预热未完全生效：复用 %d/%d 条，失败 %d 次",
+            report.reused,
+            report.requested,
+            report.failed,
+        )
+
+
+async def _wait_for_opening(
+    jws: AsyncJWSSession,
+    strategy: CourseSnatchingOptions,
+    start_at: datetime,
+    connections: int,
+) -> None:
+    """按服务器时钟等待开抢时刻，提前半个往返时间发出首轮提交"""
+    estimate = await measure_server_clock(jws, strategy.clock_samples)
+    fire_at = estimate.fire_timestamp(start_at)
+    if fire_at - time.time() > CLOCK_RESYNC_LEAD:
+        # 长时间等待后本地时钟可能漂移，临近开抢时重新校准
+        await sleep_until(fire_at - CLOCK_RESYNC_LEAD)
+        estimate = await measure_server_clock(jws, strategy.clock_samples)
+        fire_at = estimate.fire_timestamp(start_at)
+    log.info(
+        "服务器时钟偏差 %+.3f s（±%.3f s），往返 %.0f ms，将于本地 %s 发起首轮提交",
+        estimate.offset,
+        estimate.uncertainty,
+        estimate.round_trip * 1000,
+        datetime.fromtimestamp(fire_at, tz=start_at.tzinfo).strftime("%H:%M:%S.%f")[
+            :-3
+        ],
+    )
+    if fire_at <= time.time():
+        log.warning("开抢时间已过，立即开始提交")
+        return
+    if jws.options.warmup_connections:
+        await sleep_until(fire_at - SCHEDULED_WARMUP_LEAD)
+        await _warm_up_connections(jws, connections)
+    await sleep_until(fire_at)
+
+
+def parse_start_time(text: str, *, now: datetime | None = None) -> datetime:
+    """解析开抢时间；只给出时分秒时取今天，返回带本地时区的时间"""
+    current = now or datetime.now().astimezone()
+    value = text.strip()
+    for fmt in START_TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)  # noqa: DTZ007
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            parsed = datetime.combine(current.date(), parsed.time())
+        start_at = parsed.replace(tzinfo=current.tzinfo)
+        if start_at <= current:
+            msg = f"开抢时间已过：{value}"
+            raise ValueError(msg)
+        return start_at
+    msg = "开抢时间格式应为 YYYY-MM-DD HH:MM[:SS] 或 HH:MM[:SS]"
+    raise ValueError(msg)
+
+
+async def _fetch_course_select_token(jws: AsyncJWSSession) -> str:
+    index_html = await fetch_course_select_index(jws)
+    return extract_course_select_token(index_html)
+
+
+async def _record_attempt(
+    controller: AdaptiveConcurrencyController | None,
+    started: float,
+    error: Exception | None = None,
+) -> None:
+    if controller is None:
+        return
+    retry_after = error.retry_after if isinstance(error, ServiceError) else None
+    throttled = isinstance(error, ServiceError) and (
+        error.status in THROTTLE_STATUS_CODES or retry_after is not None
+    )
+    window = await controller.record(
+        time.perf_counter() - started,
+        error=error is not None,
+        throttled=throttled,
+        retry_after=retry_after,
+    )
+    if window is None or window.limit == window.next_limit:
+        return
+    log.info(
+        "并发窗口 #%d：%d 次请求，错误率 %.0f%%，中位延迟 %.0f ms，并发 %d → %d",
+        window.index,
+        window.requests,
+        window.error_rate * 100,
+        window.median_latency * 1000,
+        window.limit,
+        window.next_limit,
+    )
+
+
 def _extract_context_value(data: Mapping[str, object], key: str) -> str:
     value = data.get(key)
     if value is not None and str(value).strip():
@@ -910,7 +1725,27 @@ async def handle_course_drop(jws: AsyncJWSSession) -> None:
     raise ServiceError(message)
 
 
-def _candidate_from_data(data: dict[str, Any]) -> CourseSelectionCandidate | None:
+def _course_list_digest(query: CourseSelectionQuery, html: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        repr(
+            (
+                query.category,
+                query.deal_type,
+                query.program_plan_number,
+                sorted(query.params.items()),
+            ),
+        ).encode(),
+    )
+    digest.update(html.encode())
+    return digest.hexdigest()
+
+
+def _candidate_from_data(
+    data: dict[str, Any],
+    *,
+    keep_raw: bool = False,
+) -> CourseSelectionCandidate | None:
     raw_id = data.get("id")
     course_number = _as_text(
         data.get("courseNum")
@@ -936,16 +1771,46 @@ def _candidate_from_data(data: dict[str, Any]) -> CourseSelectionCandidate | Non
     course_name = _as_text(data.get("kcm") or data.get("courseName"))
     if not all((course_number, sequence_number, teaching_class_number, course_name)):
         return None
+    # 学分、类别、教师、地点等在整张列表中大量重复，驻留后各教学班共用一份字符串
     return CourseSelectionCandidate(
         course_number=course_number,
         sequence_number=sequence_number,
         teaching_class_number=teaching_class_number,
-        course_name=course_name,
-        teacher_name=_as_text(data.get("teacherName") or data.get("skjs")),
-        raw=data,
+        course_name=sys.intern(course_name),
+        teacher_name=sys.intern(_as_text(data.get("teacherName") or data.get("skjs"))),
+        plan_term=sys.intern(_as_text(data.get("schemeYear") or data.get("termCode"))),
+        credit=sys.intern(
+            _as_text(data.get("unit") or data.get("xf") or data.get("credit") or ""),
+        ),
+        category=sys.intern(
+            _as_text(
+                data.get("kclbmc")
+                or data.get("kclbm")
+                or data.get("courseCategory")
+                or "",
+            ),
+        ),
+        attribute=sys.intern(
+            _as_text(
+                data.get("kcsxmc")
+                or data.get("kcsxdm")
+                or data.get("courseAttribute")
+                or "",
+            ),
+        ),
+        remaining=_as_text(_first_present(data, "bkskyl", "kyl", "remaining")),
+        schedule=sys.intern(_format_course_schedule_from_raw(data)),
+        location=sys.intern(_format_course_location_from_raw(data)),
+        weekday=sys.intern(_as_text(data.get("weekNum"))),
+        start_session=sys.intern(_as_text(data.get("courseStartNum"))),
+        raw_json=_compact_json(data) if keep_raw else None,
     )
 
 
+def _compact_json(data: dict[str, Any]) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
 def _iter_selected_course_mappings(
     data: Mapping[str, object],
 ) -> list[Mapping[str, object]]:
@@ -1024,6 +1889,15 @@ def _first_time_and_place(course: Mapping[str, object]) -> dict[str, Any]:
     return {}
 
 
+def _first_present(data: Mapping[str, object], *keys: str) -> object:
+    """返回第一个非空的值；与 ``or`` 串联不同，0 会被保留"""
+    for key in keys:
+        value = data.get(key)
+        if value is not None and value != "":
+            return value
+    return None
+
+
 def _as_text(value: object) -> str:
     return "" if value is None else str(value)
 
@@ -1050,21 +1924,18 @@ def _show_indexed_courses(title: str, courses: Sequence[object]) -> None:
         _print_line(f"{title}：")
         _print_line(_format_table_row(headers, widths))
         for index, course in enumerate(courses, start=1):
-            raw = getattr(course, "raw", {}) or {}
             row = [
                 str(index),
-                _as_text(raw.get("schemeYear") or raw.get("termCode")),
+                getattr(course, "plan_term", ""),
                 getattr(course, "display_name", "")
                 or getattr(course, "course_code", ""),
-                _as_text(raw.get("xf")),
-                _as_text(raw.get("kclbmc") or raw.get("kclbm")),
-                _as_text(raw.get("kcsxmc")),
-                _clean_teacher_name(
-                    _as_text(raw.get("skjs") or getattr(course, "teacher_name", ""))
-                ),
-                _as_text(raw.get("bkskyl")),
-                _format_course_schedule_from_raw(raw),
-                _format_course_location_from_raw(raw),
+                getattr(course, "credit", ""),
+                getattr(course, "category", ""),
+                getattr(course, "attribute", ""),
+                _clean_teacher_name(getattr(course, "teacher_name", "")),
+                getattr(course, "remaining", ""),
+                getattr(course, "schedule", ""),
+                getattr(course, "location", ""),
             ]
             _print_line(_format_table_row(row, widths))
         return
@@ -1213,6 +2084,26 @@ def _parse_single_index(raw_choice: str, size: int) -> int:
     return index
 
 
+def _parse_multiple_indices(raw_choice: str, size: int) -> list[int]:
+    """解析逗号或空格分隔的多个序号；输入 0 时返回空列表"""
+    parts = [part for part in re.split(r"[\s,，、]+", raw_choice.strip()) if part]
+    if not parts:
+        msg = "请输入合法序号"
+        raise ValueError(msg)
+    if len(parts) == 1:
+        index = _parse_single_index(parts[0], size)
+        return [index] if index else []
+    indices: list[int] = []
+    for part in parts:
+        index = _parse_single_index(part, size)
+        if index == 0:
+            msg = "多个序号中不能包含 0"
+            raise ValueError(msg)
+        if index not in indices:
+            indices.append(index)
+    return indices
+
+
 def _format_schedule_from_data(data: dict[str, Any]) -> str:
     week_text = _format_week_text(
         _as_text(data.get("weekLyNum") or data.get("classWeek")),
@@ -1309,46 +2200,29 @@ def _section_range_text(value: str, duration: str = "") -> str:
     return f"{start}~{end}节"
 
 
-def _iter_json_objects_containing(text: str, marker: str) -> list[str]:
-    objects: list[str] = []
-    search_from = 0
-    while True:
-        marker_index = text.find(marker, search_from)
-        if marker_index == -1:
-            return objects
-        start = text.rfind("{", 0, marker_index)
-        if start == -1:
-            search_from = marker_index + len(marker)
-            continue
-        end = _find_json_object_end(text, start)
-        if end is not None:
-            objects.append(text[start : end + 1])
-            search_from = end + 1
-        else:
-            search_from = marker_index + len(marker)
-
-
-def _find_json_object_end(text: str, start: int) -> int | None:
-    depth = 0
-    in_string = False
-    escaped = False
-    for index in range(start, len(text)):
-        char = text[index]
-        if escaped:
-            escaped = False
-            continue
-        if char == "\\":
-            escaped = True
-            continue
-        if char == '"':
-            in_string = not in_string
-            continue
-        if in_string:
-            continue
-        if char == "{":
-            depth += 1
-        elif char == "}":
-            depth -= 1
-            if depth == 0:
-                return index
-    return None
+def _iter_json_objects_containing(text: str, markers: Collection[str]) -> list[str]:
+    """一次扫描找出直接包含任一标记键的 JSON 对象
+
+    字符串和花括号由编译好的正则一次切出，Python 只处理这些记号，整体为线性时间。
+    对象结束时若其直接键中出现过标记就输出；已输出对象内部嵌套的对象不重复输出，
+    未闭合的对象忽略。JSON 字符串不能跨行，因此页面中落单的引号不会吞掉后续内容。
+    """
+    objects: list[tuple[int, str]] = []
+    starts: list[int] = []
+    flagged: list[bool] = []
+    for token in _JSON_STRUCTURE_RE.finditer(text):
+        value = token.group()
+        if value == "{":
+            starts.append(token.start())
+            flagged.append(False)
+        elif value == "}":
+            if not starts:
+                continue
+            start = starts.pop()
+            if flagged.pop():
+                while objects and objects[-1][0] > start:
+                    objects.pop()
+                objects.append((start, text[start : token.end()]))
+        elif flagged and value in markers:
+            flagged[-1] = True
+    return [raw_object for _, raw_object in objects]
@@ -0,0 +1,207 @@
+"""抢课提交使用的 tokenValue 池"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from urp_academic_affairs_tools.client import (
+    AuthError,
+    ServiceError,
+    SessionExpiredError,
+)
+from urp_academic_affairs_tools.client.auth import CSRF_FAILURE_MARKERS
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+log = logging.getLogger(__name__)
+MAX_POOLED_TOKENS = 8
+TOKEN_REJECTION_MARKERS = (
+    *CSRF_FAILURE_MARKERS,
+    "token校验失败",
+    "token已过期",
+    "页面已过期",
+    "重复提交",
+)
+
+
+def is_token_rejection(result: str) -> bool:
+    """判断选课接口的业务结果是否表示 tokenValue 被拒绝"""
+    normalized = result.strip().lower()
+    return any(marker in normalized for marker in TOKEN_REJECTION_MARKERS)
+
+
+@dataclass(frozen=True, slots=True)
+class TokenMetrics:
+    """token 池统计；``rejected`` 即因 token 过期或被拒绝而失败的提交数"""
+
+    harvested: int
+    refreshed: int
+    issued: int
+    rejected: int
+    freshest_age: float | None
+
+
+@dataclass(slots=True)
+class _PooledToken:
+    value: str
+    received_at: float
+    rejections: int = 0
+
+
+class TokenManager:
+    """从每个响应和后台刷新的选课首页收集 tokenValue，向提交分发最新的有效 token
+
+    token 被拒绝 ``max_rejections`` 次或超过 ``max_age`` 秒后不再分发；
+    没有可用 token 时所有提交共享同一次首页刷新。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[str]],
+        *,
+        max_age: float = 30.0,
+        max_rejections: int = 1,
+        refresh_interval: float = 5.0,
+    ) -> None:
+        if max_age <= 0 or max_rejections < 1 or refresh_interval < 0:
+            msg = (
+                "max_age must be positive, max_rejections at least 1 "
+                "and refresh_interval non-negative"
+            )
+            raise ValueError(msg)
+        self._fetch = fetch
+        self.max_age = max_age
+        self.max_rejections = max_rejections
+        self.refresh_interval = refresh_interval
+        self._tokens: deque[_PooledToken] = deque(maxlen=MAX_POOLED_TOKENS)
+        self._refreshing: asyncio.Future[str] | None = None
+        self._background: asyncio.Task[None] | None = None
+        self._harvested = 0
+        self._refreshed = 0
+        self._issued = 0
+        self._rejected = 0
+
+    @property
+    def metrics(self) -> TokenMetrics:
+        freshest = self._tokens[-1] if self._tokens else None
+        return TokenMetrics(
+            harvested=self._harvested,
+            refreshed=self._refreshed,
+            issued=self._issued,
+            rejected=self._rejected,
+            freshest_age=(
+                time.monotonic() - freshest.received_at if freshest else None
+            ),
+        )
+
+    def offer(self, token: str, *, refreshed: bool = False) -> None:
+        """收集一个新 token；重复的 token 只刷新时间"""
+        if not token:
+            return
+        if refreshed:
+            self._refreshed += 1
+        else:
+            self._harvested += 1
+        for pooled in self._tokens:
+            if pooled.value == token:
+                self._tokens.remove(pooled)
+                break
+        self._tokens.append(_PooledToken(token, time.monotonic()))
+
+    def reject(self, token: str) -> None:
+        """记录一次因 token 失效导致的提交失败"""
+        self._rejected += 1
+        for pooled in self._tokens:
+            if pooled.value == token:
+                pooled.rejections += 1
+                break
+
+    def freshest(self) -> str | None:
+        """返回最新且未过期、未被拒绝的 token，不计入分发次数"""
+        now = time.monotonic()
+        for pooled in reversed(self._tokens):
+            if now - pooled.received_at > self.max_age:
+                break
+            if pooled.rejections < self.max_rejections:
+                return pooled.value
+        return None
+
+    async def acquire(self) -> str:
+        """返回当前最新的有效 token，必要时等待一次首页刷新"""
+        token = self.freshest()
+        if token is None:
+            token = await self.refresh()
+        self._issued += 1
+        return token
+
+    async def refresh(self) -> str:
+        """重新获取选课首页 token；并发调用共享同一次请求"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh_once())
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh_once(self) -> str:
+        token = await self._fetch()
+        self.offer(token, refreshed=True)
+        return token
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            freshest = self._tokens[-1] if self._tokens else None
+            if (
+                freshest is not None
+                and time.monotonic() - freshest.received_at < self.refresh_interval
+            ):
+                # 提交响应已经带回了足够新的 token
+                continue
+            try:
+                await self.refresh()
+            except (
+                ServiceError,
+                AuthError,
+                SessionExpiredError,
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+            ) as error:
+                log.debug("后台刷新 tokenValue 失败：%s", error)
+
+    def start(self) -> None:
+        if self.refresh_interval and self._background is None:
+            self._background = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        tasks = [
+            task for task in (self._background, self._refreshing) if task is not None
+        ]
+        self._background = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+
+    async def __aenter__(self) -> Self:
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.stop()
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import ctypes
 import sys
 from datetime import datetime, timezone
@@ -34,11 +33,12 @@ from PySide6.QtWidgets import (
 from urp_academic_affairs_tools.client import (
     fetch_tasks,
 )
+from urp_academic_affairs_tools.client.captcha_worker import configure_captcha_solver
 from urp_academic_affairs_tools.config import load_settings
 from urp_academic_affairs_tools.export import export_timetable_excel
 from urp_academic_affairs_tools.parser.evaluation import TeachingEvaluationClient
 
-from .core import AsyncWorker
+from .core import LoopRunner
 from .pages.course_page import CoursePage
 from .pages.drop_page import DropPage
 from .pages.evaluation_page import EvaluationPage
@@ -53,12 +53,16 @@ if TYPE_CHECKING:
 
     from urp_academic_affairs_tools.config import Settings
     from urp_academic_affairs_tools.course_selection import (
+        CourseListDiff,
         CourseSelectionCandidate,
         QuitCourseCandidate,
     )
     from urp_academic_affairs_tools.parser.evaluation import EvaluationTask
     from urp_academic_affairs_tools.parser.timetable import TimetableEntry
 
+    from .core import TaskHandle
+    from .services import CourseListSnapshot
+
 HOME_PAGE_INDEX = 0
 COURSE_PAGE_INDEX = 1
 DROP_PAGE_INDEX = 2
@@ -171,9 +175,12 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.settings = settings
         self.service = service or UrpService(settings, username, password)
-        self.workers: dict[str, AsyncWorker] = {}
+        self.runner = LoopRunner(self.service.engine, parent=self)
+        self.tasks: dict[str, TaskHandle] = {}
         self.courses_loaded = False
+        self.course_snapshot: CourseListSnapshot | None = None
         self.course_snatch_enabled = False
+        self.course_schedule_enabled = False
         self.selected_courses_loaded = False
         self.evaluation_loaded = False
         self.logged_out = False
@@ -185,6 +192,7 @@ class MainWindow(QMainWindow):
         self.current_time_label: QLabel
         self.login_time = _local_now()
         self.clock_timer = QTimer(self)
+        self.course_watch_timer = QTimer(self)
         self.setWindowTitle("URP Tools")
         self.setFixedSize(MAIN_WINDOW_WIDTH, MAIN_WINDOW_HEIGHT)
         self.setWindowFlags(
@@ -245,6 +253,7 @@ class MainWindow(QMainWindow):
         self.course_page = CoursePage(
             on_refresh=self.refresh_courses,
             on_submit=self.submit_selected_course,
+            on_cancel=lambda: self.cancel_task("course_submit"),
             on_mode_changed=self._set_course_mode,
         )
         self.drop_page = DropPage(
@@ -262,7 +271,7 @@ class MainWindow(QMainWindow):
             on_refresh=self.refresh_timetable,
             on_export=self.export_timetable,
         )
-        self.score_page = ScorePage(self.service, self._run)
+        self.score_page = ScorePage(self.service, self._run, self.cancel_task)
         self.pages.addWidget(self.timetable_page)
         self.pages.addWidget(self.score_page)
         self.nav.currentRowChanged.connect(self.pages.setCurrentIndex)
@@ -281,6 +290,11 @@ class MainWindow(QMainWindow):
         self._update_clock()
         self.clock_timer.timeout.connect(self._update_clock)
         self.clock_timer.start(100)
+        self.course_watch_timer.setInterval(
+            round(self.settings.course_refresh_interval * 1000),
+        )
+        self.course_watch_timer.timeout.connect(self.refresh_courses)
+        self.course_page.watch.toggled.connect(self._watch_courses)
         self.nav.setCurrentRow(HOME_PAGE_INDEX)
 
     def _update_clock(self) -> None:
@@ -291,9 +305,10 @@ class MainWindow(QMainWindow):
             "当前时间\n" + _local_now().strftime("%Y-%m-%d %H:%M:%S")
         )
 
-    def _set_course_mode(self, *, snatch: bool) -> None:
+    def _set_course_mode(self, *, snatch: bool, scheduled: bool = False) -> None:
         self.course_snatch_enabled = snatch
-        self.course_page.set_mode(snatch=snatch)
+        self.course_schedule_enabled = scheduled
+        self.course_page.set_mode(snatch=snatch, scheduled=scheduled)
 
     def _run(
         self,
@@ -303,65 +318,73 @@ class MainWindow(QMainWindow):
         *,
         loading_label: QLabel | None = None,
     ) -> None:
-        current = self.workers.get(key)
-        if current is not None and current.isRunning():
+        current = self.tasks.get(key)
+        if current is not None and current.is_running():
             return
         if loading_label is not None:
             loading_label.show()
-        worker = AsyncWorker(operation)
-        self.workers[key] = worker
-        worker.succeeded.connect(
-            lambda result, key=key, worker=worker: self._finish_worker(
+        task = self.runner.submit(operation)
+        self.tasks[key] = task
+        task.succeeded.connect(
+            lambda result, key=key, task=task: self._finish_task(
                 key,
-                worker,
+                task,
                 callback,
                 result,
             )
         )
-        worker.failed.connect(
-            lambda message, key=key, worker=worker: self._fail_worker(
+        task.failed.connect(
+            lambda message, key=key, task=task: self._fail_task(
                 key,
-                worker,
+                task,
                 message,
             )
         )
-        worker.finished.connect(
-            lambda key=key, worker=worker, label=loading_label: self._cleanup_worker(
+        task.finished.connect(
+            lambda key=key, task=task, label=loading_label: self._cleanup_task(
                 key,
-                worker,
+                task,
                 label,
             )
         )
-        worker.start()
 
-    def _finish_worker(
+    def cancel_task(self, key: str) -> None:
+        """取消仍在运行的后台任务；结果回调和错误提示都不会再触发。"""
+        task = self.tasks.get(key)
+        if task is not None:
+            task.cancel()
+
+    def _finish_task(
         self,
         key: str,
-        worker: AsyncWorker,
+        task: TaskHandle,
         callback: Callable[[object], None],
         result: object,
     ) -> None:
-        if self.workers.get(key) is not worker:
+        if self.tasks.get(key) is not task:
             return
         callback(result)
         self._update_account_status()
 
-    def _fail_worker(self, key: str, worker: AsyncWorker, message: str) -> None:
-        if self.workers.get(key) is not worker:
+    def _fail_task(self, key: str, task: TaskHandle, message: str) -> None:
+        if self.tasks.get(key) is not task:
             return
+        if key == "courses":
+            # 监视余量时刷新失败不再每隔几秒弹一次错误
+            self.course_page.watch.setChecked(False)
         self._failed(message)
 
-    def _cleanup_worker(
+    def _cleanup_task(
         self,
         key: str,
-        worker: AsyncWorker,
+        task: TaskHandle,
         loading_label: QLabel | None,
     ) -> None:
-        if self.workers.get(key) is worker:
-            self.workers.pop(key, None)
+        if self.tasks.get(key) is task:
+            self.tasks.pop(key, None)
         if loading_label is not None:
             loading_label.hide()
-        worker.deleteLater()
+        task.deleteLater()
 
     def _update_account_status(self) -> None:
         if self.service.session_state == "concurrent_session_recovered":
@@ -381,6 +404,17 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, title, message)
 
     def refresh_courses(self) -> None:
+        snapshot = self.course_snapshot
+        if self.courses_loaded and snapshot is not None:
+            previous = list(self.course_page.courses)
+            watching = self.course_watch_timer.isActive()
+            self._run(
+                "courses",
+                lambda: self.service.refresh_courses(previous, snapshot),
+                self._update_courses,
+                loading_label=None if watching else self.course_page.loading,
+            )
+            return
         self._run(
             "courses",
             self.service.courses,
@@ -388,11 +422,25 @@ class MainWindow(QMainWindow):
             loading_label=self.course_page.loading,
         )
 
+    def _watch_courses(self, enabled: bool) -> None:  # noqa: FBT001
+        if not enabled:
+            self.course_watch_timer.stop()
+            return
+        self.course_watch_timer.start()
+        self.refresh_courses()
+
+    def _update_courses(
+        self,
+        result: tuple[str, CourseListDiff, CourseListSnapshot],
+    ) -> None:
+        term, diff, self.course_snapshot = result
+        self.course_page.update_courses(term, diff)
+
     def _show_courses(
         self,
-        result: tuple[str, list[CourseSelectionCandidate]],
+        result: tuple[str, list[CourseSelectionCandidate], CourseListSnapshot],
     ) -> None:
-        term, courses = result
+        term, courses, self.course_snapshot = result
         self.courses_loaded = True
         self.course_page.show_courses(term, courses)
 
@@ -402,9 +450,19 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "未选择课程", "请勾选要提交的课程任务")
             return
         snatch = self.course_snatch_enabled
+        start_at = None
+        if self.course_schedule_enabled:
+            start_at = self.course_page.scheduled_start()
+            if start_at <= _local_now():
+                QMessageBox.information(self, "时间无效", "开抢时间必须晚于当前时间")
+                return
         self._run(
             "course_submit",
-            lambda: self.service.submit_courses(courses, snatch=snatch),
+            lambda: self.service.submit_courses(
+                courses,
+                snatch=snatch,
+                start_at=start_at,
+            ),
             lambda message: self._show_info("提交结果", message),
             loading_label=self.course_page.loading,
         )
@@ -439,9 +497,9 @@ class MainWindow(QMainWindow):
 
     def refresh_evaluations(self) -> None:
         async def operation() -> list[EvaluationTask]:
-            async with await self.service.session() as jws:
-                data = await fetch_tasks(jws)
-                return TeachingEvaluationClient.tasks_from_data(data)
+            jws = await self.service.session()
+            data = await fetch_tasks(jws)
+            return TeachingEvaluationClient.tasks_from_data(data)
 
         self._run(
             "evaluations",
@@ -549,6 +607,8 @@ def run_gui() -> None:
     app.setWindowIcon(QIcon(str(LOGO_PATH)))
     app.setStyleSheet(load_stylesheet())
     settings = load_settings()
+    # 用户输入账号密码期间在后台加载验证码模型
+    configure_captcha_solver(settings.captcha_worker)
     while True:
         dialog = LoginDialog(settings, _load_known_accounts())
         if dialog.exec() != QDialog.DialogCode.Accepted:
@@ -559,13 +619,15 @@ def run_gui() -> None:
             continue
         service = UrpService(settings, username, password)
         try:
-            asyncio.run(service.verify_login())
+            service.engine.run(service.verify_login())
         except Exception as error:  # noqa: BLE001
+            service.shutdown()
             QMessageBox.critical(None, "登录失败", str(error))
             continue
         _remember_account(username)
         window = MainWindow(settings, username, password, service=service)
         window.show()
         app.exec()
+        service.shutdown()
         if not window.logged_out:
             return
@@ -1,5 +1,6 @@
 """GUI 基础设施。"""
 
-from .async_worker import AsyncWorker
+from .event_loop import EventLoopThread
+from .loop_runner import LoopRunner, TaskHandle
 
-__all__ = ["AsyncWorker"]
+__all__ = ["EventLoopThread", "LoopRunner", "TaskHandle"]
@@ -0,0 +1,95 @@
+"""把协程投递到常驻事件循环，并以 Qt 信号回传结果。"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any
+
+from PySide6.QtCore import QObject, Qt, Signal
+
+from .event_loop import EventLoopThread
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+
+class TaskHandle(QObject):
+    """后台协程在 Qt 侧的句柄；信号总在句柄所在线程触发。"""
+
+    succeeded = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+    finished = Signal()
+    _completed = Signal()
+
+    def __init__(
+        self,
+        future: Future[Any],
+        parent: QObject | None = None,
+        *,
+        exited: Future[None] | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._future = future
+        # cancel() 会立刻把 future 标记为已取消，协程却还在清理；
+        # 以协程真正退出为准，清理结束前任务仍算运行中
+        self._exited = exited or future
+        # 完成回调可能发生在事件循环线程，也可能在 cancel() 中同步触发；
+        # 统一排队回到句柄线程再分发，调用方在 submit 之后连接的信号不会错过结果
+        self._completed.connect(
+            self._deliver,
+            Qt.ConnectionType.QueuedConnection,
+        )
+        self._exited.add_done_callback(lambda _future: self._completed.emit())
+
+    def is_running(self) -> bool:
+        return not self._exited.done()
+
+    def cancel(self) -> bool:
+        """取消协程；已完成的任务返回 False。"""
+        return self._future.cancel()
+
+    def _deliver(self) -> None:
+        future = self._future
+        if future.cancelled():
+            self.cancelled.emit()
+        else:
+            error = future.exception()
+            if error is not None:
+                self.failed.emit(str(error))
+            else:
+                self.succeeded.emit(future.result())
+        self.finished.emit()
+
+
+class LoopRunner(QObject):
+    """持有一个常驻事件循环线程，替代每次操作新建 QThread 和事件循环。"""
+
+    def __init__(
+        self,
+        engine: EventLoopThread | None = None,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.engine = engine or EventLoopThread()
+
+    def submit(
+        self,
+        operation: Callable[[], Coroutine[Any, Any, Any]],
+    ) -> TaskHandle:
+        coroutine = operation()
+        exited: Future[None] = Future()
+
+        async def run() -> Any:  # noqa: ANN401
+            # 任务结束回调排在结果回传之后，触发时 future 已有结果
+            task = asyncio.current_task()
+            if task is not None:
+                task.add_done_callback(lambda _task: exited.set_result(None))
+            return await coroutine
+
+        future = asyncio.run_coroutine_threadsafe(run(), self.engine.start())
+        return TaskHandle(future, parent=self, exited=exited)
+
+    def stop(self) -> None:
+        self.engine.stop()
@@ -2,15 +2,17 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Protocol
+from typing import TYPE_CHECKING, Protocol, cast
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QDateTime, Qt
 from PySide6.QtGui import QActionGroup
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QCheckBox,
+    QDateTimeEdit,
     QHBoxLayout,
     QLabel,
+    QLineEdit,
     QMenu,
     QPushButton,
     QTableWidget,
@@ -20,33 +22,36 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from urp_academic_affairs_tools.course_selection.course_selection import (
-    _format_course_location_from_raw,
-    _format_course_schedule_from_raw,
-)
+from urp_academic_affairs_tools.course_selection import CandidateIndex
 from urp_academic_affairs_tools.gui.widgets.table_utils import configure_table
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from datetime import datetime
 
-    from urp_academic_affairs_tools.course_selection import CourseSelectionCandidate
+    from urp_academic_affairs_tools.course_selection import (
+        CourseListDiff,
+        CourseSelectionCandidate,
+    )
 
 
 class ModeChanged(Protocol):
-    def __call__(self, *, snatch: bool) -> None: ...
+    def __call__(self, *, snatch: bool, scheduled: bool = False) -> None: ...
 
 
 class CoursePage(QWidget):
-    def __init__(
+    def __init__(  # noqa: PLR0915
         self,
         *,
         on_refresh: Callable[[], None],
         on_submit: Callable[[], None],
+        on_cancel: Callable[[], None],
         on_mode_changed: ModeChanged,
         parent: QWidget | None = None,
     ) -> None:
         super().__init__(parent)
         self.courses: list[CourseSelectionCandidate] = []
+        self.index = CandidateIndex(())
         self.checks: list[QCheckBox] = []
         layout = QVBoxLayout(self)
         actions = QHBoxLayout()
@@ -54,13 +59,26 @@ class CoursePage(QWidget):
         refresh.clicked.connect(on_refresh)
         submit = QPushButton("提交选中课程")
         submit.clicked.connect(on_submit)
+        stop = QPushButton("停止提交")
+        stop.setToolTip("取消正在进行的选课或持续抢课")
+        stop.clicked.connect(on_cancel)
         actions.addWidget(refresh)
         actions.addWidget(submit)
+        actions.addWidget(stop)
+        self.watch = QCheckBox("监视余量")
+        self.watch.setToolTip("定时刷新课程列表，只更新余量等有变化的行")
+        actions.addWidget(self.watch)
         actions.addStretch()
         self.loading = QLabel("正在加载课程...")
         self.loading.setObjectName("InlineLoading")
         self.loading.hide()
         actions.addWidget(self.loading)
+        self.start_time = QDateTimeEdit(QDateTime.currentDateTime().addSecs(300))
+        self.start_time.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.start_time.setCalendarPopup(True)
+        self.start_time.setToolTip("开抢时间（按服务器时钟校准后发出首轮提交）")
+        self.start_time.hide()
+        actions.addWidget(self.start_time)
         self.mode_button = QToolButton()
         self.mode_button.setObjectName("CourseMode")
         self.mode_button.setText("...")
@@ -69,9 +87,14 @@ class CoursePage(QWidget):
         menu = QMenu(self.mode_button)
         self.normal_mode_action = menu.addAction("普通选课")
         self.continuous_mode_action = menu.addAction("持续抢课")
+        self.scheduled_mode_action = menu.addAction("定时抢课")
         mode_group = QActionGroup(self.mode_button)
         mode_group.setExclusive(True)
-        for action in (self.normal_mode_action, self.continuous_mode_action):
+        for action in (
+            self.normal_mode_action,
+            self.continuous_mode_action,
+            self.scheduled_mode_action,
+        ):
             action.setCheckable(True)
             mode_group.addAction(action)
         self.normal_mode_action.setChecked(True)
@@ -81,12 +104,23 @@ class CoursePage(QWidget):
         self.continuous_mode_action.triggered.connect(
             lambda: on_mode_changed(snatch=True),
         )
+        self.scheduled_mode_action.triggered.connect(
+            lambda: on_mode_changed(snatch=True, scheduled=True),
+        )
         self.mode_button.setMenu(menu)
         actions.addWidget(self.mode_button)
         layout.addLayout(actions)
         self.term = QLabel("当前计划学年学期：未加载")
         self.term.setObjectName("CourseTerm")
-        layout.addWidget(self.term)
+        self.filter = QLineEdit()
+        self.filter.setPlaceholderText("筛选课程名、课程号或教师")
+        self.filter.setClearButtonEnabled(True)
+        self.filter.textChanged.connect(self.apply_filter)
+        header = QHBoxLayout()
+        header.addWidget(self.term)
+        header.addStretch()
+        header.addWidget(self.filter)
+        layout.addLayout(header)
         self.table = QTableWidget(0, 9)
         self.table.setHorizontalHeaderLabels(
             [
@@ -110,60 +144,110 @@ class CoursePage(QWidget):
         configure_table(self.table, [42, 270, 45, 75, 75, 105, 55, 195, 0])
         layout.addWidget(self.table)
 
-    def set_mode(self, *, snatch: bool) -> None:
+    def set_mode(self, *, snatch: bool, scheduled: bool = False) -> None:
         self.normal_mode_action.setChecked(not snatch)
-        self.continuous_mode_action.setChecked(snatch)
-        mode_name = "持续抢课" if snatch else "普通选课"
+        self.continuous_mode_action.setChecked(snatch and not scheduled)
+        self.scheduled_mode_action.setChecked(scheduled)
+        self.start_time.setVisible(scheduled)
+        mode_name = "普通选课"
+        if scheduled:
+            mode_name = "定时抢课"
+        elif snatch:
+            mode_name = "持续抢课"
         self.mode_button.setToolTip(f"选课模式：{mode_name}")
 
+    def scheduled_start(self) -> datetime:
+        """返回带本地时区的开抢时间"""
+        value = cast("datetime", self.start_time.dateTime().toPython())
+        return value.astimezone()
+
     def show_courses(
         self,
         term: str,
         courses: list[CourseSelectionCandidate],
     ) -> None:
-        self.courses = courses
+        self.courses = list(courses)
+        self.index = CandidateIndex(courses)
         self.checks = []
         self.term.setText(f"当前计划学年学期：{term or '未知'}")
         self.table.setRowCount(0)
-        for course in courses:
+        self.table.setRowCount(len(courses))
+        for row, course in enumerate(courses):
+            self._add_task_check(row)
+            self._set_row(row, course)
+        self.apply_filter(self.filter.text())
+
+    def update_courses(self, term: str, diff: CourseListDiff) -> None:
+        """按差异只改动变化的行，勾选状态、筛选条件和滚动位置都保留"""
+        self.term.setText(f"当前计划学年学期：{term or '未知'}")
+        if diff.unchanged:
+            return
+        rows = {course.selection_id: row for row, course in enumerate(self.courses)}
+        for old, new in diff.changed:
+            row = rows.get(old.selection_id)
+            if row is not None:
+                self.courses[row] = new
+                self._set_row(row, new)
+        removed = sorted(
+            (
+                rows[course.selection_id]
+                for course in diff.removed
+                if course.selection_id in rows
+            ),
+            reverse=True,
+        )
+        for row in removed:
+            self.table.removeRow(row)
+            del self.courses[row]
+            del self.checks[row]
+        for course in diff.added:
             row = self.table.rowCount()
             self.table.insertRow(row)
-            task_check = QCheckBox()
-            task_check.setObjectName("CourseTaskCheck")
-            holder = QWidget()
-            holder_layout = QHBoxLayout(holder)
-            holder_layout.setContentsMargins(0, 0, 0, 0)
-            holder_layout.addStretch()
-            holder_layout.addWidget(task_check)
-            holder_layout.addStretch()
-            self.table.setCellWidget(row, 0, holder)
-            self.checks.append(task_check)
-            raw = course.raw or {}
-            values = [
-                course.display_name,
-                str(raw.get("unit") or raw.get("xf") or raw.get("credit") or ""),
-                str(
-                    raw.get("kclbmc")
-                    or raw.get("kclbm")
-                    or raw.get("courseCategory")
-                    or ""
-                ),
-                str(
-                    raw.get("kcsxmc")
-                    or raw.get("kcsxdm")
-                    or raw.get("courseAttribute")
-                    or ""
-                ),
-                course.teacher_name.replace("*", ""),
-                str(raw.get("bkskyl") or raw.get("kyl") or raw.get("remaining") or ""),
-                _format_course_schedule_from_raw(raw),
-                _format_course_location_from_raw(raw),
-            ]
-            for column, value in enumerate(values, start=1):
-                item = QTableWidgetItem(value)
-                if column in {2, 3, 4, 5, 6}:
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, column, item)
+            self.courses.append(course)
+            self._add_task_check(row)
+            self._set_row(row, course)
+        self.index = CandidateIndex(self.courses)
+        self.apply_filter(self.filter.text())
+
+    def _add_task_check(self, row: int) -> None:
+        task_check = QCheckBox()
+        task_check.setObjectName("CourseTaskCheck")
+        holder = QWidget()
+        holder_layout = QHBoxLayout(holder)
+        holder_layout.setContentsMargins(0, 0, 0, 0)
+        holder_layout.addStretch()
+        holder_layout.addWidget(task_check)
+        holder_layout.addStretch()
+        self.table.setCellWidget(row, 0, holder)
+        self.checks.insert(row, task_check)
+
+    def _set_row(self, row: int, course: CourseSelectionCandidate) -> None:
+        values = [
+            course.display_name,
+            course.credit,
+            course.category,
+            course.attribute,
+            course.teacher_name.replace("*", ""),
+            course.remaining,
+            course.schedule,
+            course.location,
+        ]
+        for column, value in enumerate(values, start=1):
+            item = self.table.item(row, column)
+            if item is not None:
+                if item.text() != value:
+                    item.setText(value)
+                continue
+            item = QTableWidgetItem(value)
+            if column in {2, 3, 4, 5, 6}:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.table.setItem(row, column, item)
+
+    def apply_filter(self, keyword: str) -> None:
+        """只显示课程名、课程号或教师包含关键字的行，已勾选的课程保持勾选"""
+        visible = set(self.index.search_positions(keyword))
+        for row in range(self.table.rowCount()):
+            self.table.setRowHidden(row, row not in visible)
 
     def selected_courses(self) -> list[CourseSelectionCandidate]:
         return [
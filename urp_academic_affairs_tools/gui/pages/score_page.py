@@ -49,11 +49,14 @@ class ScorePage(QWidget):
         self,
         service: ScoreService,
         run_task: RunTask,
+        cancel_task: Callable[[str], None] | None = None,
         parent: QWidget | None = None,
     ) -> None:
         super().__init__(parent)
         self.service = service
         self._run_task = run_task
+        self._cancel_task = cancel_task
+        self._pending_task = ""
         self.records: list[ScoreRecord] = []
         self.passing_records: list[ScoreRecord] = []
         self.cache: dict[ScoreView, list[ScoreRecord]] = {}
@@ -118,8 +121,17 @@ class ScorePage(QWidget):
 
     def refresh(self, view: ScoreView = ScoreView.PASSING) -> None:
         self.current_view = view
+        key = f"scores:{view.value}"
+        # 切换视图时取消上一个视图的加载，避免旧结果晚到后覆盖当前表格
+        if (
+            self._cancel_task is not None
+            and self._pending_task
+            and self._pending_task != key
+        ):
+            self._cancel_task(self._pending_task)
+        self._pending_task = key
         self._run_task(
-            f"scores:{view.value}",
+            key,
             lambda: self.service.scores(view),
             lambda records: self.show_scores(view, records),
             loading_label=self.loading,
@@ -144,6 +156,8 @@ class ScorePage(QWidget):
         self._set_passing_term(terms[0].value if terms else "")
 
     def show_scores(self, view: ScoreView, records: list[ScoreRecord]) -> None:
+        if self._pending_task == f"scores:{view.value}":
+            self._pending_task = ""
         self.loaded = True
         self.cache[view] = records
         self.records = records
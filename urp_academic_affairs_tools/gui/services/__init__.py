@@ -1,3 +1,3 @@
-from .urp_service import UrpService
+from .urp_service import CourseListSnapshot, UrpService
 
-__all__ = ["UrpService"]
+__all__ = ["CourseListSnapshot", "UrpService"]
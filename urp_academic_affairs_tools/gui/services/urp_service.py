@@ -1,27 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING
-from urllib.parse import parse_qs, urlparse
 
 import aiohttp
 
 from urp_academic_affairs_tools.client import (
     AsyncJWSSession,
     AuthenticationFailure,
-    extract_token_value,
+    SessionOptions,
+    SessionStore,
     fetch_tasks,
 )
+from urp_academic_affairs_tools.client.captcha_worker import configure_captcha_solver
 from urp_academic_affairs_tools.course_selection import (
+    CourseListDiff,
     CourseSelectionClient,
-    CourseSelectionQuery,
     CourseSnatchingOptions,
-    parse_course_select_page,
-)
-from urp_academic_affairs_tools.course_selection.course_selection import (
-    _resolve_plan_link,
+    diff_course_candidates,
 )
 from urp_academic_affairs_tools.export import export_timetable_excel
+from urp_academic_affairs_tools.gui.core.event_loop import EventLoopThread
 from urp_academic_affairs_tools.parser.evaluation import (
     EvaluationOptions,
     TeachingEvaluationClient,
@@ -34,60 +35,116 @@ from urp_academic_affairs_tools.score_query import (
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
+    from datetime import datetime
 
     from urp_academic_affairs_tools.config import Settings
     from urp_academic_affairs_tools.course_selection import (
         CourseSelectionCandidate,
         QuitCourseCandidate,
+        SelectionContext,
     )
     from urp_academic_affairs_tools.parser.evaluation import EvaluationTask
     from urp_academic_affairs_tools.parser.timetable import TimetableEntry
     from urp_academic_affairs_tools.score_query import ScoreRecord
 
 
+RECOVERED_SESSION_STATES = {
+    "concurrent_session_expired": "concurrent_session_recovered",
+    "csrf_token_expired": "csrf_token_recovered",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class CourseListSnapshot:
+    """课程页列表的来源：课程列表响应摘要和当时的已选课程"""
+
+    digest: str
+    selected_codes: frozenset[str]
+
+
 class UrpService:
-    def __init__(self, settings: Settings, username: str, password: str) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        username: str,
+        password: str,
+        *,
+        engine: EventLoopThread | None = None,
+    ) -> None:
         self.settings = settings
         self.username = username
         self.password = password
+        self.engine = engine or EventLoopThread()
         self.cookie_jar: aiohttp.CookieJar | None = None
         self.has_authenticated_session = False
         self.session_state = "initial"
+        self._jws: AsyncJWSSession | None = None
+        self._session_lock = asyncio.Lock()
+        self.course_client = CourseSelectionClient()
+        self.captcha_solver = configure_captcha_solver(settings.captcha_worker)
+        self.session_store = (
+            SessionStore(settings.session_file) if settings.session_file else None
+        )
 
     async def session(self) -> AsyncJWSSession:
+        """返回常驻会话；连接池和登录状态在整个 GUI 生命周期内复用。"""
+        async with self._session_lock:
+            jws = self._jws
+            if jws is not None and jws.started:
+                if self.session_state in RECOVERED_SESSION_STATES.values():
+                    self.session_state = "valid"
+                return jws
+            return await self._open_session()
+
+    async def _open_session(self) -> AsyncJWSSession:
         if self.cookie_jar is None:
             self.cookie_jar = aiohttp.CookieJar()
         jws = AsyncJWSSession(
             base_url=self.settings.base_url,
+            options=SessionOptions(
+                speculative_logins=self.settings.speculative_logins,
+                session_keepalive_interval=self.settings.session_keepalive_interval,
+            ),
             cookie_jar=self.cookie_jar,
+            captcha_solver=self.captcha_solver,
+            session_store=self.session_store,
         )
         jws.set_reauthentication_callback(self._mark_session_recovered)
         jws.set_session_expired_callback(self._mark_session_expired)
         await jws.start()
-        if not await jws.is_logged_in():
-            await jws.login(self.username, self.password)
-            if self.has_authenticated_session:
-                recovered_states = {
-                    "concurrent_session_expired": "concurrent_session_recovered",
-                    "csrf_token_expired": "csrf_token_recovered",
-                }
-                self.session_state = recovered_states.get(
-                    self.session_state,
-                    "recovered",
-                )
+        try:
+            if not await jws.resume(self.username, self.password):
+                await jws.login(self.username, self.password)
+                if self.has_authenticated_session:
+                    self._mark_session_recovered()
+                else:
+                    self.session_state = "connected"
             else:
-                self.session_state = "connected"
-        else:
-            self.session_state = "valid"
+                self.session_state = "valid"
+        except BaseException:
+            await jws.close()
+            raise
         self.has_authenticated_session = True
+        self._jws = jws
         return jws
 
+    async def close(self) -> None:
+        jws = self._jws
+        self._jws = None
+        if jws is not None:
+            await jws.close()
+
+    def shutdown(self) -> None:
+        """关闭常驻会话并停止后台事件循环。"""
+        if self.engine.running:
+            self.engine.run(self.close())
+        self.engine.stop()
+
     def _mark_session_recovered(self) -> None:
-        recovered_states = {
-            "concurrent_session_expired": "concurrent_session_recovered",
-            "csrf_token_expired": "csrf_token_recovered",
-        }
-        self.session_state = recovered_states.get(self.session_state, "recovered")
+        self.session_state = RECOVERED_SESSION_STATES.get(
+            self.session_state,
+            "recovered",
+        )
 
     def _mark_session_expired(self, reason: AuthenticationFailure) -> None:
         states = {
@@ -100,142 +157,147 @@ class UrpService:
 
     async def verify_login(self) -> None:
         """登录并验证。"""
-        async with await self.session() as jws:
-            await jws.request_text("GET", "/index.jsp")
-
-    async def courses(self) -> tuple[str, list[CourseSelectionCandidate]]:
-        async with await self.session() as jws:
-            index_html = await jws.request_text(
-                "GET",
-                "/student/courseSelect/courseSelect/index",
-            )
-            client = CourseSelectionClient()
-            plan_link, callback_term, selected = await _resolve_plan_link(
-                jws,
-                index_html,
-                client,
-            )
-            if not plan_link:
-                return "", []
-            plan_html = await jws.request_text("GET", plan_link)
-            page = parse_course_select_page(plan_html)
-            plan_number = page.program_plan_number or _query_value(plan_link, "fajhh")
-            term = page.academic_term or callback_term
-            query = CourseSelectionClient.build_plan_query(
-                jhxn=term,
-                kcsxdm=page.course_property,
-                xqh=page.campus,
-            )
-            query = CourseSelectionQuery(
-                category=query.category,
-                params={**query.params, "fajhh": plan_number},
-                deal_type=query.deal_type,
-                program_plan_number=plan_number,
-            )
-            candidates = await client.fetch_candidates(jws, query)
-            selected_codes = {course.course_code for course in selected}
-            return term, [
-                course
-                for course in candidates
-                if course.course_code not in selected_codes
-            ]
+        jws = await self.session()
+        await jws.request_text("GET", "/index.jsp")
+
+    async def courses(
+        self,
+    ) -> tuple[str, list[CourseSelectionCandidate], CourseListSnapshot]:
+        jws = await self.session()
+        context = await self.course_client.load_context(jws)
+        # 不传入摘要时总会解析，列表不会是 None
+        candidates, digest = await self.course_client.fetch_candidates_if_changed(
+            jws,
+            context.query,
+        )
+        selected_codes = _selected_codes(context)
+        return (
+            context.academic_term,
+            _selectable_courses(candidates or [], selected_codes),
+            CourseListSnapshot(digest, selected_codes),
+        )
+
+    async def refresh_courses(
+        self,
+        previous: Sequence[CourseSelectionCandidate],
+        snapshot: CourseListSnapshot,
+    ) -> tuple[str, CourseListDiff, CourseListSnapshot]:
+        """重新拉取课程列表，只返回相对 ``previous`` 的变化
+
+        ``snapshot`` 是 ``previous`` 对应的来源；响应和已选课程都没变时
+        跳过解析，否则重新筛选并比较。
+        """
+        jws = await self.session()
+        context = await self.course_client.load_context(jws)
+        selected_codes = _selected_codes(context)
+        candidates, digest = await self.course_client.fetch_candidates_if_changed(
+            jws,
+            context.query,
+            snapshot.digest if snapshot.selected_codes == selected_codes else None,
+        )
+        current = CourseListSnapshot(digest, selected_codes)
+        if candidates is None:
+            return context.academic_term, CourseListDiff(), current
+        return (
+            context.academic_term,
+            diff_course_candidates(
+                previous,
+                _selectable_courses(candidates, selected_codes),
+            ),
+            current,
+        )
 
     async def submit_course(
         self,
         candidate: CourseSelectionCandidate,
         *,
         snatch: bool,
+        start_at: datetime | None = None,
     ) -> str:
-        async with await self.session() as jws:
-            client = CourseSelectionClient()
-            index_html = await jws.request_text(
-                "GET",
-                "/student/courseSelect/courseSelect/index",
-            )
-            plan_link, callback_term, _ = await _resolve_plan_link(
+        return await self.submit_courses([candidate], snatch=snatch, start_at=start_at)
+
+    async def submit_courses(
+        self,
+        candidates: Sequence[CourseSelectionCandidate],
+        *,
+        snatch: bool,
+        start_at: datetime | None = None,
+    ) -> str:
+        """复用缓存的选课上下文直接提交；抢课模式下所有课程共用同一个抢课引擎"""
+        jws = await self.session()
+        client = self.course_client
+        context = await client.load_context(jws)
+        query = context.query
+        token = context.usable_token()
+        lines: list[str] = []
+        succeeded = 0
+        if snatch:
+            outcomes = await client.snatch_many(
                 jws,
-                index_html,
-                client,
-            )
-            plan_html = await jws.request_text("GET", plan_link)
-            page = parse_course_select_page(plan_html)
-            plan_number = page.program_plan_number or _query_value(plan_link, "fajhh")
-            query = CourseSelectionClient.build_plan_query(
-                jhxn=page.academic_term or callback_term,
-                kcsxdm=page.course_property,
-                xqh=page.campus,
-            )
-            query = CourseSelectionQuery(
-                category=query.category,
-                params={**query.params, "fajhh": plan_number},
-                deal_type=query.deal_type,
-                program_plan_number=plan_number,
+                query,
+                candidates,
+                options=CourseSnatchingOptions.from_settings(
+                    self.settings,
+                    start_at=start_at,
+                ),
+                token_value=token,
             )
-            token = extract_token_value(index_html)
-            if snatch:
-                result = await client.snatch_until_success(
-                    jws,
-                    query,
-                    candidate,
-                    options=CourseSnatchingOptions(
-                        attempts=self.settings.course_snatching_attempts,
-                        concurrency=self.settings.course_snatching_concurrency,
-                        retry_interval=self.settings.course_snatching_retry_interval,
-                    ),
-                    token_value=token,
-                )
-            else:
+            for outcome in outcomes:
+                if outcome.succeeded:
+                    succeeded += 1
+                    lines.append(f"{outcome.candidate.display_name} 提交成功")
+                else:
+                    lines.append(outcome.failure)
+        else:
+            for candidate in candidates:
                 result = await client.submit_once(
                     jws,
                     query,
                     [candidate],
                     token_value=token,
                 )
-            if not result.succeeded:
-                raise RuntimeError(result.result)
-            return f"{candidate.display_name} 提交成功"
-
-    async def submit_courses(
-        self,
-        candidates: Sequence[CourseSelectionCandidate],
-        *,
-        snatch: bool,
-    ) -> str:
-        results = [
-            await self.submit_course(candidate, snatch=snatch)
-            for candidate in candidates
-        ]
-        return "\n".join(results)
+                token = result.token or None
+                if result.succeeded:
+                    succeeded += 1
+                    lines.append(f"{candidate.display_name} 提交成功")
+                else:
+                    lines.append(f"{candidate.display_name} 提交失败：{result.result}")
+        message = "\n".join(lines)
+        if not succeeded:
+            raise RuntimeError(message)
+        # 已选课程发生变化，下次刷新时重新解析上下文
+        client.invalidate_context(jws)
+        return message
 
     async def selected_courses(self) -> tuple[str, list[QuitCourseCandidate]]:
-        async with await self.session() as jws:
-            client = CourseSelectionClient()
-            return await client.fetch_selected_courses_with_term(jws)
+        jws = await self.session()
+        return await self.course_client.fetch_selected_courses_with_term(jws)
 
     async def drop_course(self, course: QuitCourseCandidate) -> str:
-        async with await self.session() as jws:
-            client = CourseSelectionClient()
-            return await client.delete_one(
-                jws,
-                fajhh=course.program_plan_number,
-                course_number=course.course_number,
-                sequence_number=course.sequence_number,
-            )
+        jws = await self.session()
+        result = await self.course_client.delete_one(
+            jws,
+            fajhh=course.program_plan_number,
+            course_number=course.course_number,
+            sequence_number=course.sequence_number,
+        )
+        self.course_client.invalidate_context(jws)
+        return result
 
     async def evaluate(self, tasks: Sequence[EvaluationTask]) -> int:
-        async with await self.session() as jws:
-            data = await fetch_tasks(jws)
-            client = TeachingEvaluationClient(
-                options=EvaluationOptions(
-                    default_choice=self.settings.default_choice,
-                    comment=self.settings.default_comment,
-                    wait_seconds=self.settings.evaluation_wait_seconds,
-                    submit_limit=self.settings.evaluation_limit,
-                    concurrency=self.settings.evaluation_concurrency,
-                ),
-                confirm=_true_async,
-            )
-            return await client.run(jws, data, selected_tasks=tasks)
+        jws = await self.session()
+        data = await fetch_tasks(jws)
+        client = TeachingEvaluationClient(
+            options=EvaluationOptions(
+                default_choice=self.settings.default_choice,
+                comment=self.settings.default_comment,
+                wait_seconds=self.settings.evaluation_wait_seconds,
+                submit_limit=self.settings.evaluation_limit,
+                concurrency=self.settings.evaluation_concurrency,
+            ),
+            confirm=_true_async,
+        )
+        return await client.run(jws, data, selected_tasks=tasks)
 
     async def timetable(self, filename: str) -> str:
         courses = await self.timetable_entries()
@@ -243,22 +305,28 @@ class UrpService:
         return str(output)
 
     async def timetable_entries(self) -> list[TimetableEntry]:
-        async with await self.session() as jws:
-            data = await jws.request_json(
-                "GET",
-                "/student/courseSelect/thisSemesterCurriculum/callback",
-            )
-            return parse_timetable(data)
+        jws = await self.session()
+        data = await jws.request_json(
+            "GET",
+            "/student/courseSelect/thisSemesterCurriculum/callback",
+        )
+        return parse_timetable(data)
 
     async def scores(self, view: ScoreView) -> list[ScoreRecord]:
-        async with await self.session() as jws:
-            return await ScoreQueryClient(jws).query(view)
+        jws = await self.session()
+        return await ScoreQueryClient(jws).query(view)
 
 
 async def _true_async(_tasks: Sequence[EvaluationTask]) -> bool:
     return True
 
 
-def _query_value(path: str, key: str) -> str:
-    values = parse_qs(urlparse(path).query).get(key, [])
-    return values[0] if values else ""
+def _selected_codes(context: SelectionContext) -> frozenset[str]:
+    return frozenset(course.course_code for course in context.selected_courses)
+
+
+def _selectable_courses(
+    candidates: Sequence[CourseSelectionCandidate],
+    selected_codes: frozenset[str],
+) -> list[CourseSelectionCandidate]:
+    return [course for course in candidates if course.course_code not in selected_codes]
@@ -16,8 +16,11 @@ from .client import (
     AsyncJWSSession,
     AuthError,
     ServiceError,
+    SessionOptions,
+    SessionStore,
     get_this_semester_timetable,
 )
+from .client.captcha_worker import configure_captcha_solver
 from .config import load_settings
 from .course_selection import handle_course_drop, handle_course_selection
 from .export import export_timetable_excel
@@ -87,7 +90,19 @@ async def main() -> None:
     settings = load_settings()
     username, password = settings.require_credentials()
 
-    async with AsyncJWSSession(base_url=settings.base_url) as jws:
+    captcha_solver = configure_captcha_solver(settings.captcha_worker)
+
+    async with AsyncJWSSession(
+        base_url=settings.base_url,
+        options=SessionOptions(
+            speculative_logins=settings.speculative_logins,
+            session_keepalive_interval=settings.session_keepalive_interval,
+        ),
+        captcha_solver=captcha_solver,
+        session_store=(
+            SessionStore(settings.session_file) if settings.session_file else None
+        ),
+    ) as jws:
         await jws.login(username, password)
 
         while True:
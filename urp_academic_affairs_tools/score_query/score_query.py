@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import re
 import sys
@@ -13,6 +12,8 @@ from enum import Enum
 from typing import TYPE_CHECKING, Any
 
 import aioconsole
+
+from urp_academic_affairs_tools.client import json_backend
 from urp_academic_affairs_tools.client.errors import ServiceError
 
 if TYPE_CHECKING:
@@ -87,8 +88,8 @@ class ScoreQueryClient:
     ) -> object:
         text = await self.jws.request_text(method, path, data=data)
         try:
-            return json.loads(text)
-        except json.JSONDecodeError as error:
+            return json_backend.loads(text)
+        except json_backend.JSONDecodeError as error:
             msg = "score query data response is not valid JSON"
             raise ServiceError(msg) from error
 